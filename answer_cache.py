@@ -0,0 +1,136 @@
+import json
+import os
+import threading
+
+import numpy as np
+
+from config import ANSWER_CACHE_THRESHOLD, ANSWER_CACHE_MAX_ENTRIES
+from metrics import registry as metrics
+
+# Prompts answered from the cache, and the argument holding the candidate's question
+SEMANTIC_PROMPTS = {"handle_candidate_question": "question"}
+
+
+def load_faq(path):
+    # [{"question": ..., "answer": ..., "variants": [other phrasings]}, ...]
+    if not path or not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+class AnswerCache:
+    # Reuses answers to candidate questions that mean the same thing ("Is this
+    # remote?" / "Can I work from home?"). Question embeddings are rows of one
+    # normalized matrix, so a lookup is a single matrix-vector product; a hit
+    # needs cosine similarity >= threshold. Approved FAQ answers are pinned,
+    # other entries are evicted least recently used first.
+    def __init__(self, model=None, threshold=ANSWER_CACHE_THRESHOLD, max_entries=ANSWER_CACHE_MAX_ENTRIES, faq=None):
+        self.model = model
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.vectors = None
+        self.last_used = np.zeros(0, dtype=np.int64)
+        self.pinned = np.zeros(0, dtype=bool)
+        self.questions = []
+        self.answers = []
+        self.size = 0
+        self.pinned_count = 0
+        self.clock = 0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if faq:
+            self.seed(faq)
+
+    def _model(self):
+        if self.model is None:
+            from resources import get_embedding_model
+
+            self.model = get_embedding_model()
+        return self.model
+
+    def embed(self, question):
+        vector = np.asarray(self._model().encode_query(question), dtype=np.float32)
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+    def _best_match(self, vector):
+        if not self.size:
+            return None, -1.0
+        similarities = self.vectors[:self.size] @ vector
+        row = int(np.argmax(similarities))
+        return row, float(similarities[row])
+
+    def get(self, question, vector=None):
+        if vector is None:
+            vector = self.embed(question)
+        with self.lock:
+            row, similarity = self._best_match(vector)
+            if row is not None and similarity >= self.threshold:
+                self.clock += 1
+                self.last_used[row] = self.clock
+                self.hits += 1
+                metrics.inc("answer_cache_total", result="hit")
+                return self.answers[row]
+            self.misses += 1
+        metrics.inc("answer_cache_total", result="miss")
+        return None
+
+    def _slot(self, pinned):
+        # Once full, the least recently used unpinned row is overwritten; pinned
+        # FAQ rows are never candidates, and with no unpinned row nothing is stored
+        if not pinned and self.size - self.pinned_count >= self.max_entries:
+            unpinned = np.flatnonzero(~self.pinned[:self.size])
+            if not len(unpinned):
+                return None
+            metrics.inc("answer_cache_evictions_total")
+            return int(unpinned[np.argmin(self.last_used[unpinned])])
+        if self.size == len(self.vectors):
+            capacity = max(16, 2 * self.size)
+            vectors = np.zeros((capacity, self.vectors.shape[1]), dtype=np.float32)
+            vectors[:self.size] = self.vectors[:self.size]
+            self.vectors = vectors
+            self.last_used = np.resize(self.last_used, capacity)
+            self.pinned = np.resize(self.pinned, capacity)
+            self.questions.extend([None] * (capacity - len(self.questions)))
+            self.answers.extend([None] * (capacity - len(self.answers)))
+        self.size += 1
+        return self.size - 1
+
+    def add(self, question, answer, vector=None, pinned=False):
+        if vector is None:
+            vector = self.embed(question)
+        with self.lock:
+            if self.vectors is None:
+                self.vectors = np.zeros((0, len(vector)), dtype=np.float32)
+            row, similarity = self._best_match(vector)
+            # A concurrent miss may already have stored an answer for this question
+            if row is not None and similarity >= self.threshold and not pinned:
+                return
+            row = self._slot(pinned)
+            if row is None:
+                return
+            self.clock += 1
+            self.vectors[row] = vector
+            self.last_used[row] = self.clock
+            self.pinned[row] = pinned
+            self.questions[row] = question
+            self.answers[row] = answer
+            if pinned:
+                self.pinned_count += 1
+
+    def seed(self, faq):
+        for entry in faq:
+            for question in [entry["question"]] + list(entry.get("variants", [])):
+                self.add(question, entry["answer"], pinned=True)
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": self.size,
+                "pinned": self.pinned_count,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
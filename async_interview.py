@@ -0,0 +1,326 @@
+import asyncio
+import os
+import time
+
+from config import LLM_MAX_CONCURRENCY, LLM_CALL_TIMEOUT, SESSION_IDLE_TIMEOUT, SESSION_STORE, TRACE_DIR
+from interview_manager import ConversationalHRAssistant, SAY
+from question_cache import is_static_prompt
+from response_filter import DisclosureFilter
+from metrics import registry as metrics, record_llm_tokens
+from resilient_llm import LLMDeadlineExceeded
+
+
+class AsyncHRAssistant(ConversationalHRAssistant):
+    # Runs the same conversation steps as ConversationalHRAssistant, but awaits
+    # llm.ainvoke so one event loop can host many interviews at once.
+    def __init__(self, groq_llm=None, llm_semaphore=None, llm_timeout=LLM_CALL_TIMEOUT, **kwargs):
+        super().__init__(groq_llm=groq_llm, **kwargs)
+        self.llm_semaphore = llm_semaphore or asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+        self.llm_timeout = llm_timeout
+
+    async def _ainvoke_llm(self, prompt_key, **kwargs):
+        llm = self._get_llm()
+        # Resume retrieval may hit the vector store, so keep it off the event loop
+        prompt = await asyncio.to_thread(self._format_prompt, prompt_key, **kwargs)
+        async with self.llm_semaphore:
+            with metrics.timer("llm_call_seconds", trace=self.trace, prompt=prompt_key):
+                try:
+                    message = await asyncio.wait_for(llm.ainvoke(prompt), self.llm_timeout)
+                except asyncio.TimeoutError as e:
+                    # An outage, so _fallback serves a cached or offline question
+                    raise LLMDeadlineExceeded(f"LLM call exceeded {self.llm_timeout}s") from e
+        record_llm_tokens(prompt, message)
+        return self._filter_response(message.content.strip())
+
+    async def _aproduce_question(self, prompt_key, **kwargs):
+        try:
+            question = self._answer_cache_question(prompt_key, kwargs)
+            if question is not None:
+                # Embedding is CPU-bound, so the lookup runs off the event loop
+                response, vector = await asyncio.to_thread(self._lookup_answer, question)
+                if response is None:
+                    response = await self._ainvoke_llm(prompt_key, **kwargs)
+                    self._store_answer(question, vector, response)
+            elif self.question_cache is not None and is_static_prompt(prompt_key):
+                response = await self.question_cache.aget_or_generate(
+                    prompt_key, kwargs, lambda: self._ainvoke_llm(prompt_key, **kwargs)
+                )
+            else:
+                response = await self._ainvoke_llm(prompt_key, **kwargs)
+            if response is None:
+                return self._fallback(prompt_key)
+            return response
+        except Exception as e:
+            return self._fallback(prompt_key, e, kwargs)
+
+    async def _agenerate_question(self, prompt_key, **kwargs):
+        speculative = self._take_speculation(prompt_key, kwargs)
+        if speculative is not None:
+            return await speculative
+        return await self._aproduce_question(prompt_key, **kwargs)
+
+    def _submit_speculation(self, prompt_key, kwargs):
+        return asyncio.get_running_loop().create_task(self._aproduce_question(prompt_key, **kwargs))
+
+    async def _adrive(self, steps):
+        try:
+            prompt_key, kwargs = next(steps)
+            while True:
+                if prompt_key == SAY:
+                    reply = kwargs["text"]
+                else:
+                    reply = await self._agenerate_question(prompt_key, **kwargs)
+                prompt_key, kwargs = steps.send(reply)
+        except StopIteration as stop:
+            return stop.value
+
+    async def _astream_question(self, prompt_key, kwargs, result):
+        # Async generators cannot return a value, so the final text goes in result["text"]
+        speculative = self._take_speculation(prompt_key, kwargs)
+        if speculative is not None:
+            result["text"] = await speculative
+            yield result["text"]
+            return
+        cacheable = self.question_cache is not None and is_static_prompt(prompt_key)
+        if cacheable:
+            cached = self.question_cache.get(prompt_key, kwargs)
+            if cached is not None:
+                result["text"] = cached
+                yield cached
+                return
+        question = self._answer_cache_question(prompt_key, kwargs)
+        if question is not None:
+            cached, question_vector = await asyncio.to_thread(self._lookup_answer, question)
+            if cached is not None:
+                result["text"] = cached
+                yield cached
+                return
+
+        response_filter = DisclosureFilter()
+        try:
+            llm = self._get_llm()
+            prompt = await asyncio.to_thread(self._format_prompt, prompt_key, **kwargs)
+            async with self.llm_semaphore:
+                stream = llm.astream(prompt)
+                loop = asyncio.get_running_loop()
+                deadline = loop.time() + self.llm_timeout
+                try:
+                    with metrics.timer("llm_call_seconds", trace=self.trace, prompt=prompt_key):
+                        while True:
+                            # One deadline for the whole stream, checked while waiting on
+                            # the LLM, so a stalled stream cannot keep its semaphore permit
+                            try:
+                                chunk = await asyncio.wait_for(stream.__anext__(), deadline - loop.time())
+                            except StopAsyncIteration:
+                                break
+                            except asyncio.TimeoutError as e:
+                                raise LLMDeadlineExceeded(f"LLM stream exceeded {self.llm_timeout}s") from e
+                            released = response_filter.feed(chunk.content)
+                            if released:
+                                yield released
+                            if response_filter.flagged:
+                                break
+                finally:
+                    await stream.aclose()
+            record_llm_tokens(prompt, response_filter.text)
+            if not response_filter.flagged:
+                released = response_filter.finish()
+                if released:
+                    yield released
+                if cacheable:
+                    self.question_cache.add(prompt_key, kwargs, response_filter.text)
+                if question is not None:
+                    self._store_answer(question, question_vector, response_filter.text)
+                result["text"] = response_filter.text
+                return
+            metrics.inc("disclosure_filter_hits_total")
+            fallback = self._fallback(prompt_key)
+        except Exception as e:
+            fallback = self._fallback(prompt_key, e, kwargs)
+        emitted = response_filter.emitted_text
+        separator = " " if emitted and not emitted.endswith(" ") else ""
+        result["text"] = f"{emitted}{separator}{fallback}"
+        yield f"{separator}{fallback}"
+
+    async def astream_response(self, candidate_response):
+        turn = {"start": time.perf_counter(), "first_chunk": None, "emitted": []}
+
+        def track(chunk):
+            if chunk and turn["first_chunk"] is None:
+                turn["first_chunk"] = time.perf_counter()
+            turn["emitted"].append(chunk)
+            return chunk
+
+        steps = self._response_steps(candidate_response)
+        try:
+            prompt_key, kwargs = next(steps)
+            while True:
+                if prompt_key == SAY:
+                    reply = kwargs["text"]
+                    yield track(reply)
+                else:
+                    result = {}
+                    async for chunk in self._astream_question(prompt_key, kwargs, result):
+                        yield track(chunk)
+                    reply = result["text"]
+                prompt_key, kwargs = steps.send(reply)
+        except StopIteration as stop:
+            final_text = stop.value
+        emitted = "".join(turn["emitted"])
+        if final_text.startswith(emitted) and len(final_text) > len(emitted):
+            yield track(final_text[len(emitted):])
+        self._record_turn_timing(turn)
+
+    async def agenerate_next_question(self, last_response=None, resume=""):
+        return await self._adrive(self._next_question_steps(last_response, resume))
+
+    async def ahandle_candidate_questions(self, question):
+        return await self._adrive(self._candidate_question_steps(question))
+
+    async def aprocess_response(self, candidate_response):
+        with metrics.timer("turn_seconds", trace=self.trace, mode="async"):
+            return await self._adrive(self._response_steps(candidate_response))
+
+
+class SessionNotFound(KeyError):
+    pass
+
+
+class SessionManager:
+    # Holds many AsyncHRAssistant instances keyed by session id. All sessions
+    # share one semaphore bounding outstanding LLM calls; turns within a session
+    # are serialized and idle sessions are expired. With a session store, state
+    # is saved after every turn and a session unknown to this worker is
+    # restored from the store, so any worker can continue any interview. New
+    # transcript lines are queued during a turn and written with the state in a
+    # worker thread, so store I/O never blocks the event loop.
+    def __init__(self, llm, max_concurrent_llm_calls=LLM_MAX_CONCURRENCY, llm_timeout=LLM_CALL_TIMEOUT,
+                 idle_timeout=SESSION_IDLE_TIMEOUT, session_store=None, **assistant_kwargs):
+        self.llm = llm
+        self.llm_semaphore = asyncio.Semaphore(max_concurrent_llm_calls)
+        self.llm_timeout = llm_timeout
+        self.idle_timeout = idle_timeout
+        if session_store is None and SESSION_STORE != "none":
+            from session_store import create_session_store
+
+            session_store = create_session_store()
+        self.session_store = session_store
+        self.assistant_kwargs = assistant_kwargs
+        self.sessions = {}
+        self.locks = {}
+        self.last_active = {}
+        self.pending_turns = {}
+
+    def _new_assistant(self, session_id, candidate_info):
+        assistant = AsyncHRAssistant(
+            groq_llm=self.llm, llm_semaphore=self.llm_semaphore, llm_timeout=self.llm_timeout,
+            **self.assistant_kwargs
+        )
+        assistant.candidate_info = candidate_info
+        if assistant.trace is not None:
+            assistant.trace.session_id = session_id
+        if self.session_store is not None:
+            pending = self.pending_turns[session_id] = []
+            assistant.transcript_sink = lambda seq, entry: pending.append((seq, entry))
+        self.sessions[session_id] = assistant
+        self.locks[session_id] = asyncio.Lock()
+        self.last_active[session_id] = time.monotonic()
+        return assistant
+
+    def _write(self, session_id, turns, state):
+        # Transcript lines go first, so a saved state never points past the transcript
+        for seq, entry in turns:
+            self.session_store.append_turn(session_id, seq, entry)
+        self.session_store.save_state(session_id, state)
+
+    async def _save(self, session_id, assistant):
+        if self.session_store is None:
+            return
+        pending = self.pending_turns[session_id]
+        turns = pending[:]
+        del pending[:]
+        await asyncio.to_thread(self._write, session_id, turns, assistant.snapshot_state())
+
+    def _load(self, session_id):
+        state = self.session_store.load_state(session_id)
+        return state, self.session_store.load_transcript(session_id) if state is not None else []
+
+    async def _restore(self, session_id):
+        if self.session_store is None:
+            raise SessionNotFound(session_id)
+        state, transcript = await asyncio.to_thread(self._load, session_id)
+        if state is None:
+            raise SessionNotFound(session_id)
+        # Another turn may have restored the session while this one was loading
+        if session_id in self.sessions:
+            return self.sessions[session_id]
+        assistant = self._new_assistant(session_id, state.get("candidate_info"))
+        assistant.restore_state(state, transcript)
+        assistant.prefetch_candidate_session()
+        return assistant
+
+    async def _get(self, session_id):
+        assistant = self.sessions.get(session_id)
+        if assistant is None:
+            assistant = await self._restore(session_id)
+        return assistant
+
+    async def start_session(self, session_id, candidate_info):
+        assistant = self._new_assistant(session_id, candidate_info)
+        assistant.prefetch_candidate_session()
+        greeting = assistant.initial_greeting(candidate_info["name"])
+        await self._save(session_id, assistant)
+        return greeting
+
+    async def respond(self, session_id, candidate_response):
+        assistant = await self._get(session_id)
+        async with self.locks[session_id]:
+            self.last_active[session_id] = time.monotonic()
+            reply = await assistant.aprocess_response(candidate_response)
+            await self._save(session_id, assistant)
+            self.last_active[session_id] = time.monotonic()
+        return reply
+
+    async def stream_respond(self, session_id, candidate_response):
+        assistant = await self._get(session_id)
+        async with self.locks[session_id]:
+            self.last_active[session_id] = time.monotonic()
+            async for chunk in assistant.astream_response(candidate_response):
+                yield chunk
+            await self._save(session_id, assistant)
+            self.last_active[session_id] = time.monotonic()
+
+    def end_session(self, session_id, discard=False):
+        # Idle expiry only unloads the session; discard=True also removes it from the store
+        assistant = self.sessions.pop(session_id, None)
+        self.locks.pop(session_id, None)
+        self.last_active.pop(session_id, None)
+        self.pending_turns.pop(session_id, None)
+        if assistant is not None:
+            assistant.close()
+            if assistant.trace is not None and TRACE_DIR:
+                os.makedirs(TRACE_DIR, exist_ok=True)
+                assistant.trace.write(os.path.join(TRACE_DIR, f"{session_id}.json"))
+        if discard and self.session_store is not None:
+            self.session_store.delete(session_id)
+        return assistant
+
+    def expire_idle_sessions(self):
+        now = time.monotonic()
+        expired = [
+            session_id for session_id, last in self.last_active.items()
+            if now - last > self.idle_timeout and not self.locks[session_id].locked()
+        ]
+        for session_id in expired:
+            self.end_session(session_id)
+        return expired
+
+    async def run_reaper(self, interval=30.0):
+        while True:
+            await asyncio.sleep(interval)
+            self.expire_idle_sessions()
+            if self.session_store is not None:
+                await asyncio.to_thread(self.session_store.purge)
+
+    def __len__(self):
+        return len(self.sessions)
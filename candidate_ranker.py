@@ -0,0 +1,240 @@
+import argparse
+import os
+import re
+
+import numpy as np
+
+from config import CANDIDATE_CATALOG_PATH, RANKING_TOP_N
+from metrics import registry as metrics
+
+
+def normalize_skill(skill):
+    # "Node.js", "node js" and "NodeJS" all index as "nodejs"
+    return re.sub(r"[\s.\-_]+", "", str(skill).lower())
+
+
+def normalize_location(location):
+    return " ".join(str(location or "").lower().split())
+
+
+def structured_fields(candidate_data):
+    # Candidate fields stored as vector metadata and in the ranking catalog
+    try:
+        years = float(candidate_data.get("experience_years") or 0)
+    except (TypeError, ValueError):
+        years = 0.0
+    return {
+        "skills": sorted({normalize_skill(skill) for skill in candidate_data.get("skills") or [] if skill}),
+        "experience_years": years,
+        "location": str(candidate_data.get("location", "") or ""),
+        "current_role": str(candidate_data.get("current_role", "") or ""),
+    }
+
+
+class CandidateCatalog:
+    # Structured fields plus normalized chunk embeddings for every indexed
+    # candidate, written by ingest.py next to the vector store. Chunks are
+    # staged while the pipeline embeds them and kept only for candidates whose
+    # upserts succeeded.
+    def __init__(self, candidates=None):
+        self.candidates = candidates or {}
+        self.staged = {}
+
+    def stage(self, metadata, vector):
+        entry = self.staged.setdefault(metadata["candidate_id"], {"profile": metadata, "chunks": {}})
+        entry["chunks"][int(metadata.get("chunk_id", 0))] = np.asarray(vector, dtype=np.float32)
+
+    def commit(self, candidate_ids):
+        for candidate_id in candidate_ids:
+            entry = self.staged.get(candidate_id)
+            if entry is None:
+                continue
+            meta = entry["profile"]
+            vectors = np.stack([entry["chunks"][i] for i in sorted(entry["chunks"])])
+            vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+            self.candidates[candidate_id] = {
+                "name": meta.get("name", ""),
+                "phone": meta.get("phone", ""),
+                "skills": list(meta.get("skills", [])),
+                "experience_years": float(meta.get("experience_years", 0)),
+                "location": meta.get("location", ""),
+                "current_role": meta.get("current_role", ""),
+                "vectors": vectors,
+            }
+        self.staged = {}
+
+    def remove(self, candidate_id):
+        self.candidates.pop(candidate_id, None)
+
+    def __contains__(self, candidate_id):
+        return candidate_id in self.candidates
+
+    def __len__(self):
+        return len(self.candidates)
+
+    def save(self, path=CANDIDATE_CATALOG_PATH):
+        ids = sorted(self.candidates)
+        entries = [self.candidates[candidate_id] for candidate_id in ids]
+        skills = [entry["skills"] for entry in entries]
+        vectors = [entry["vectors"] for entry in entries]
+        dimension = vectors[0].shape[1] if vectors else 0
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(
+            tmp_path,
+            candidate_ids=np.asarray(ids, dtype=str),
+            names=np.asarray([entry["name"] for entry in entries], dtype=str),
+            phones=np.asarray([entry["phone"] for entry in entries], dtype=str),
+            experience_years=np.asarray([entry["experience_years"] for entry in entries], dtype=np.float32),
+            locations=np.asarray([entry["location"] for entry in entries], dtype=str),
+            roles=np.asarray([entry["current_role"] for entry in entries], dtype=str),
+            skills=np.asarray([skill for entry_skills in skills for skill in entry_skills], dtype=str),
+            skill_offsets=np.cumsum([0] + [len(entry_skills) for entry_skills in skills]),
+            vectors=np.concatenate(vectors) if vectors else np.zeros((0, dimension), dtype=np.float32),
+            chunk_offsets=np.cumsum([0] + [len(entry_vectors) for entry_vectors in vectors]),
+        )
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def load_arrays(path=CANDIDATE_CATALOG_PATH):
+        with np.load(path, allow_pickle=False) as data:
+            return {key: data[key] for key in data.files}
+
+    @classmethod
+    def load(cls, path=CANDIDATE_CATALOG_PATH):
+        if not path or not os.path.exists(path):
+            return cls()
+        arrays = cls.load_arrays(path)
+        candidates = {}
+        skill_offsets, chunk_offsets = arrays["skill_offsets"], arrays["chunk_offsets"]
+        for i, candidate_id in enumerate(arrays["candidate_ids"]):
+            candidates[str(candidate_id)] = {
+                "name": str(arrays["names"][i]),
+                "phone": str(arrays["phones"][i]),
+                "skills": [str(skill) for skill in arrays["skills"][skill_offsets[i]:skill_offsets[i + 1]]],
+                "experience_years": float(arrays["experience_years"][i]),
+                "location": str(arrays["locations"][i]),
+                "current_role": str(arrays["roles"][i]),
+                "vectors": arrays["vectors"][chunk_offsets[i]:chunk_offsets[i + 1]],
+            }
+        return cls(candidates)
+
+
+class CandidateRanker:
+    # Shortlists candidates for a job: hard filters run on an inverted skill
+    # index and location index held as packed bitsets, then the survivors'
+    # chunk embeddings are scored against the job description in one matrix
+    # product and reduced to each candidate's best-matching chunk.
+    def __init__(self, arrays):
+        self.ids = arrays["candidate_ids"]
+        self.names = arrays["names"]
+        self.phones = arrays["phones"]
+        self.years = arrays["experience_years"]
+        self.locations = arrays["locations"]
+        self.roles = arrays["roles"]
+        self.vectors = arrays["vectors"]
+        self.chunk_offsets = arrays["chunk_offsets"]
+        self.skill_offsets = arrays["skill_offsets"]
+        self.skills = arrays["skills"]
+        self.count = len(self.ids)
+        owners = np.repeat(np.arange(self.count), np.diff(self.skill_offsets))
+        self.skill_bits = self._bitsets(self.skills, owners)
+        self.location_bits = self._bitsets(
+            np.asarray([normalize_location(location) for location in self.locations], dtype=str), np.arange(self.count)
+        )
+
+    @classmethod
+    def load(cls, path=CANDIDATE_CATALOG_PATH):
+        return cls(CandidateCatalog.load_arrays(path))
+
+    def _bitsets(self, keys, owners):
+        bitsets = {}
+        if not len(keys):
+            return bitsets
+        order = np.argsort(keys, kind="stable")
+        keys, owners = keys[order], owners[order]
+        boundaries = np.flatnonzero(keys[1:] != keys[:-1]) + 1
+        for start, end in zip(np.r_[0, boundaries], np.r_[boundaries, len(keys)]):
+            members = np.zeros(self.count, dtype=bool)
+            members[owners[start:end]] = True
+            bitsets[str(keys[start])] = np.packbits(members)
+        return bitsets
+
+    def _prefilter(self, required_skills, min_years, location):
+        bits = np.packbits(np.ones(self.count, dtype=bool))
+        for skill in required_skills:
+            skill_bits = self.skill_bits.get(normalize_skill(skill))
+            if skill_bits is None:
+                return np.zeros(0, dtype=np.int64)
+            bits &= skill_bits
+        if location:
+            location_bits = self.location_bits.get(normalize_location(location))
+            if location_bits is None:
+                return np.zeros(0, dtype=np.int64)
+            bits &= location_bits
+        survivors = np.unpackbits(bits, count=self.count).astype(bool)
+        if min_years:
+            survivors &= self.years >= min_years
+        return np.flatnonzero(survivors)
+
+    def rank(self, job_vector, required_skills=(), min_years=0, location=None, top_n=RANKING_TOP_N):
+        with metrics.timer("ranking_seconds", stage="prefilter"):
+            survivors = self._prefilter(required_skills, min_years, location)
+        if not len(survivors):
+            return []
+        with metrics.timer("ranking_seconds", stage="score"):
+            query = np.asarray(job_vector, dtype=np.float32)
+            query = query / max(float(np.linalg.norm(query)), 1e-12)
+            starts = self.chunk_offsets[survivors]
+            lengths = self.chunk_offsets[survivors + 1] - starts
+            survivors, starts, lengths = survivors[lengths > 0], starts[lengths > 0], lengths[lengths > 0]
+            if not len(survivors):
+                return []
+            # Row indices of every survivor chunk, grouped by candidate
+            group_starts = np.cumsum(lengths) - lengths
+            rows = np.repeat(starts - group_starts, lengths) + np.arange(lengths.sum())
+            scores = np.maximum.reduceat(self.vectors[rows] @ query, group_starts)
+            top = np.argsort(-scores)[:top_n] if len(scores) <= top_n else np.argpartition(-scores, top_n)[:top_n]
+            top = top[np.argsort(-scores[top])]
+        required = {normalize_skill(skill) for skill in required_skills}
+        shortlist = []
+        for i in top:
+            candidate = survivors[i]
+            skills = [str(skill) for skill in self.skills[self.skill_offsets[candidate]:self.skill_offsets[candidate + 1]]]
+            shortlist.append({
+                "candidate_id": str(self.ids[candidate]),
+                "name": str(self.names[candidate]),
+                "phone": str(self.phones[candidate]),
+                "score": float(scores[i]),
+                "experience_years": float(self.years[candidate]),
+                "location": str(self.locations[candidate]),
+                "current_role": str(self.roles[candidate]),
+                "skills": skills,
+                "matched_skills": sorted(required.intersection(skills)),
+            })
+        return shortlist
+
+    def shortlist(self, job_description, required_skills=(), min_years=0, location=None, top_n=RANKING_TOP_N):
+        from resources import get_embedding_model
+
+        job_vector = get_embedding_model().encode_query(job_description)
+        return self.rank(job_vector, required_skills, min_years, location, top_n)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Shortlist indexed candidates for a job description.")
+    parser.add_argument("job_description")
+    parser.add_argument("--skills", nargs="*", default=[], help="Required skills (all must match)")
+    parser.add_argument("--min-years", type=float, default=0)
+    parser.add_argument("--location")
+    parser.add_argument("--top", type=int, default=RANKING_TOP_N)
+    args = parser.parse_args()
+
+    from resources import get_candidate_ranker
+
+    results = get_candidate_ranker().shortlist(args.job_description, args.skills, args.min_years, args.location, args.top)
+    if not results:
+        print("No candidates match the filters.")
+    for rank, result in enumerate(results, 1):
+        print(f"{rank:>3}. {result['score']:.3f}  {result['name']} ({result['phone']})  "
+              f"{result['current_role']}, {result['experience_years']:.0f}y, {result['location']}  "
+              f"skills: {', '.join(result['skills'])}")
@@ -0,0 +1,128 @@
+import codecs
+import json
+import os
+
+WHITESPACE = " \t\r\n"
+
+
+class CandidateReader:
+    # Streams candidate records out of a JSON array, a dict of records
+    # ({"id": {...}, ...}) or JSON Lines without loading the whole file, so
+    # memory stays bounded by the read buffer plus one record.
+    def __init__(self, path, fmt=None, chunk_size=1 << 20):
+        self.path = path
+        self.fmt = fmt
+        self.chunk_size = chunk_size
+        self.total_bytes = os.path.getsize(path)
+        self.bytes_read = 0
+        self.records = 0
+        self._file = None
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder("utf-8-sig")()
+        self._buf = ""
+        self._pos = 0
+        self._mark = None
+        self._eof = False
+
+    def _fill(self):
+        if self._eof:
+            return False
+        data = self._file.read(self.chunk_size)
+        self.bytes_read += len(data)
+        self._eof = not data
+        # Drop the consumed prefix (up to a mark set while looking ahead) so
+        # the buffer does not grow with the file
+        cut = self._pos if self._mark is None else self._mark
+        self._buf = self._buf[cut:] + self._text.decode(data, final=self._eof)
+        self._pos -= cut
+        if self._mark is not None:
+            self._mark -= cut
+        return not self._eof
+
+    def _peek(self):
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ""
+
+    def _expect(self, chars):
+        char = self._peek()
+        if char not in chars or not char:
+            raise ValueError(f"Malformed candidate file {self.path}: expected one of {chars!r}, got {char!r}")
+        self._pos += 1
+        return char
+
+    def _value(self):
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number at the end of the buffer may continue in the next read
+            if end == len(self._buf) and not self._eof and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    def _detect_format(self):
+        if self.fmt:
+            return self.fmt
+        if self.path.endswith((".jsonl", ".ndjson")):
+            return "jsonl"
+        first = self._peek()
+        if first == "[":
+            return "array"
+        if first != "{":
+            raise ValueError(f"Unsupported candidate file {self.path}")
+        # A dict of records has an object as its first value; a JSON Lines
+        # record has the candidate's own fields there
+        self._mark = self._pos
+        self._pos += 1
+        if self._peek() == "}":
+            fmt = "dict"
+        else:
+            self._value()
+            self._expect(":")
+            fmt = "dict" if self._peek() == "{" else "jsonl"
+        self._pos, self._mark = self._mark, None
+        return fmt
+
+    def _iter_array(self):
+        self._expect("[")
+        if self._peek() == "]":
+            return
+        while True:
+            yield self._value()
+            if self._expect(",]") == "]":
+                return
+
+    def _iter_dict(self):
+        self._expect("{")
+        if self._peek() == "}":
+            return
+        while True:
+            self._value()
+            self._expect(":")
+            yield self._value()
+            if self._expect(",}") == "}":
+                return
+
+    def _iter_lines(self):
+        while self._peek():
+            yield self._value()
+
+    def __iter__(self):
+        with open(self.path, "rb") as f:
+            self._file = f
+            fmt = self._detect_format()
+            records = {"array": self._iter_array, "dict": self._iter_dict, "jsonl": self._iter_lines}[fmt]()
+            for record in records:
+                if isinstance(record, dict):
+                    self.records += 1
+                    yield record
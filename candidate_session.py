@@ -0,0 +1,113 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from config import (
+    CANDIDATE_SESSION_CACHE_SIZE, CANDIDATE_SESSION_MAX_CHUNKS, RESUME_CONTEXT_TOP_K, RESUME_CONTEXT_TOKEN_BUDGET,
+    RESUME_CONTEXT_SCORE_MARGIN,
+)
+from resources import get_vector_store
+from resume_context import TOPIC_QUERIES, select_chunks, topic_query_vector
+from metrics import registry as metrics
+
+
+class CandidateSession:
+    # Everything the interview needs about one candidate, built from a single
+    # batched fetch of their chunk vectors: the reassembled resume and the
+    # per-topic context for the technical prompts.
+    def __init__(self, candidate_info, chunk_texts, chunk_vectors,
+                 top_k=RESUME_CONTEXT_TOP_K, token_budget=RESUME_CONTEXT_TOKEN_BUDGET, margin=RESUME_CONTEXT_SCORE_MARGIN):
+        self.candidate_info = dict(candidate_info)
+        self.chunk_texts = chunk_texts
+        self.resume_text = "\n".join(chunk_texts)
+        self.topic_context = {}
+        if chunk_texts:
+            self.topic_context = self._rank_topics(chunk_vectors, top_k, token_budget, margin)
+
+    def _rank_topics(self, chunk_vectors, top_k, token_budget, margin):
+        topics = list(TOPIC_QUERIES)
+        chunks = np.asarray(chunk_vectors, dtype=np.float32)
+        chunks /= np.maximum(np.linalg.norm(chunks, axis=1, keepdims=True), 1e-12)
+        queries = np.stack([topic_query_vector(topic) for topic in topics])
+        queries /= np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+        scores = queries @ chunks.T
+        contexts = {}
+        for topic, row in zip(topics, scores):
+            contexts[topic] = select_chunks(self.chunk_texts, row.tolist(), top_k, margin, token_budget)
+        return contexts
+
+    def context_for(self, topic):
+        return self.topic_context.get(topic, "")
+
+
+class CandidateSessionLoader:
+    # LRU of CandidateSession objects shared by every interview in the process,
+    # so a reconnecting candidate costs no vector-store calls.
+    def __init__(self, store=None, max_sessions=CANDIDATE_SESSION_CACHE_SIZE, max_chunks=CANDIDATE_SESSION_MAX_CHUNKS):
+        self.store = store
+        self.max_sessions = max_sessions
+        self.max_chunks = max_chunks
+        self.sessions = OrderedDict()
+        self.loading = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.fetches = 0
+
+    def _chunk_ids(self, candidate_info):
+        candidate_id = candidate_info["candidate_id"]
+        # chunk_count is stored on the phone entry by ingest.py; older indexes
+        # without it are probed up to max_chunks in the same request
+        count = int(candidate_info.get("chunk_count") or self.max_chunks)
+        return [f"{candidate_id}_chunk_{i}" for i in range(count)]
+
+    def get(self, candidate_id):
+        with self.lock:
+            session = self.sessions.get(candidate_id)
+            if session is not None:
+                self.sessions.move_to_end(candidate_id)
+                self.hits += 1
+            return session
+
+    def load(self, candidate_info):
+        candidate_id = candidate_info["candidate_id"]
+        session = self.get(candidate_id)
+        if session is not None:
+            return session
+
+        # Concurrent loads of the same candidate (e.g. prefetch and speculation) share one fetch
+        with self.lock:
+            pending = self.loading.get(candidate_id)
+            if pending is None:
+                self.loading[candidate_id] = threading.Event()
+        if pending is not None:
+            pending.wait()
+            session = self.get(candidate_id)
+            if session is not None:
+                return session
+            return self.load(candidate_info)
+
+        try:
+            session = self._fetch_session(candidate_info)
+            with self.lock:
+                self.sessions[candidate_id] = session
+                self.sessions.move_to_end(candidate_id)
+                while len(self.sessions) > self.max_sessions:
+                    self.sessions.popitem(last=False)
+        finally:
+            with self.lock:
+                self.loading.pop(candidate_id).set()
+        return session
+
+    def _fetch_session(self, candidate_info):
+        store = self.store or get_vector_store()
+        with metrics.timer("vector_store_seconds", op="fetch"):
+            found = store.fetch(self._chunk_ids(candidate_info))
+        with self.lock:
+            self.fetches += 1
+        entries = sorted(found.values(), key=lambda entry: int(entry["metadata"].get("chunk_id", 0)))
+        return CandidateSession(
+            candidate_info,
+            [entry["metadata"].get("text", "") for entry in entries],
+            [entry["values"] for entry in entries],
+        )
@@ -0,0 +1,121 @@
+import re
+
+from config import CHUNK_STRATEGY, CHUNK_MAX_CHARS, CHUNK_MAX_TOKENS, CHUNK_OVERLAP
+
+
+def _split_long_line(line, max_chars):
+    # Break on word boundaries so no chunk ends mid-word
+    pieces, current = [], ""
+    for word in line.split(" "):
+        candidate = f"{current} {word}" if current else word
+        if len(candidate) > max_chars and current:
+            pieces.append(current)
+            current = word
+        else:
+            current = candidate
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+# Lines that open a new resume section; everything before the first one is the profile
+SECTION_PREFIXES = ("Project:", "Education:")
+
+
+def resume_sections(text):
+    # generate_resume_text emits one line per field and one per project: the
+    # profile and skills fields form one section, education and every project
+    # get their own
+    sections, current = [], []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith(SECTION_PREFIXES) and current:
+            sections.append(current)
+            current = []
+        current.append(line)
+    if current:
+        sections.append(current)
+    return sections
+
+
+def _split_section(lines, max_chars, overlap):
+    # Only a section longer than max_chars is split; `overlap` lines from the
+    # end of each piece are repeated at the start of the next
+    if len("\n".join(lines)) <= max_chars:
+        return ["\n".join(lines)]
+    pieces, current = [], []
+    for line in lines:
+        if current and len("\n".join(current + [line])) > max_chars:
+            pieces.append("\n".join(current))
+            current = current[-overlap:] if overlap else []
+            # The carried-over lines must still leave room for the new one
+            while current and len("\n".join(current + [line])) > max_chars:
+                current.pop(0)
+        current.append(line)
+    if current:
+        pieces.append("\n".join(current))
+    return pieces
+
+
+def chunk_by_fields(text, max_chars=CHUNK_MAX_CHARS, overlap=CHUNK_OVERLAP):
+    # One chunk per resume section, so retrieval can pick the projects or the
+    # education a question is about; max_chars only caps oversized sections
+    chunks = []
+    for section in resume_sections(text):
+        lines = []
+        for line in section:
+            lines.extend(_split_long_line(line, max_chars) if len(line) > max_chars else [line])
+        chunks.extend(_split_section(lines, max_chars, overlap))
+    return chunks
+
+
+def chunk_by_tokens(text, tokenizer, max_tokens=CHUNK_MAX_TOKENS, overlap=CHUNK_OVERLAP):
+    # Windows of max_tokens tokens (the embedding model's own tokenizer), with
+    # `overlap` tokens shared between neighbours; text is sliced on token offsets
+    encoded = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)
+    offsets = encoded["offset_mapping"]
+    if not offsets:
+        return [text] if text.strip() else []
+    stride = max(1, max_tokens - overlap)
+    chunks = []
+    for start in range(0, len(offsets), stride):
+        window = offsets[start:start + max_tokens]
+        chunks.append(text[window[0][0]:window[-1][1]].strip())
+        if start + max_tokens >= len(offsets):
+            break
+    return chunks
+
+
+def chunk_fixed(text, max_chars=1000):
+    return [text[i:i + max_chars] for i in range(0, len(text), max_chars)]
+
+
+def dedupe_chunks(chunks):
+    seen, unique = set(), []
+    for chunk in chunks:
+        key = re.sub(r"\s+", " ", chunk).strip().lower()
+        if key and key not in seen:
+            seen.add(key)
+            unique.append(chunk)
+    return unique
+
+
+def make_chunker(strategy=CHUNK_STRATEGY, tokenizer=None):
+    if strategy == "fields":
+        chunk = chunk_by_fields
+    elif strategy == "tokens":
+        if tokenizer is None:
+            raise ValueError("Token chunking needs the embedding model's tokenizer")
+        chunk = lambda text: chunk_by_tokens(text, tokenizer)
+    elif strategy == "fixed":
+        chunk = chunk_fixed
+    else:
+        raise ValueError(f"Unknown chunking strategy: {strategy}")
+
+    def chunker(text):
+        chunks = dedupe_chunks(chunk(text))
+        return chunks or [text]
+
+    return chunker
@@ -8,4 +8,117 @@ GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 
 # Pinecone configuration
 PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
-PINECONE_INDEX_NAME = os.getenv("PINECONE_INDEX_NAME", "hr-rag-sys") 
\ No newline at end of file
+PINECONE_INDEX_NAME = os.getenv("PINECONE_INDEX_NAME", "hr-rag-sys")
+
+# Local exact phone-number index built by ingest.py
+PHONE_INDEX_PATH = os.getenv("PHONE_INDEX_PATH", "phone_index.db")
+# Embedding fallback when the exact index misses; a match must be within this many digit edits
+PHONE_FUZZY_FALLBACK = os.getenv("PHONE_FUZZY_FALLBACK", "false").lower() == "true"
+PHONE_FUZZY_MAX_EDITS = int(os.getenv("PHONE_FUZZY_MAX_EDITS", "1"))
+
+# Ingest pipeline batching
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "256"))
+UPSERT_BATCH_SIZE = int(os.getenv("UPSERT_BATCH_SIZE", "100"))  # Pinecone recommends 100 or less
+PIPELINE_BUFFER_SIZE = int(os.getenv("PIPELINE_BUFFER_SIZE", "4096"))
+UPSERT_WORKERS = int(os.getenv("UPSERT_WORKERS", "4"))  # 0 upserts serially on the encoding thread
+UPSERT_QUEUE_SIZE = int(os.getenv("UPSERT_QUEUE_SIZE", "8"))
+UPSERT_MAX_ATTEMPTS = int(os.getenv("UPSERT_MAX_ATTEMPTS", "5"))
+INGEST_MANIFEST_PATH = os.getenv("INGEST_MANIFEST_PATH", "ingest_manifest.json")
+
+# Vector store backend: "pinecone" or "faiss" (local, persisted under FAISS_STORE_DIR)
+VECTOR_STORE = os.getenv("VECTOR_STORE", "pinecone").lower()
+FAISS_STORE_DIR = os.getenv("FAISS_STORE_DIR", "faiss_store")
+FAISS_INDEX_TYPE = os.getenv("FAISS_INDEX_TYPE", "flat").lower()  # flat, ivf or hnsw
+EMBEDDING_DIMENSION = int(os.getenv("EMBEDDING_DIMENSION", "384"))
+EMBEDDING_MODEL_NAME = os.getenv("EMBEDDING_MODEL_NAME", "all-MiniLM-L6-v2")
+
+# Cache of generated questions for prompts that take no per-candidate arguments
+QUESTION_CACHE_ENABLED = os.getenv("QUESTION_CACHE_ENABLED", "true").lower() == "true"
+QUESTION_CACHE_VARIANTS = int(os.getenv("QUESTION_CACHE_VARIANTS", "3"))
+QUESTION_CACHE_TTL = float(os.getenv("QUESTION_CACHE_TTL", "3600"))  # seconds, 0 disables expiry
+QUESTION_CACHE_MAX_ENTRIES = int(os.getenv("QUESTION_CACHE_MAX_ENTRIES", "256"))
+QUESTION_CACHE_PREWARM = os.getenv("QUESTION_CACHE_PREWARM", "false").lower() == "true"
+
+# Semantic cache for answers to candidate questions (answer_cache.py), seeded from an approved FAQ
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.85"))  # cosine similarity for a hit
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "512"))  # not counting FAQ entries
+ANSWER_CACHE_FAQ_PATH = os.getenv("ANSWER_CACHE_FAQ_PATH", "company_faq.json")
+
+# Generate the next predictable question while the candidate is still answering
+SPECULATIVE_GENERATION = os.getenv("SPECULATIVE_GENERATION", "true").lower() == "true"
+SPECULATION_WORKERS = int(os.getenv("SPECULATION_WORKERS", "8"))
+
+# Async session hosting (async_interview.py)
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "64"))
+LLM_CALL_TIMEOUT = float(os.getenv("LLM_CALL_TIMEOUT", "30"))  # seconds
+SESSION_IDLE_TIMEOUT = float(os.getenv("SESSION_IDLE_TIMEOUT", "900"))  # seconds
+
+# Resume context for the technical prompts
+RESUME_RETRIEVAL_ENABLED = os.getenv("RESUME_RETRIEVAL_ENABLED", "true").lower() == "true"
+RESUME_CONTEXT_TOP_K = int(os.getenv("RESUME_CONTEXT_TOP_K", "2"))  # resume sections per topic, at most
+RESUME_CONTEXT_SCORE_MARGIN = float(os.getenv("RESUME_CONTEXT_SCORE_MARGIN", "0.05"))  # max similarity gap to the best section
+RESUME_CONTEXT_TOKEN_BUDGET = int(os.getenv("RESUME_CONTEXT_TOKEN_BUDGET", "300"))
+
+# Per-candidate session bundles shared across interviews
+CANDIDATE_SESSION_CACHE_SIZE = int(os.getenv("CANDIDATE_SESSION_CACHE_SIZE", "1024"))
+CANDIDATE_SESSION_MAX_CHUNKS = int(os.getenv("CANDIDATE_SESSION_MAX_CHUNKS", "32"))
+
+# Resume chunking at ingest: "fields" (one chunk per profile, education and project section), "tokens" (MiniLM tokenizer) or "fixed"
+CHUNK_STRATEGY = os.getenv("CHUNK_STRATEGY", "fields").lower()
+CHUNK_MAX_CHARS = int(os.getenv("CHUNK_MAX_CHARS", "1000"))  # only sections longer than this are split
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "128"))
+CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "1"))  # lines for "fields", tokens for "tokens"
+
+# Embedding inference on CPU: "torch", "torch-int8" (dynamic quantization),
+# "onnx" or "onnx-int8" (needs sentence-transformers[onnx]); see embedding_bench.py
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+EMBEDDING_ONNX_FILE = os.getenv("EMBEDDING_ONNX_FILE", "onnx/model_qint8_avx2.onnx")
+EMBEDDING_PROCESSES = int(os.getenv("EMBEDDING_PROCESSES", "0"))  # worker processes for bulk ingest, 0/1 disables
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "4096"))
+
+# Gibberish detection: lexicon built at ingest (NLTK words + candidate skill vocabulary)
+LEXICON_PATH = os.getenv("LEXICON_PATH", "lexicon.npy")
+GIBBERISH_MIN_VALID_RATIO = float(os.getenv("GIBBERISH_MIN_VALID_RATIO", "0.3"))
+GIBBERISH_NGRAM_THRESHOLD = float(os.getenv("GIBBERISH_NGRAM_THRESHOLD", "-2.8"))
+
+# Interview session persistence: "none", "sqlite", "redis" or "fake-redis" (in-memory, for testing)
+SESSION_STORE = os.getenv("SESSION_STORE", "none").lower()
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", "sessions.db")
+SESSION_STORE_TTL = float(os.getenv("SESSION_STORE_TTL", "86400"))  # seconds, 0 keeps sessions forever
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+# Latency histograms and counters (metrics.py); per-session traces are optional
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+TRACE_SESSIONS = os.getenv("TRACE_SESSIONS", "false").lower() == "true"
+TRACE_DIR = os.getenv("TRACE_DIR", "traces")
+
+# LLM resilience (resilient_llm.py): deadlines, retries, hedging and circuit breaker
+LLM_RESILIENCE_ENABLED = os.getenv("LLM_RESILIENCE_ENABLED", "true").lower() == "true"
+LLM_DEADLINE = float(os.getenv("LLM_DEADLINE", "12"))  # seconds per call, across retries
+LLM_ATTEMPT_TIMEOUT = float(os.getenv("LLM_ATTEMPT_TIMEOUT", "5"))  # seconds per attempt
+LLM_MAX_ATTEMPTS = int(os.getenv("LLM_MAX_ATTEMPTS", "3"))
+LLM_HEDGE_AFTER = float(os.getenv("LLM_HEDGE_AFTER", "2"))  # seconds before a duplicate request, 0 disables
+LLM_BREAKER_FAILURES = int(os.getenv("LLM_BREAKER_FAILURES", "5"))
+LLM_BREAKER_RESET = float(os.getenv("LLM_BREAKER_RESET", "30"))  # seconds the circuit stays open
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "100"))  # shared HTTP pool per process
+
+# Job-to-candidate ranking (candidate_ranker.py): catalog of structured fields and chunk embeddings written by ingest.py
+CANDIDATE_CATALOG_PATH = os.getenv("CANDIDATE_CATALOG_PATH", "candidate_catalog.npz")
+RANKING_TOP_N = int(os.getenv("RANKING_TOP_N", "20"))
+
+# Post-interview grading (evaluation.py): finished transcripts are archived and graded in bulk
+TRANSCRIPT_ARCHIVE_PATH = os.getenv("TRANSCRIPT_ARCHIVE_PATH", "transcripts.jsonl")
+EVAL_OUTPUT_PATH = os.getenv("EVAL_OUTPUT_PATH", "evaluations.npz")
+EVAL_TOKEN_BUDGET = int(os.getenv("EVAL_TOKEN_BUDGET", "2500"))  # estimated prompt tokens per grading request
+EVAL_MAX_PAIRS = int(os.getenv("EVAL_MAX_PAIRS", "16"))  # answers graded per request
+EVAL_MAX_ANSWER_WORDS = int(os.getenv("EVAL_MAX_ANSWER_WORDS", "300"))  # longer answers are truncated
+EVAL_CONCURRENCY = int(os.getenv("EVAL_CONCURRENCY", "8"))
+
+# Near-duplicate candidates at ingest (dedup.py): "skip" keeps the first record, "merge" folds duplicates into it, "off" disables
+DEDUP_POLICY = os.getenv("DEDUP_POLICY", "skip").lower()
+DEDUP_NAME_THRESHOLD = float(os.getenv("DEDUP_NAME_THRESHOLD", "0.8"))  # MinHash similarity when only the name matches
+DEDUP_CONTACT_THRESHOLD = float(os.getenv("DEDUP_CONTACT_THRESHOLD", "0.5"))  # when phone or email matches
+DEDUP_NUM_PERM = int(os.getenv("DEDUP_NUM_PERM", "64"))
+DEDUP_MAX_BLOCK = int(os.getenv("DEDUP_MAX_BLOCK", "50"))  # records compared per shared key
+DEDUP_REPORT_PATH = os.getenv("DEDUP_REPORT_PATH", "dedup_report.json")
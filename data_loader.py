@@ -1,36 +1,53 @@
-import os
-from dotenv import load_dotenv
-from pinecone import Pinecone
-from sentence_transformers import SentenceTransformer
-from config import PINECONE_INDEX_NAME
+from config import PHONE_FUZZY_FALLBACK, PHONE_FUZZY_MAX_EDITS
+from phone_index import normalize_phone
+from resources import get_embedding_model, get_phone_index, get_vector_store
+from metrics import registry as metrics
 
-load_dotenv()  # Load env vars from .env file
-
-PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
-if not PINECONE_API_KEY:
-    raise ValueError("PINECONE_API_KEY not found in environment.")
+def get_candidate_by_phone(phone_number):
+    # Exact O(1) lookup on the normalized phone key built by ingest.py
+    with metrics.timer("phone_lookup_seconds", source="index"):
+        meta = get_phone_index().get(phone_number)
+    if meta:
+        return meta
+    if not PHONE_FUZZY_FALLBACK:
+        return None
+    with metrics.timer("phone_lookup_seconds", source="embedding"):
+        return find_candidate_by_phone_embedding(phone_number)
 
-# Initialize Pinecone and model
-pc = Pinecone(api_key=PINECONE_API_KEY)
-index = pc.Index(PINECONE_INDEX_NAME)
-model = SentenceTransformer("all-MiniLM-L6-v2")
+def digit_edit_distance(a, b, limit):
+    # Levenshtein distance, abandoned once every path exceeds limit
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char in enumerate(a, 1):
+        current = [i]
+        for j, other in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char != other)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
 
-def get_candidate_by_phone(phone_number):
+def find_candidate_by_phone_embedding(phone_number, max_edits=PHONE_FUZZY_MAX_EDITS, top_k=5):
+    # Nearest phone entries are only candidates; one is accepted only if its
+    # number is a near-typo of the query, never just because it ranked first
+    digits = normalize_phone(phone_number).lstrip("+")
+    if not digits:
+        return None
     query = f"Phone number: {phone_number}"
-    query_vector = model.encode(query).astype("float32").tolist()
+    query_vector = get_embedding_model().encode_query(query).tolist()
 
     try:
-        result = index.query(
-            vector=query_vector,
-            top_k=1,
-            include_metadata=True
-        )
-        if result.matches:
-            match = result.matches[0]
-            meta = match.metadata
-            if meta.get("is_phone_entry") == "true":
+        with metrics.timer("vector_store_seconds", op="query"):
+            matches = get_vector_store().query(query_vector, top_k=top_k)
+        for match in matches:
+            meta = match["metadata"]
+            if meta.get("is_phone_entry") != "true":
+                continue
+            candidate_digits = normalize_phone(meta.get("phone", "")).lstrip("+")
+            if digit_edit_distance(digits, candidate_digits, max_edits) <= max_edits:
                 return meta
         return None
     except Exception as e:
-        print(f"Error querying Pinecone: {e}")
+        print(f"Error querying vector store: {e}")
         return None
\ No newline at end of file
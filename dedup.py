@@ -0,0 +1,197 @@
+import json
+import re
+import zlib
+
+import numpy as np
+
+from config import (
+    DEDUP_NUM_PERM, DEDUP_NAME_THRESHOLD, DEDUP_CONTACT_THRESHOLD, DEDUP_MAX_BLOCK, DEDUP_REPORT_PATH,
+)
+from ingest_manifest import candidate_id_for
+from phone_index import normalize_phone
+
+# Identity fields; everything else is compared as profile text
+CONTACT_FIELDS = ("name", "phone", "email")
+
+# MinHash over word 3-grams, with hashes kept below 2**31 so products fit in uint64
+MERSENNE_PRIME = (1 << 31) - 1
+SHINGLE_SIZE = 3
+
+
+def normalize_email(email):
+    email = str(email or "").strip().lower()
+    local, _, domain = email.partition("@")
+    if not domain:
+        return ""
+    # "jane.doe+jobs@gmail.com" and "janedoe@gmail.com" are one mailbox
+    local = local.split("+", 1)[0]
+    if domain in ("gmail.com", "googlemail.com"):
+        local, domain = local.replace(".", ""), "gmail.com"
+    return f"{local}@{domain}"
+
+
+def normalize_name(name):
+    # Order-insensitive, so "Silva, Elizabeth" matches "Elizabeth Silva"
+    return " ".join(sorted(re.findall(r"[a-z]+", str(name or "").lower())))
+
+
+def blocking_keys(candidate_data):
+    keys = []
+    phone = normalize_phone(candidate_data.get("phone", ""))
+    email = normalize_email(candidate_data.get("email", ""))
+    name = normalize_name(candidate_data.get("name", ""))
+    if phone:
+        keys.append(("phone", phone))
+    if email:
+        keys.append(("email", email))
+    if name:
+        keys.append(("name", name))
+    return keys
+
+
+def profile_text(candidate_data):
+    if candidate_data.get("resume_text"):
+        return str(candidate_data["resume_text"])
+    parts = []
+    for field, value in sorted(candidate_data.items()):
+        if field in CONTACT_FIELDS:
+            continue
+        parts.append(value if isinstance(value, str) else json.dumps(value, sort_keys=True))
+    return " ".join(parts)
+
+
+def merge_records(records):
+    # The first record wins; later ones fill its blanks and extend its lists
+    merged = dict(records[0])
+    for record in records[1:]:
+        for field, value in record.items():
+            current = merged.get(field)
+            if isinstance(current, list) and isinstance(value, list):
+                merged[field] = current + [item for item in value if item not in current]
+            elif current in (None, "", [], {}):
+                merged[field] = value
+    return merged
+
+
+def contact_summary(index, candidate_data):
+    return {
+        "index": index,
+        "candidate_id": candidate_id_for(candidate_data),
+        "name": candidate_data.get("name", ""),
+        "phone": candidate_data.get("phone", ""),
+        "email": candidate_data.get("email", ""),
+    }
+
+
+class MinHasher:
+    def __init__(self, num_perm=DEDUP_NUM_PERM, seed=1):
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, MERSENNE_PRIME, size=(num_perm, 1), dtype=np.uint64)
+        self.b = rng.integers(0, MERSENNE_PRIME, size=(num_perm, 1), dtype=np.uint64)
+        self.num_perm = num_perm
+        # Vocabularies repeat heavily across resumes, so word hashes are cached
+        self.word_hashes = {}
+
+    def _word_hashes(self, text):
+        words = re.findall(r"\w+", text.lower())
+        for word in set(words).difference(self.word_hashes):
+            self.word_hashes[word] = zlib.crc32(word.encode("utf-8")) % MERSENNE_PRIME
+        return np.fromiter(map(self.word_hashes.__getitem__, words), dtype=np.uint64, count=len(words))
+
+    def signature(self, text):
+        words = self._word_hashes(text)
+        if len(words) >= SHINGLE_SIZE:
+            # Rolling combination of consecutive word hashes, one per shingle
+            shingles = np.zeros(len(words) - SHINGLE_SIZE + 1, dtype=np.uint64)
+            for offset in range(SHINGLE_SIZE):
+                shingles = (shingles * np.uint64(31) + words[offset:len(shingles) + offset]) % MERSENNE_PRIME
+        else:
+            shingles = words
+        if not len(shingles):
+            return np.full(self.num_perm, MERSENNE_PRIME, dtype=np.uint32)
+        return ((self.a * shingles[None, :] + self.b) % MERSENNE_PRIME).min(axis=1).astype(np.uint32)
+
+
+class CandidateDeduplicator:
+    # Finds records describing the same person in one export. Records are only
+    # compared within blocks sharing a normalized phone, email or name (capped
+    # at `max_block` members), so the work grows with the number of records
+    # rather than its square. A blocked pair is confirmed by MinHash similarity
+    # of the profile text: a shared phone or email needs `contact_threshold`, a
+    # shared name alone needs the stricter `name_threshold`.
+    def __init__(self, num_perm=DEDUP_NUM_PERM, name_threshold=DEDUP_NAME_THRESHOLD,
+                 contact_threshold=DEDUP_CONTACT_THRESHOLD, max_block=DEDUP_MAX_BLOCK):
+        self.hasher = MinHasher(num_perm)
+        self.name_threshold = name_threshold
+        self.contact_threshold = contact_threshold
+        self.max_block = max_block
+        self.signatures = np.zeros((1024, num_perm), dtype=np.uint32)
+        self.kept = []
+        self.blocks = {}
+        self.comparisons = 0
+
+    def _keep(self, index, candidate_data, signature, keys):
+        row = len(self.kept)
+        if row == len(self.signatures):
+            self.signatures = np.concatenate([self.signatures, np.zeros_like(self.signatures)])
+        self.signatures[row] = signature
+        # Only the contact fields of kept records are held, for the report
+        self.kept.append(contact_summary(index, candidate_data))
+        for key in keys:
+            block = self.blocks.setdefault(key, [])
+            if len(block) < self.max_block:
+                block.append(row)
+
+    def check(self, index, candidate_data):
+        # Returns (kept record summary, reason, similarity) for a duplicate, otherwise None
+        keys = blocking_keys(candidate_data)
+        signature = self.hasher.signature(profile_text(candidate_data))
+        reasons = {}
+        for kind, value in keys:
+            for row in self.blocks.get((kind, value), ()):
+                reasons.setdefault(row, kind)
+        if reasons:
+            rows = np.fromiter(reasons, dtype=np.int64, count=len(reasons))
+            self.comparisons += len(rows)
+            similarities = (self.signatures[rows] == signature).mean(axis=1)
+            thresholds = np.asarray(
+                [self.name_threshold if reasons[row] == "name" else self.contact_threshold for row in rows]
+            )
+            matches = np.flatnonzero(similarities >= thresholds)
+            if len(matches):
+                best = matches[np.argmax(similarities[matches])]
+                return self.kept[rows[best]], reasons[rows[best]], float(similarities[best])
+        self._keep(index, candidate_data, signature, keys)
+        return None
+
+
+def find_duplicates(records, deduplicator=None):
+    # One pass over (index, record) pairs; returns {duplicate index: kept index}
+    # and report entries describing each match
+    deduplicator = deduplicator or CandidateDeduplicator()
+    duplicates = {}
+    report = []
+    for index, candidate_data in records:
+        match = deduplicator.check(index, candidate_data)
+        if match is None:
+            continue
+        kept, reason, similarity = match
+        duplicates[index] = kept["index"]
+        report.append({
+            "duplicate": contact_summary(index, candidate_data),
+            "kept": kept,
+            "reason": reason,
+            "similarity": round(similarity, 3),
+        })
+    return duplicates, report
+
+
+def write_report(path, report, policy, total, comparisons):
+    with open(path or DEDUP_REPORT_PATH, "w", encoding="utf-8") as f:
+        json.dump({
+            "policy": policy,
+            "records": total,
+            "duplicates": len(report),
+            "comparisons": comparisons,
+            "matches": report,
+        }, f, indent=2)
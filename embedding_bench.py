@@ -0,0 +1,102 @@
+import argparse
+import json
+import time
+
+import numpy as np
+
+from candidate_reader import CandidateReader
+from chunking import make_chunker
+from embedding_service import BACKENDS, EmbeddingService, load_sentence_transformer
+from ingest import JSON_PATH, generate_resume_text
+
+# Compares each embedding backend against the float32 torch baseline on real
+# resume chunks: bulk throughput, single-query latency and cosine drift.
+
+
+def load_corpus(json_path, size):
+    chunker = make_chunker("fields")
+    texts = []
+    for candidate in CandidateReader(json_path):
+        texts.extend(chunker(generate_resume_text(candidate)))
+    if not texts:
+        raise ValueError(f"No candidates in {json_path}")
+    # Repeat the dump until the corpus is big enough to time
+    return (texts * (size // len(texts) + 1))[:size]
+
+
+def normalize(matrix):
+    return matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+
+
+def bench_mode(backend, processes, texts, queries, batch_size):
+    service = EmbeddingService(load_sentence_transformer(backend=backend), backend=backend, processes=processes)
+    service.start_pool()
+    try:
+        service.encode(texts[:batch_size], batch_size=batch_size)  # warm-up
+        start = time.perf_counter()
+        embeddings = service.encode(texts, batch_size=batch_size)
+        elapsed = time.perf_counter() - start
+    finally:
+        service.stop_pool()
+
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        service.model.encode(query, show_progress_bar=False)
+        latencies.append(time.perf_counter() - start)
+    return embeddings, {
+        "backend": backend,
+        "processes": processes,
+        "texts_per_sec": len(texts) / elapsed,
+        "query_p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "query_p95_ms": float(np.percentile(latencies, 95) * 1000),
+    }
+
+
+def run(json_path, size, modes, batch_size, query_count):
+    texts = load_corpus(json_path, size)
+    queries = [f"Phone number: +1555{i:07d}" for i in range(query_count)]
+    baseline = None
+    results = []
+    for backend, processes in [("torch", 0)] + [mode for mode in modes if mode != ("torch", 0)]:
+        try:
+            embeddings, result = bench_mode(backend, processes, texts, queries, batch_size)
+        except Exception as e:
+            print(f"Skipping {backend} x{processes}: {e}")
+            continue
+        if baseline is None:
+            baseline = normalize(embeddings)
+        cosine = np.sum(baseline * normalize(embeddings), axis=1)
+        result["cosine_mean"] = float(cosine.mean())
+        result["cosine_min"] = float(cosine.min())
+        results.append(result)
+        print(f"{backend:<11} x{processes:<3} {result['texts_per_sec']:>9.1f} texts/s  "
+              f"query p50 {result['query_p50_ms']:.2f}ms p95 {result['query_p95_ms']:.2f}ms  "
+              f"cosine mean {result['cosine_mean']:.5f} min {result['cosine_min']:.5f}")
+    return results
+
+
+def parse_mode(value):
+    backend, _, processes = value.partition(":")
+    if backend not in BACKENDS:
+        raise argparse.ArgumentTypeError(f"backend must be one of {', '.join(BACKENDS)}")
+    return backend, int(processes or 0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark embedding backends against the float32 baseline.")
+    parser.add_argument("json_path", nargs="?", default=JSON_PATH)
+    parser.add_argument("--texts", type=int, default=5000, help="Number of resume chunks to embed")
+    parser.add_argument("--modes", type=parse_mode, nargs="+",
+                        default=[("torch", 4), ("torch-int8", 0), ("onnx", 0), ("onnx-int8", 0)],
+                        help="backend[:processes], e.g. torch:4 onnx-int8")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--queries", type=int, default=200, help="Single-query encodes for latency")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = run(args.json_path, args.texts, args.modes, args.batch_size, args.queries)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
@@ -0,0 +1,114 @@
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from config import (
+    EMBEDDING_MODEL_NAME, EMBEDDING_BACKEND, EMBEDDING_ONNX_FILE, EMBEDDING_PROCESSES,
+    QUERY_EMBEDDING_CACHE_SIZE,
+)
+from metrics import registry as metrics
+
+BACKENDS = ("torch", "torch-int8", "onnx", "onnx-int8")
+
+# Below this many texts a process pool costs more in pickling than it saves
+MIN_POOL_BATCH = 512
+
+
+def load_sentence_transformer(model_name=EMBEDDING_MODEL_NAME, backend=EMBEDDING_BACKEND, onnx_file=EMBEDDING_ONNX_FILE):
+    from sentence_transformers import SentenceTransformer
+
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend: {backend}")
+    if backend == "onnx":
+        # Needs the optional onnx extra: pip install "sentence-transformers[onnx]"
+        return SentenceTransformer(model_name, device="cpu", backend="onnx")
+    if backend == "onnx-int8":
+        return SentenceTransformer(model_name, device="cpu", backend="onnx", model_kwargs={"file_name": onnx_file})
+
+    model = SentenceTransformer(model_name, device="cpu")
+    if backend == "torch-int8":
+        import torch
+
+        # Dynamic int8 quantization of the Linear layers; weights stay in the
+        # model cache as float32 and are converted on load
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model
+
+
+class EmbeddingService:
+    # One place to turn text into vectors. Bulk encodes can be spread over a
+    # pool of CPU processes, and single query strings (phone lookups, topic
+    # queries) are served from an LRU so repeats skip the model entirely.
+    # encode() mirrors SentenceTransformer.encode so callers need not care.
+    def __init__(self, model=None, backend=EMBEDDING_BACKEND, processes=EMBEDDING_PROCESSES,
+                 cache_size=QUERY_EMBEDDING_CACHE_SIZE):
+        self.backend = backend
+        self.model = model if model is not None else load_sentence_transformer(backend=backend)
+        self.processes = processes
+        self.pool = None
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    @property
+    def tokenizer(self):
+        return getattr(self.model, "tokenizer", None)
+
+    def start_pool(self, processes=None):
+        processes = processes or self.processes
+        if self.pool is not None or processes < 2:
+            return self.pool
+        # Each worker would otherwise start one torch thread per core
+        previous = os.environ.get("OMP_NUM_THREADS")
+        os.environ["OMP_NUM_THREADS"] = str(max(1, (os.cpu_count() or processes) // processes))
+        try:
+            self.pool = self.model.start_multi_process_pool(target_devices=["cpu"] * processes)
+        finally:
+            if previous is None:
+                os.environ.pop("OMP_NUM_THREADS", None)
+            else:
+                os.environ["OMP_NUM_THREADS"] = previous
+        return self.pool
+
+    def stop_pool(self):
+        if self.pool is not None:
+            self.model.stop_multi_process_pool(self.pool)
+            self.pool = None
+
+    def encode(self, texts, batch_size=32, **kwargs):
+        if isinstance(texts, str):
+            return self.encode_query(texts)
+        metrics.inc("embedding_texts_total", len(texts))
+        with metrics.timer("embedding_seconds", kind="batch"):
+            if self.pool is not None and len(texts) >= MIN_POOL_BATCH:
+                embeddings = self.model.encode_multi_process(texts, self.pool, batch_size=batch_size)
+            else:
+                kwargs.setdefault("show_progress_bar", False)
+                kwargs.setdefault("convert_to_numpy", True)
+                embeddings = self.model.encode(texts, batch_size=batch_size, **kwargs)
+        return np.asarray(embeddings, dtype=np.float32)
+
+    def encode_query(self, text):
+        with self.lock:
+            vector = self.cache.get(text)
+            if vector is not None:
+                self.cache.move_to_end(text)
+                self.cache_hits += 1
+                metrics.inc("embedding_query_cache_total", result="hit")
+                return vector
+            self.cache_misses += 1
+        metrics.inc("embedding_query_cache_total", result="miss")
+        with metrics.timer("embedding_seconds", kind="query"):
+            vector = self.model.encode(text, convert_to_numpy=True, show_progress_bar=False)
+        vector = np.asarray(vector, dtype=np.float32)
+        # Cached vectors are shared between callers, so they must not be mutated
+        vector.setflags(write=False)
+        with self.lock:
+            self.cache[text] = vector
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return vector
@@ -0,0 +1,269 @@
+import argparse
+import json
+import os
+import re
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+from tqdm import tqdm
+
+from candidate_reader import CandidateReader
+from config import (
+    TRANSCRIPT_ARCHIVE_PATH, EVAL_OUTPUT_PATH, EVAL_TOKEN_BUDGET, EVAL_MAX_PAIRS, EVAL_MAX_ANSWER_WORDS,
+    EVAL_CONCURRENCY,
+)
+from interview_manager import CLARIFICATION, HR_TOPICS, TECH_TOPICS
+from metrics import registry as metrics, estimate_tokens, record_llm_tokens
+from prompts import EVALUATION_PROMPT
+
+# Score columns; follow-ups and general questions are graded alongside the fixed topics
+EVAL_TOPICS = HR_TOPICS + TECH_TOPICS + ("tech_followup", "general")
+
+
+def archive_transcript(path, candidate_info, history, session_id=None):
+    # One JSON line per finished interview, read back by evaluation.py
+    candidate_info = candidate_info or {}
+    record = {
+        "session_id": session_id or uuid.uuid4().hex,
+        "candidate_id": candidate_info.get("candidate_id", ""),
+        "name": candidate_info.get("name", ""),
+        "phone": candidate_info.get("phone", ""),
+        "finished_at": time.time(),
+        "history": history,
+    }
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+    return record["session_id"]
+
+
+def load_transcripts(archive_path=None, store=None):
+    # Archived interviews first, then finished sessions still held in a session store
+    seen = set()
+    if archive_path and os.path.exists(archive_path):
+        for record in CandidateReader(archive_path, fmt="jsonl"):
+            if record["session_id"] not in seen:
+                seen.add(record["session_id"])
+                yield record
+    if store is not None:
+        for session_id in store.session_ids():
+            state = store.load_state(session_id)
+            if session_id in seen or not state or not state.get("interview_ended"):
+                continue
+            seen.add(session_id)
+            candidate_info = state.get("candidate_info") or {}
+            yield {
+                "session_id": session_id,
+                "candidate_id": candidate_info.get("candidate_id", ""),
+                "name": candidate_info.get("name", ""),
+                "phone": candidate_info.get("phone", ""),
+                "finished_at": None,
+                "history": store.load_transcript(session_id),
+            }
+
+
+def qa_pairs(session_id, history):
+    # (key, topic, question, answer) for every topic question; the answer is the
+    # candidate's reply, including any reply after a clarification request
+    pairs = []
+    for seq, entry in enumerate(history):
+        if entry.get("speaker") != "HR" or entry.get("topic") not in EVAL_TOPICS:
+            continue
+        answer = []
+        for reply in history[seq + 1:]:
+            if reply.get("speaker") == "Candidate":
+                answer.append(reply["text"])
+            elif reply.get("text") != CLARIFICATION:
+                break
+        if answer:
+            pairs.append((f"{session_id}:{seq}", entry["topic"], entry["text"], " ".join(answer)))
+    return pairs
+
+
+def format_pair(number, pair):
+    _, topic, question, answer = pair
+    words = answer.split()
+    if len(words) > EVAL_MAX_ANSWER_WORDS:
+        answer = " ".join(words[:EVAL_MAX_ANSWER_WORDS]) + " ..."
+    return f"[{number}] Topic: {topic}\nQuestion: {question}\nAnswer: {answer}\n"
+
+
+def pack_batches(pairs, token_budget=EVAL_TOKEN_BUDGET, max_pairs=EVAL_MAX_PAIRS):
+    # Greedy packing in transcript order; a pair larger than the budget goes alone
+    base = estimate_tokens(EVALUATION_PROMPT)
+    batches, batch, used = [], [], base
+    for pair in pairs:
+        cost = estimate_tokens(format_pair(len(batch) + 1, pair))
+        if batch and (used + cost > token_budget or len(batch) >= max_pairs):
+            batches.append(batch)
+            batch, used = [], base
+        batch.append(pair)
+        used += cost
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def parse_scores(text, batch):
+    # Maps pair keys to scores; anything malformed is left ungraded for the next run
+    match = re.search(r"\[.*\]", text, re.S)
+    if not match:
+        return {}
+    try:
+        items = json.loads(match.group(0))
+    except ValueError:
+        return {}
+    scores = {}
+    for item in items if isinstance(items, list) else []:
+        try:
+            number, score = int(item["id"]), float(item["score"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if 1 <= number <= len(batch) and 1 <= score <= 5:
+            scores[batch[number - 1][0]] = score
+    return scores
+
+
+class TranscriptEvaluator:
+    # Grades finished interviews in bulk. Q/A pairs from many transcripts are
+    # packed into prompts under a token budget and graded with bounded
+    # concurrency. Each finished request is appended to a checkpoint file, so a
+    # rerun after a crash or outage only grades what is still missing.
+    def __init__(self, llm, checkpoint_path, token_budget=EVAL_TOKEN_BUDGET, max_pairs=EVAL_MAX_PAIRS,
+                 concurrency=EVAL_CONCURRENCY):
+        self.llm = llm
+        self.checkpoint_path = checkpoint_path
+        self.token_budget = token_budget
+        self.max_pairs = max_pairs
+        self.concurrency = concurrency
+        self.failed_batches = 0
+
+    def load_checkpoint(self):
+        scores = {}
+        if not os.path.exists(self.checkpoint_path):
+            return scores
+        with open(self.checkpoint_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    scores.update(json.loads(line)["scores"])
+                except (ValueError, KeyError):
+                    # A line cut short by a crash is graded again
+                    continue
+        return scores
+
+    def grade(self, batch):
+        pairs = "\n".join(format_pair(number, pair) for number, pair in enumerate(batch, 1))
+        prompt = EVALUATION_PROMPT.format(pairs=pairs)
+        with metrics.timer("evaluation_batch_seconds"):
+            message = self.llm.invoke(prompt)
+        record_llm_tokens(prompt, message, stage="evaluation")
+        return parse_scores(message.content, batch)
+
+    def run(self, pairs):
+        scores = self.load_checkpoint()
+        pending = [pair for pair in pairs if pair[0] not in scores]
+        batches = pack_batches(pending, self.token_budget, self.max_pairs)
+        print(f"{len(pairs) - len(pending)} answers already graded, {len(pending)} to grade in {len(batches)} requests")
+        with open(self.checkpoint_path, "a", encoding="utf-8") as checkpoint, \
+                ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            futures = {executor.submit(self.grade, batch): batch for batch in batches}
+            for future in tqdm(as_completed(futures), total=len(futures), desc="Grading"):
+                batch = futures[future]
+                try:
+                    batch_scores = future.result()
+                except Exception as e:
+                    print(f"Error grading {len(batch)} answers: {e}")
+                    self.failed_batches += 1
+                    metrics.inc("evaluation_answers_total", len(batch), result="failed")
+                    continue
+                metrics.inc("evaluation_answers_total", len(batch_scores), result="graded")
+                metrics.inc("evaluation_answers_total", len(batch) - len(batch_scores), result="unparsed")
+                scores.update(batch_scores)
+                checkpoint.write(json.dumps({"scores": batch_scores}) + "\n")
+                checkpoint.flush()
+        return scores
+
+
+def write_scores(path, sessions, pairs, scores):
+    # Columnar output: one row per interview with a mean score column per topic,
+    # plus a long table with one row per graded answer
+    index = {record["session_id"]: i for i, record in enumerate(sessions)}
+    topic_index = {topic: i for i, topic in enumerate(EVAL_TOPICS)}
+    pair_session = np.asarray([index[key.rsplit(":", 1)[0]] for key, _, _, _ in pairs], dtype=np.int32)
+    pair_topic = np.asarray([topic_index[topic] for _, topic, _, _ in pairs], dtype=np.int32)
+    pair_score = np.asarray([scores.get(key, np.nan) for key, _, _, _ in pairs], dtype=np.float32)
+
+    graded = ~np.isnan(pair_score)
+    totals = np.zeros((len(sessions), len(EVAL_TOPICS)), dtype=np.float64)
+    counts = np.zeros_like(totals)
+    np.add.at(totals, (pair_session[graded], pair_topic[graded]), pair_score[graded])
+    np.add.at(counts, (pair_session[graded], pair_topic[graded]), 1)
+    with np.errstate(invalid="ignore"):
+        topic_scores = (totals / counts).astype(np.float32)
+        overall = (totals.sum(axis=1) / counts.sum(axis=1)).astype(np.float32)
+
+    tmp_path = f"{path}.tmp.npz"
+    np.savez(
+        tmp_path,
+        topics=np.asarray(EVAL_TOPICS, dtype=str),
+        session_ids=np.asarray([record["session_id"] for record in sessions], dtype=str),
+        candidate_ids=np.asarray([record.get("candidate_id", "") for record in sessions], dtype=str),
+        names=np.asarray([record.get("name", "") for record in sessions], dtype=str),
+        phones=np.asarray([record.get("phone", "") for record in sessions], dtype=str),
+        finished_at=np.asarray([record.get("finished_at") or np.nan for record in sessions], dtype=np.float64),
+        overall=overall,
+        answers_graded=counts.sum(axis=1).astype(np.int32),
+        pair_session=pair_session,
+        pair_topic=pair_topic,
+        pair_score=pair_score,
+        **{f"score_{topic}": topic_scores[:, i] for i, topic in enumerate(EVAL_TOPICS)},
+    )
+    os.replace(tmp_path, path)
+    return int(graded.sum())
+
+
+def evaluate_transcripts(llm, archive_path=TRANSCRIPT_ARCHIVE_PATH, store=None, output_path=EVAL_OUTPUT_PATH,
+                         checkpoint_path=None, token_budget=EVAL_TOKEN_BUDGET, max_pairs=EVAL_MAX_PAIRS,
+                         concurrency=EVAL_CONCURRENCY):
+    sessions, pairs = [], []
+    for record in load_transcripts(archive_path, store):
+        sessions.append({key: value for key, value in record.items() if key != "history"})
+        pairs.extend(qa_pairs(record["session_id"], record["history"]))
+    print(f"Loaded {len(sessions)} interviews with {len(pairs)} answers")
+
+    evaluator = TranscriptEvaluator(
+        llm, checkpoint_path or f"{output_path}.checkpoint.jsonl", token_budget, max_pairs, concurrency
+    )
+    scores = evaluator.run(pairs)
+    graded = write_scores(output_path, sessions, pairs, scores)
+    print(f"Graded {graded} of {len(pairs)} answers; scores written to {output_path}")
+    if graded < len(pairs):
+        print(f"{len(pairs) - graded} answers are ungraded ({evaluator.failed_batches} failed requests); "
+              f"run again to retry them")
+    return graded
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Grade finished interview transcripts in bulk.")
+    parser.add_argument("--archive", default=TRANSCRIPT_ARCHIVE_PATH, help="JSON Lines transcript archive written by main.py")
+    parser.add_argument("--from-store", action="store_true", help="Also grade finished sessions in the configured session store")
+    parser.add_argument("--output", default=EVAL_OUTPUT_PATH, help="Columnar .npz score file")
+    parser.add_argument("--checkpoint", help="Progress file for resuming (default: <output>.checkpoint.jsonl)")
+    parser.add_argument("--token-budget", type=int, default=EVAL_TOKEN_BUDGET)
+    parser.add_argument("--max-pairs", type=int, default=EVAL_MAX_PAIRS)
+    parser.add_argument("--concurrency", type=int, default=EVAL_CONCURRENCY)
+    args = parser.parse_args()
+
+    from resources import get_llm
+
+    store = None
+    if args.from_store:
+        from session_store import create_session_store
+
+        store = create_session_store()
+    start = time.perf_counter()
+    evaluate_transcripts(
+        get_llm(), args.archive, store, args.output, args.checkpoint, args.token_budget, args.max_pairs, args.concurrency
+    )
+    print(f"Evaluation took {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,36 @@
+import hashlib
+import re
+
+import numpy as np
+
+from config import EMBEDDING_DIMENSION
+
+
+class FakeEmbeddingModel:
+    # Deterministic stand-in for SentenceTransformer: a normalized bag of
+    # hashed words, so texts sharing words land close together. Lets ingest and
+    # retrieval run offline without downloading MiniLM.
+    tokenizer = None
+
+    def __init__(self, dimension=EMBEDDING_DIMENSION):
+        self.dimension = dimension
+        self.calls = 0
+
+    def get_sentence_embedding_dimension(self):
+        return self.dimension
+
+    def _vector(self, text):
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        for word in re.findall(r"\w+", text.lower()):
+            digest = int(hashlib.md5(word.encode("utf-8")).hexdigest()[:8], 16)
+            vector[digest % self.dimension] += 1.0 if digest & 1 << 31 else -1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def encode(self, texts, batch_size=32, convert_to_numpy=True, show_progress_bar=False, **kwargs):
+        self.calls += 1
+        if isinstance(texts, str):
+            return self._vector(texts)
+        if not len(texts):
+            return np.zeros((0, self.dimension), dtype=np.float32)
+        return np.stack([self._vector(text) for text in texts])
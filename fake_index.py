@@ -0,0 +1,110 @@
+import random
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+
+class FakeIndex:
+    # In-memory stand-in for pinecone.Index with injectable latency and errors,
+    # used to exercise ingestion throughput and backpressure without a network.
+    def __init__(self, latency=0.0, error_rate=0.0, seed=0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.vectors = {}
+        self.upsert_calls = 0
+        self.failed_calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def _call(self):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            fail = self.random.random() < self.error_rate
+        try:
+            if self.latency:
+                time.sleep(self.latency)
+            if fail:
+                with self.lock:
+                    self.failed_calls += 1
+                raise ConnectionError("Injected fake index failure")
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+    def upsert(self, vectors):
+        self._call()
+        with self.lock:
+            self.upsert_calls += 1
+            for vector in vectors:
+                self.vectors[vector["id"]] = {
+                    "values": np.asarray(vector["values"], dtype=np.float32),
+                    "metadata": dict(vector.get("metadata") or {}),
+                }
+        return {"upserted_count": len(vectors)}
+
+    def fetch(self, ids):
+        self._call()
+        with self.lock:
+            found = {
+                vector_id: SimpleNamespace(id=vector_id, values=self.vectors[vector_id]["values"].tolist(),
+                                           metadata=self.vectors[vector_id]["metadata"])
+                for vector_id in ids if vector_id in self.vectors
+            }
+        return SimpleNamespace(vectors=found)
+
+    def delete(self, ids):
+        self._call()
+        with self.lock:
+            for vector_id in ids:
+                self.vectors.pop(vector_id, None)
+        return {}
+
+    def query(self, vector, top_k=10, include_metadata=True, filter=None, include_values=False):
+        self._call()
+        with self.lock:
+            items = [
+                (vector_id, entry) for vector_id, entry in self.vectors.items()
+                if _matches_filter(entry["metadata"], filter)
+            ]
+        if not items:
+            return SimpleNamespace(matches=[])
+        query = np.asarray(vector, dtype=np.float32)
+        matrix = np.stack([entry["values"] for _, entry in items])
+        norms = np.linalg.norm(matrix, axis=1) * (np.linalg.norm(query) or 1.0)
+        scores = matrix @ query / np.where(norms == 0, 1.0, norms)
+        order = np.argsort(-scores)[:top_k]
+        matches = [
+            SimpleNamespace(
+                id=items[i][0],
+                score=float(scores[i]),
+                metadata=items[i][1]["metadata"] if include_metadata else None,
+                values=items[i][1]["values"].tolist() if include_values else None,
+            )
+            for i in order
+        ]
+        return SimpleNamespace(matches=matches)
+
+    def describe_index_stats(self):
+        with self.lock:
+            return {"total_vector_count": len(self.vectors), "dimension": 384}
+
+
+def _matches_filter(metadata, filter):
+    # Supports the subset of Pinecone filter syntax used in this repo: equality, $eq, $in
+    if not filter:
+        return True
+    for key, condition in filter.items():
+        value = metadata.get(key)
+        if isinstance(condition, dict):
+            if "$eq" in condition and value != condition["$eq"]:
+                return False
+            if "$in" in condition and value not in condition["$in"]:
+                return False
+        elif value != condition:
+            return False
+    return True
@@ -0,0 +1,96 @@
+import asyncio
+import hashlib
+import random
+import threading
+import time
+from types import SimpleNamespace
+
+QUESTION_TEMPLATES = [
+    "Could you walk me through how you approached that in your last role?",
+    "What would you say was the most challenging part of that work?",
+    "How did you decide which tools to use for that project?",
+    "What are you hoping to focus on in your next position?",
+    "How would you handle a situation where requirements changed late in a project?",
+    "Can you tell me more about the team you worked with?",
+]
+
+
+class FakeLLM:
+    # Deterministic stand-in for ChatGroq with the invoke/ainvoke/stream/astream
+    # surface used in this repo. Latency and failures are injectable so the
+    # interview engine can be exercised without API keys.
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, seed=0, responses=None, chunk_delay=0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.responses = responses or QUESTION_TEMPLATES
+        self.chunk_delay = chunk_delay
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def _respond(self, prompt):
+        digest = int(hashlib.md5(str(prompt).encode("utf-8")).hexdigest(), 16)
+        return self.responses[digest % len(self.responses)]
+
+    def _begin(self):
+        with self.lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            delay = max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+            fail = self.random.random() < self.error_rate
+        return delay, fail
+
+    def _end(self, fail):
+        with self.lock:
+            self.in_flight -= 1
+            if fail:
+                self.failures += 1
+        if fail:
+            raise ConnectionError("Injected fake LLM failure")
+
+    def invoke(self, prompt):
+        delay, fail = self._begin()
+        try:
+            time.sleep(delay)
+        finally:
+            self._end(fail)
+        return SimpleNamespace(content=self._respond(prompt))
+
+    async def ainvoke(self, prompt):
+        delay, fail = self._begin()
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            self._end(fail)
+        return SimpleNamespace(content=self._respond(prompt))
+
+    def _chunks(self, prompt):
+        words = self._respond(prompt).split(" ")
+        return [word + (" " if i < len(words) - 1 else "") for i, word in enumerate(words)]
+
+    def stream(self, prompt):
+        delay, fail = self._begin()
+        try:
+            time.sleep(delay)
+        finally:
+            self._end(fail)
+        for chunk in self._chunks(prompt):
+            if self.chunk_delay:
+                time.sleep(self.chunk_delay)
+            yield SimpleNamespace(content=chunk)
+
+    async def astream(self, prompt):
+        delay, fail = self._begin()
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            self._end(fail)
+        for chunk in self._chunks(prompt):
+            if self.chunk_delay:
+                await asyncio.sleep(self.chunk_delay)
+            yield SimpleNamespace(content=chunk)
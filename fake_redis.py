@@ -0,0 +1,76 @@
+import fnmatch
+import threading
+import time
+
+
+class FakeRedis:
+    # In-memory stand-in for the subset of redis-py used by RedisSessionStore,
+    # including key expiry, so session persistence can run without a server.
+    def __init__(self):
+        self.data = {}
+        self.expires = {}
+        self.lock = threading.Lock()
+        self.calls = 0
+
+    def _live(self, key):
+        deadline = self.expires.get(key)
+        if deadline is not None and deadline <= time.monotonic():
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return self.data.get(key)
+
+    def get(self, key):
+        with self.lock:
+            self.calls += 1
+            value = self._live(key)
+            return value if isinstance(value, bytes) else None
+
+    def set(self, key, value, ex=None):
+        with self.lock:
+            self.calls += 1
+            self.data[key] = value if isinstance(value, bytes) else str(value).encode("utf-8")
+            if ex:
+                self.expires[key] = time.monotonic() + ex
+            else:
+                self.expires.pop(key, None)
+            return True
+
+    def hset(self, key, field, value):
+        with self.lock:
+            self.calls += 1
+            fields = self._live(key)
+            if fields is None:
+                fields = self.data[key] = {}
+            field = field if isinstance(field, bytes) else str(field).encode("utf-8")
+            added = field not in fields
+            fields[field] = value if isinstance(value, bytes) else str(value).encode("utf-8")
+            return int(added)
+
+    def hgetall(self, key):
+        with self.lock:
+            self.calls += 1
+            return dict(self._live(key) or {})
+
+    def expire(self, key, seconds):
+        with self.lock:
+            self.calls += 1
+            if self._live(key) is None:
+                return False
+            self.expires[key] = time.monotonic() + seconds
+            return True
+
+    def delete(self, *keys):
+        with self.lock:
+            self.calls += 1
+            removed = 0
+            for key in keys:
+                removed += self._live(key) is not None
+                self.data.pop(key, None)
+                self.expires.pop(key, None)
+            return removed
+
+    def scan_iter(self, match=None):
+        with self.lock:
+            self.calls += 1
+            keys = [key for key in list(self.data) if self._live(key) is not None]
+        return iter([key for key in keys if match is None or fnmatch.fnmatchcase(key, match)])
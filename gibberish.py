@@ -0,0 +1,186 @@
+import os
+import re
+
+import numpy as np
+
+from config import LEXICON_PATH, GIBBERISH_MIN_VALID_RATIO, GIBBERISH_NGRAM_THRESHOLD
+
+TOKEN_PATTERN = re.compile(r"\b\w+\b")
+
+# Identifiers candidates use in technical answers that no dictionary carries
+TECH_TERMS = (
+    "k8s", "kubectl", "grpc", "pyspark", "numpy", "pandas", "scipy", "sklearn", "pytorch", "tensorflow",
+    "keras", "fastapi", "django", "flask", "nodejs", "npm", "reactjs", "vuejs", "nextjs", "typescript",
+    "javascript", "graphql", "postgres", "postgresql", "mysql", "sqlite", "mongodb", "nosql", "redis",
+    "kafka", "rabbitmq", "elasticsearch", "dynamodb", "bigquery", "snowflake", "hadoop", "hdfs", "airflow",
+    "dbt", "etl", "elt", "aws", "gcp", "azure", "ec2", "s3", "iam", "vpc", "lambda", "terraform", "ansible",
+    "docker", "dockerfile", "kubernetes", "helm", "istio", "nginx", "linux", "bash", "cli", "api", "apis",
+    "sdk", "json", "yaml", "xml", "csv", "http", "https", "tcp", "udp", "dns", "ssl", "tls", "jwt", "oauth",
+    "cicd", "ci", "cd", "github", "gitlab", "jenkins", "devops", "mlops", "sre", "llm", "llms", "nlp", "ml",
+    "ai", "cnn", "rnn", "lstm", "bert", "gpu", "gpus", "cpu", "cpus", "ram", "ssd", "sql", "orm", "oop",
+    "async", "asyncio", "multithreading", "microservice", "microservices", "backend", "frontend",
+    "fullstack", "ui", "ux", "qa", "golang", "rust", "scala", "kotlin", "swift", "cpp", "csharp",
+    "dotnet", "jvm", "jdk", "ide", "vscode", "pycharm", "jupyter", "repo", "repos", "config", "configs",
+    "param", "params", "regex", "dataset", "datasets", "dataframe", "dataframes", "pipeline", "pipelines",
+    "webhook", "webhooks", "localhost", "runtime", "middleware", "cron", "latency", "throughput", "p95",
+    "p99", "ok", "okay", "yeah", "yep", "nope", "hmm", "um", "uh",
+)
+
+# Character alphabet for the n-gram model: a-z, 0-9, word boundary, anything else
+_BOUNDARY, _OTHER, _PAD = 36, 37, 38
+_ALPHABET = 39
+_CODES = np.full(256, _OTHER, dtype=np.int64)
+_CODES[np.frombuffer(b"abcdefghijklmnopqrstuvwxyz", dtype=np.uint8)] = np.arange(26)
+_CODES[np.frombuffer(b"0123456789", dtype=np.uint8)] = np.arange(26, 36)
+_CODES[0] = _PAD
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def trigram_path(path):
+    # lexicon.npy -> lexicon.trigrams.npy
+    root, ext = os.path.splitext(path)
+    return f"{root}.trigrams{ext or '.npy'}"
+
+
+def candidate_vocabulary(candidate):
+    # Skill and project vocabulary mined from one candidate record
+    fields = [candidate.get("current_role", ""), candidate.get("company", ""), candidate.get("location", "")]
+    for key in ("skills", "projects", "education"):
+        values = candidate.get(key) or []
+        # education is a plain string in dummy-resume.json, a list elsewhere
+        for value in [values] if isinstance(values, (str, dict)) else values:
+            fields.extend(value.values() if isinstance(value, dict) else [value])
+    return {token for field in fields for token in tokenize(str(field))}
+
+
+def _encode(tokens, width):
+    # Fixed-width byte matrix, one row per token, padded with NUL
+    data = np.asarray([token.encode("ascii", "replace")[:width] for token in tokens], dtype=f"S{width}")
+    return data.view(np.uint8).reshape(len(tokens), width)
+
+
+def _trigram_index(byte_rows):
+    # Every token becomes ^token$ and is cut into trigrams; pad positions are masked out
+    n, width = byte_rows.shape
+    codes = np.full((n, width + 2), _PAD, dtype=np.int64)
+    codes[:, 0] = _BOUNDARY
+    codes[:, 1:width + 1] = _CODES[byte_rows]
+    lengths = (byte_rows != 0).sum(axis=1)
+    codes[np.arange(n), lengths + 1] = _BOUNDARY
+    index = (codes[:, :-2] * _ALPHABET + codes[:, 1:-1]) * _ALPHABET + codes[:, 2:]
+    mask = np.arange(width) < lengths[:, None]
+    return index, mask, lengths
+
+
+class Lexicon:
+    # Sorted fixed-width byte array of known words. Saved as .npy so every
+    # worker process can memory-map the same read-only pages, and looked up
+    # with one np.searchsorted call per batch of tokens. The trigram model is
+    # saved alongside it, so loading never recounts the lexicon.
+    def __init__(self, words, backoff=2.0, trigram_logprob=None):
+        self.words = words
+        self.width = words.dtype.itemsize
+        self.trigram_logprob = self._trigram_model(backoff) if trigram_logprob is None else trigram_logprob
+
+    @classmethod
+    def build(cls, words):
+        words = {word.lower() for word in words if word and word.isascii()}
+        return cls(np.unique(np.asarray(list(words), dtype="S")))
+
+    @classmethod
+    def load(cls, path):
+        model_path = trigram_path(path)
+        trigram_logprob = None
+        # A model older than the word list belongs to a previous lexicon and is rebuilt
+        if os.path.exists(model_path) and os.path.getmtime(model_path) >= os.path.getmtime(path):
+            trigram_logprob = np.load(model_path, mmap_mode="r")
+        return cls(np.load(path, mmap_mode="r"), trigram_logprob=trigram_logprob)
+
+    def save(self, path):
+        np.save(path, np.asarray(self.words))
+        np.save(trigram_path(path), np.asarray(self.trigram_logprob))
+
+    def __len__(self):
+        return len(self.words)
+
+    def _trigram_model(self, backoff):
+        # P(c3 | c1 c2) over the lexicon itself, used to score unknown tokens.
+        # Sparse contexts back off to P(c3 | c2) and P(c3) rather than to a
+        # uniform guess, which made rare openings such as "qw" look plausible.
+        counts = np.zeros(_ALPHABET ** 3, dtype=np.float64)
+        rows = np.asarray(self.words).view(np.uint8).reshape(len(self.words), self.width)
+        for start in range(0, len(rows), 65536):
+            index, mask, _ = _trigram_index(rows[start:start + 65536])
+            counts += np.bincount(index[mask], minlength=_ALPHABET ** 3)
+        trigrams = counts.reshape(_ALPHABET, _ALPHABET, _ALPHABET)
+        bigrams = trigrams.sum(axis=0)
+        unigrams = bigrams.sum(axis=0)
+        unigram_prob = (unigrams + 0.5) / (unigrams.sum() + 0.5 * _ALPHABET)
+        bigram_prob = (bigrams + backoff * unigram_prob) / (bigrams.sum(axis=1, keepdims=True) + backoff)
+        trigram_prob = (trigrams + backoff * bigram_prob) / (trigrams.sum(axis=2, keepdims=True) + backoff)
+        return np.log(trigram_prob).astype(np.float32).ravel()
+
+    def contains(self, tokens):
+        if not len(tokens):
+            return np.zeros(0, dtype=bool)
+        keys = np.asarray([token.encode("ascii", "replace") for token in tokens], dtype="S")
+        positions = np.searchsorted(self.words, keys).clip(max=len(self.words) - 1)
+        return self.words[positions] == keys
+
+    def ngram_score(self, tokens):
+        # Mean log-probability per character transition; higher is more word-like
+        if not len(tokens):
+            return np.zeros(0, dtype=np.float32)
+        index, mask, lengths = _trigram_index(_encode(tokens, max(len(token) for token in tokens)))
+        logprob = np.where(mask, self.trigram_logprob[np.where(mask, index, 0)], 0.0)
+        return logprob.sum(axis=1) / np.maximum(lengths, 1)
+
+
+def build_lexicon(extra_words=(), path=LEXICON_PATH):
+    import nltk
+    from nltk.corpus import words
+
+    nltk.download("words", quiet=True)
+    lexicon = Lexicon.build([*words.words(), *TECH_TERMS, *extra_words])
+    if path:
+        lexicon.save(path)
+    return lexicon
+
+
+class GibberishDetector:
+    # A response is gibberish when too few of its tokens look like words.
+    # Tokens missing from the lexicon still count if the character n-gram
+    # model finds them plausible, so unseen identifiers and typos pass while
+    # keyboard mashing does not.
+    def __init__(self, lexicon, min_valid_ratio=GIBBERISH_MIN_VALID_RATIO, ngram_threshold=GIBBERISH_NGRAM_THRESHOLD):
+        self.lexicon = lexicon
+        self.min_valid_ratio = min_valid_ratio
+        self.ngram_threshold = ngram_threshold
+
+    def valid_tokens(self, tokens):
+        valid = self.lexicon.contains(tokens)
+        unknown = np.flatnonzero(~valid)
+        if len(unknown):
+            scores = self.lexicon.ngram_score([tokens[i] for i in unknown])
+            valid[unknown] = scores >= self.ngram_threshold
+        return valid
+
+    def is_gibberish(self, text):
+        return bool(self.is_gibberish_batch([text])[0])
+
+    def is_gibberish_batch(self, texts):
+        token_lists = [tokenize(text) for text in texts]
+        counts = np.asarray([len(tokens) for tokens in token_lists])
+        tokens = [token for token_list in token_lists for token in token_list]
+        result = np.ones(len(texts), dtype=bool)
+        if not tokens:
+            return result
+        valid = self.valid_tokens(tokens).astype(np.int64)
+        nonempty = counts > 0
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[nonempty]
+        ratios = np.add.reduceat(valid, starts) / counts[nonempty]
+        result[nonempty] = ratios < self.min_valid_ratio
+        return result
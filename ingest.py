@@ -1,12 +1,29 @@
 import os
-import json
 import time
+import argparse
+import threading
 import numpy as np
 from tqdm import tqdm
-from sentence_transformers import SentenceTransformer
 from pinecone import Pinecone
-from config import PINECONE_API_KEY, PINECONE_INDEX_NAME
+from config import (
+    PINECONE_API_KEY, PINECONE_INDEX_NAME, PHONE_INDEX_PATH,
+    EMBED_BATCH_SIZE, UPSERT_BATCH_SIZE, PIPELINE_BUFFER_SIZE,
+    UPSERT_WORKERS, UPSERT_QUEUE_SIZE, UPSERT_MAX_ATTEMPTS, INGEST_MANIFEST_PATH, EMBEDDING_PROCESSES,
+    VECTOR_STORE, EMBEDDING_DIMENSION, CHUNK_STRATEGY, LEXICON_PATH, CANDIDATE_CATALOG_PATH,
+    DEDUP_POLICY, DEDUP_REPORT_PATH,
+)
 from pinecone import ServerlessSpec
+from phone_index import PhoneIndex
+from upsert_workers import UpsertWorkerPool
+from fake_index import FakeIndex
+from ingest_manifest import IngestManifest, candidate_id_for, content_hash
+from vector_store import FaissStore, PineconeStore
+from resources import get_embedding_model
+from chunking import make_chunker
+from candidate_reader import CandidateReader
+from gibberish import build_lexicon, candidate_vocabulary
+from candidate_ranker import CandidateCatalog, structured_fields
+from dedup import CandidateDeduplicator, find_duplicates, merge_records, write_report
 
 # Local file path for JSON
 JSON_PATH = "dummy-resume.json"
@@ -33,7 +50,7 @@ def initialize_pinecone():
     if PINECONE_INDEX_NAME not in pc.list_indexes().names():
         pc.create_index(
             name=PINECONE_INDEX_NAME,
-            dimension=384,
+            dimension=EMBEDDING_DIMENSION,
             metric="cosine",
             spec=ServerlessSpec(cloud="aws", region="us-east-1")
         )
@@ -45,112 +62,349 @@ def initialize_pinecone():
     
     return pc.Index(PINECONE_INDEX_NAME)
 
-def process_candidate(model, pinecone_index, candidate_id, candidate_data):
+def open_vector_store(backend=VECTOR_STORE):
+    if backend == "faiss":
+        print("Opening local FAISS store...")
+        return FaissStore()
+    print("Initializing Pinecone...")
+    return PineconeStore(initialize_pinecone())
+
+def build_candidate_records(candidate_id, candidate_data, chunker=None):
     name = candidate_data.get("name", "")
     phone_number = candidate_data.get("phone", "")
     resume_text = candidate_data.get("resume_text", "")
 
     if not name or not phone_number:
         print(f"Missing required data for candidate {candidate_id}")
-        return False
+        return None
 
     if not resume_text:
         resume_text = generate_resume_text(candidate_data)
 
-    chunk_size = 1000
-    chunks = [resume_text[i:i+chunk_size] for i in range(0, len(resume_text), chunk_size)]
-    if not chunks:
-        chunks = [resume_text]
+    chunker = chunker or make_chunker()
+    chunks = chunker(resume_text)
+    # Skills, years and location are kept on every record for filtered queries
+    fields = structured_fields(candidate_data)
+
+    records = []
 
-    vectors = []
-    
     for i, chunk in enumerate(chunks):
-        embedding = model.encode(chunk).astype("float32").tolist()
-        vector_id = f"{candidate_id}_chunk_{i}"
-        
-        vectors.append({
-            "id": vector_id,
-            "values": embedding,
+        records.append({
+            "id": f"{candidate_id}_chunk_{i}",
+            "text": chunk,
             "metadata": {
                 "candidate_id": candidate_id,
                 "name": name,
                 "phone": phone_number,
                 "chunk_id": str(i),  # Convert to string
                 "text": chunk,
-                "is_phone_entry": "false"  # Convert to string
+                "is_phone_entry": "false",  # Convert to string
+                **fields
             }
         })
 
     # Add phone number as separate searchable item
     phone_query = f"Phone number: {phone_number}"
-    phone_embedding = model.encode(phone_query).astype("float32").tolist()
-    phone_vector_id = f"{candidate_id}_phone"
-    
-    vectors.append({
-        "id": phone_vector_id,
-        "values": phone_embedding,
+    records.append({
+        "id": f"{candidate_id}_phone",
+        "text": phone_query,
         "metadata": {
             "candidate_id": candidate_id,
             "name": name,
             "phone": phone_number,
             "chunk_id": "-1",  # Special value for phone entries
+            "chunk_count": len(chunks),  # Lets the session loader fetch every chunk by id
             "text": phone_query,
-            "is_phone_entry": "true"  # Convert to string
+            "is_phone_entry": "true",  # Convert to string
+            **fields
         }
     })
 
-    # Upsert vectors in batches (Pinecone recommends batches of 100 or less)
-    batch_size = 100
-    for i in range(0, len(vectors), batch_size):
-        batch = vectors[i:i + batch_size]
+    return records
+
+def embed_texts(model, texts, batch_size=EMBED_BATCH_SIZE):
+    embeddings = model.encode(texts, batch_size=batch_size, convert_to_numpy=True, show_progress_bar=False)
+    return np.asarray(embeddings, dtype=np.float32)
+
+class IngestPipeline:
+    # Collects records across many candidates so the encoder sees large batches
+    # and the vector store receives full upsert requests instead of one per candidate.
+    def __init__(self, model, store, phone_index=None,
+                 embed_batch_size=EMBED_BATCH_SIZE, upsert_batch_size=UPSERT_BATCH_SIZE,
+                 buffer_size=PIPELINE_BUFFER_SIZE, upsert_workers=UPSERT_WORKERS, chunker=None, catalog=None):
+        self.model = model
+        self.chunker = chunker or make_chunker(CHUNK_STRATEGY, getattr(model, "tokenizer", None))
+        self.store = store
+        self.phone_index = phone_index
+        self.catalog = catalog
+        self.embed_batch_size = embed_batch_size
+        self.upsert_batch_size = upsert_batch_size
+        self.buffer_size = max(buffer_size, upsert_batch_size)
+        self.pending_records = []
+        self.pending_vectors = []
+        self.pending_candidates = {}
+        self.failed_candidates = set()
+        self.succeeded_candidates = set()
+        self.upsert_requests = 0
+        self.embedded_texts = 0
+        self.reused_embeddings = 0
+        self.lock = threading.Lock()
+        # With workers, encoding (producer) overlaps with upserts (consumers)
+        self.worker_pool = None
+        if upsert_workers > 0:
+            self.worker_pool = UpsertWorkerPool(
+                store, self._mark_done, workers=upsert_workers,
+                queue_size=UPSERT_QUEUE_SIZE, max_attempts=UPSERT_MAX_ATTEMPTS
+            )
+
+    def add_candidate(self, candidate_id, candidate_data):
+        records = build_candidate_records(candidate_id, candidate_data, self.chunker)
+        if records is None:
+            return None
+        self.pending_records.extend(records)
+        with self.lock:
+            self.pending_candidates[candidate_id] = {"remaining": len(records), "phone_metadata": records[-1]["metadata"]}
+        if len(self.pending_records) >= self.buffer_size:
+            self._encode_pending()
+        return [record["id"] for record in records]
+
+    def _encode_pending(self):
+        if not self.pending_records:
+            return
+        records = self.pending_records
+        self.pending_records = []
+        # Identical texts across candidates (shared boilerplate, re-sent records) are embedded once
+        rows = {}
+        for record in records:
+            rows.setdefault(record["text"], len(rows))
+        matrix = embed_texts(self.model, list(rows), self.embed_batch_size)
+        self.embedded_texts += len(rows)
+        self.reused_embeddings += len(records) - len(rows)
+        for record in records:
+            embedding = matrix[rows[record["text"]]]
+            if self.catalog is not None and record["metadata"]["is_phone_entry"] == "false":
+                self.catalog.stage(record["metadata"], embedding)
+            self.pending_vectors.append({
+                "id": record["id"],
+                "values": embedding.tolist(),
+                "metadata": record["metadata"]
+            })
+        # Only send full batches; the remainder waits for the next encode or the final flush
+        full = len(self.pending_vectors) - len(self.pending_vectors) % self.upsert_batch_size
+        self._upsert(self.pending_vectors[:full])
+        self.pending_vectors = self.pending_vectors[full:]
+
+    def _upsert(self, vectors):
+        for i in range(0, len(vectors), self.upsert_batch_size):
+            batch = vectors[i:i + self.upsert_batch_size]
+            self.upsert_requests += 1
+            if self.worker_pool is not None:
+                self.worker_pool.submit(batch)
+                continue
+            try:
+                self.store.upsert(vectors=batch)
+            except Exception as e:
+                print(f"Error upserting batch {self.upsert_requests}: {e}")
+                self._mark_done(batch, failed=True)
+                continue
+            self._mark_done(batch, failed=False)
+
+    def _mark_done(self, batch, failed):
+        with self.lock:
+            self._mark_done_locked(batch, failed)
+
+    def _mark_done_locked(self, batch, failed):
+        for vector in batch:
+            candidate_id = vector["metadata"]["candidate_id"]
+            if failed:
+                self.failed_candidates.add(candidate_id)
+            state = self.pending_candidates.get(candidate_id)
+            if state is None:
+                continue
+            state["remaining"] -= 1
+            if state["remaining"] == 0:
+                del self.pending_candidates[candidate_id]
+                if candidate_id not in self.failed_candidates:
+                    self.succeeded_candidates.add(candidate_id)
+                    if self.phone_index is not None:
+                        meta = state["phone_metadata"]
+                        self.phone_index.add(meta["phone"], meta)
+
+    def flush(self):
+        self._encode_pending()
+        vectors = self.pending_vectors
+        self.pending_vectors = []
+        self._upsert(vectors)
+        if self.worker_pool is not None:
+            self.worker_pool.close()
+            if self.worker_pool.retries:
+                print(f"Upsert retries: {self.worker_pool.retries}")
+            if self.worker_pool.failed_batches:
+                print(f"Failed upsert batches: {len(self.worker_pool.failed_batches)}")
+
+def process_candidate(model, store, candidate_id, candidate_data, phone_index=None):
+    pipeline = IngestPipeline(model, store, phone_index, upsert_workers=0)
+    if pipeline.add_candidate(candidate_id, candidate_data) is None:
+        return False
+    pipeline.flush()
+    return candidate_id in pipeline.succeeded_candidates
+
+def delete_vectors(store, vector_ids, batch_size=UPSERT_BATCH_SIZE):
+    for i in range(0, len(vector_ids), batch_size):
+        batch = vector_ids[i:i + batch_size]
         try:
-            pinecone_index.upsert(vectors=batch)
+            store.delete(batch)
         except Exception as e:
-            print(f"Error upserting batch {i//batch_size}: {e}")
+            print(f"Error deleting {len(batch)} stale vectors: {e}")
             return False
-
     return True
 
-def ingest_candidates(json_path):
+def find_duplicate_records(json_path, policy, report_path=DEDUP_REPORT_PATH):
+    # First pass over the export; returns {duplicate index: kept index}
+    reader = CandidateReader(json_path)
+    deduplicator = CandidateDeduplicator()
+    progress = tqdm(total=reader.total_bytes, unit="B", unit_scale=True, desc="Checking for duplicates")
+
+    def records():
+        for index, candidate_data in enumerate(reader):
+            progress.update(reader.bytes_read - progress.n)
+            yield index, candidate_data
+
+    duplicates, report = find_duplicates(records(), deduplicator)
+    progress.update(reader.bytes_read - progress.n)
+    progress.close()
+    if report_path:
+        write_report(report_path, report, policy, reader.records, deduplicator.comparisons)
+    print(f"Found {len(duplicates)} duplicate records in {reader.records} ({deduplicator.comparisons} comparisons)")
+    return duplicates
+
+def ingest_candidates(json_path, store=None, upsert_workers=UPSERT_WORKERS,
+                      manifest_path=INGEST_MANIFEST_PATH, full=False, embed_processes=EMBEDDING_PROCESSES,
+                      catalog_path=CANDIDATE_CATALOG_PATH, dedup=DEDUP_POLICY):
     print("Loading embedding model...")
-    model = SentenceTransformer('all-MiniLM-L6-v2')
+    model = get_embedding_model()
+    if embed_processes > 1:
+        print(f"Starting {embed_processes} embedding processes...")
+        model.start_pool(embed_processes)
 
-    print("Initializing Pinecone...")
-    pinecone_index = initialize_pinecone()
+    if store is None:
+        store = open_vector_store()
 
-    with open(json_path, 'r', encoding='utf-8') as f:
-        candidates = json.load(f)
+    # Near-duplicates (same person exported twice) are found before anything is embedded
+    duplicates = find_duplicate_records(json_path, dedup) if dedup != "off" else {}
+    cluster_sizes = {}
+    for kept_index in duplicates.values():
+        cluster_sizes[kept_index] = cluster_sizes.get(kept_index, 1) + 1
+    clusters = {}
 
-    if isinstance(candidates, dict):  
-        candidates = list(candidates.values())
+    # Records are streamed one at a time, so the dump never has to fit in memory
+    reader = CandidateReader(json_path)
 
-    print(f"Found {len(candidates)} candidates")
+    # Without a manifest (e.g. a dry run into a fake index) every candidate is re-embedded
+    manifest = IngestManifest(manifest_path).load() if manifest_path else IngestManifest(None)
+    phone_index = PhoneIndex(PHONE_INDEX_PATH).load()
+    # Unchanged candidates keep their catalog entries from the previous run
+    catalog = CandidateCatalog.load(catalog_path) if manifest.entries and not full else CandidateCatalog()
+    pipeline = IngestPipeline(model, store, phone_index, upsert_workers=upsert_workers, catalog=catalog)
 
-    success_count = 0
-    for i, candidate_data in tqdm(enumerate(candidates), desc="Processing candidates"):
-        candidate_id = f"candidate_{i+1}"
-        if process_candidate(model, pinecone_index, candidate_id, candidate_data):
-            success_count += 1
+    seen = set()
+    queued = {}
+    vocabulary = set()
+    unchanged_count = 0
+    missing_from_catalog = 0
+    progress = tqdm(total=reader.total_bytes, unit="B", unit_scale=True, desc="Processing candidates")
+    for index, candidate_data in enumerate(reader):
+        progress.update(reader.bytes_read - progress.n)
+        progress.set_postfix(records=reader.records, refresh=False)
+        if index in duplicates:
+            if dedup != "merge":
+                continue
+            kept_index = duplicates[index]
+            clusters[kept_index].append(candidate_data)
+            if len(clusters[kept_index]) < cluster_sizes[kept_index]:
+                continue
+            candidate_data = merge_records(clusters.pop(kept_index))
+        elif dedup == "merge" and index in cluster_sizes:
+            # Held until the rest of its cluster has been read; duplicates always come later
+            clusters[index] = [candidate_data]
+            continue
+        candidate_id = candidate_id_for(candidate_data)
+        if candidate_id is None:
+            print(f"Missing phone and email for candidate {candidate_data.get('name', '')}")
+            continue
+        if candidate_id in seen:
+            print(f"Skipping duplicate record for {candidate_id}")
+            continue
+        seen.add(candidate_id)
+        vocabulary |= candidate_vocabulary(candidate_data)
 
-    print(f"Successfully processed {success_count} out of {len(candidates)} candidates")
-    print("Indexing complete. You can now query the Pinecone index.")
+        digest = content_hash(candidate_data)
+        # --full re-embeds everything, but the previous entries still decide which vectors are stale
+        if not full and manifest.is_unchanged(candidate_id, digest):
+            unchanged_count += 1
+            if candidate_id not in catalog:
+                missing_from_catalog += 1
+            continue
+        vector_ids = pipeline.add_candidate(candidate_id, candidate_data)
+        if vector_ids is not None:
+            queued[candidate_id] = (digest, vector_ids)
+    progress.update(reader.bytes_read - progress.n)
+    progress.close()
+    pipeline.flush()
+    model.stop_pool()
+    print(f"Read {reader.records} candidates")
 
-    return model, pinecone_index
+    # Changed candidates may now have fewer chunks than before
+    stale_ids = []
+    for candidate_id in pipeline.succeeded_candidates:
+        digest, vector_ids = queued[candidate_id]
+        stale_ids.extend(set(manifest.vector_ids(candidate_id)) - set(vector_ids))
+        manifest.record(candidate_id, digest, vector_ids)
+    catalog.commit(pipeline.succeeded_candidates)
 
-def test_phone_lookup(model, pinecone_index, phone_number):
+    removed = [candidate_id for candidate_id in manifest.entries if candidate_id not in seen]
+    for candidate_id in removed:
+        stale_ids.extend(manifest.vector_ids(candidate_id))
+    if stale_ids and delete_vectors(store, stale_ids):
+        for candidate_id in removed:
+            manifest.remove(candidate_id)
+            phone_index.remove_candidate(candidate_id)
+            catalog.remove(candidate_id)
+
+    success_count = len(pipeline.succeeded_candidates)
+    store.save()
+    phone_index.save()
+    if manifest_path:
+        manifest.save()
+    print(f"Embedded {success_count} new or changed candidates, skipped {unchanged_count} unchanged, removed {len(removed)}")
+    if duplicates:
+        action = "merged into" if dedup == "merge" else "skipped in favour of"
+        print(f"{len(duplicates)} duplicate records {action} an earlier record; see {DEDUP_REPORT_PATH}")
+    print(f"Embedded {pipeline.embedded_texts} texts ({pipeline.reused_embeddings} duplicates reused), sent {pipeline.upsert_requests} upsert requests")
+    print(f"Phone index with {len(phone_index)} entries written to {PHONE_INDEX_PATH}")
+    if catalog_path:
+        catalog.save(catalog_path)
+        print(f"Ranking catalog with {len(catalog)} candidates written to {catalog_path}")
+        if missing_from_catalog:
+            print(f"{missing_from_catalog} unchanged candidates are missing from the catalog; run with --full to add them")
+    try:
+        lexicon = build_lexicon(vocabulary, LEXICON_PATH)
+        print(f"Lexicon with {len(lexicon)} words ({len(vocabulary)} from candidate data) written to {LEXICON_PATH}")
+    except Exception as e:
+        print(f"Error building lexicon: {e}")
+    print("Indexing complete. You can now query the vector store.")
+
+    return model, store
+
+def test_phone_lookup(model, store, phone_number):
     query = f"Phone number: {phone_number}"
     query_vector = model.encode(query).astype("float32").tolist()
 
     try:
-        results = pinecone_index.query(
-            vector=query_vector,
-            top_k=1,
-            include_metadata=True
-        )
+        matches = store.query(query_vector, top_k=1)
 
-        if results.matches:
-            match = results.matches[0]
-            meta = match.metadata
+        if matches:
+            meta = matches[0]["metadata"]
             if meta.get("is_phone_entry"):
                 print(f"\nFound candidate:")
                 print(f"Name: {meta['name']}")
@@ -161,13 +415,36 @@ def test_phone_lookup(model, pinecone_index, phone_number):
         print("No candidate found for this phone number.")
         return None
     except Exception as e:
-        print(f"Error querying Pinecone: {e}")
+        print(f"Error querying vector store: {e}")
         return None
 
 if __name__ == "__main__":
-    model, pinecone_index = ingest_candidates(JSON_PATH)
+    parser = argparse.ArgumentParser(description="Embed candidates and upsert them into the vector index.")
+    parser.add_argument("json_path", nargs="?", default=JSON_PATH)
+    parser.add_argument("--workers", type=int, default=UPSERT_WORKERS, help="Concurrent upsert workers (0 = serial)")
+    parser.add_argument("--fake-index", action="store_true", help="Upsert into a local in-memory index instead of the configured store")
+    parser.add_argument("--fake-latency", type=float, default=0.05, help="Simulated upsert latency in seconds for --fake-index")
+    parser.add_argument("--full", action="store_true", help="Re-embed every candidate, even unchanged ones")
+    parser.add_argument("--dedup", choices=("skip", "merge", "off"), default=DEDUP_POLICY, help="How near-duplicate candidates are handled")
+    parser.add_argument("--embed-processes", type=int, default=EMBEDDING_PROCESSES, help="CPU processes for embedding (0 = in-process)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    fake_index = FakeIndex(latency=args.fake_latency) if args.fake_index else None
+    model, store = ingest_candidates(
+        args.json_path,
+        store=PineconeStore(fake_index) if fake_index is not None else None,
+        upsert_workers=args.workers,
+        manifest_path=None if args.fake_index else INGEST_MANIFEST_PATH,
+        full=args.full,
+        embed_processes=args.embed_processes,
+        dedup=args.dedup,
+    )
+    print(f"Ingestion took {time.perf_counter() - start:.2f}s")
+    if fake_index is not None:
+        print(f"Fake index: {fake_index.upsert_calls} upserts, max {fake_index.max_in_flight} in flight")
     
     # # Test the phone lookup functionality
     # test_phone = input("\nEnter a phone number to test lookup (or press Enter to skip): ").strip()
     # if test_phone:
-    #     test_phone_lookup(model, pinecone_index, test_phone)
+    #     test_phone_lookup(model, store, test_phone)
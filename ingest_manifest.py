@@ -0,0 +1,55 @@
+import hashlib
+import json
+import os
+
+from phone_index import normalize_phone
+
+
+def candidate_id_for(candidate_data):
+    # Stable across re-orderings of the export: derived from the candidate's
+    # phone number (falling back to email), not from its position in the file.
+    key = normalize_phone(candidate_data.get("phone", ""))
+    if not key:
+        key = str(candidate_data.get("email", "")).strip().lower()
+    if not key:
+        return None
+    return f"candidate_{hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]}"
+
+
+def content_hash(candidate_data):
+    payload = json.dumps(candidate_data, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class IngestManifest:
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+
+    def load(self):
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+        return self
+
+    def is_unchanged(self, candidate_id, digest):
+        entry = self.entries.get(candidate_id)
+        return entry is not None and entry.get("hash") == digest
+
+    def vector_ids(self, candidate_id):
+        return list(self.entries.get(candidate_id, {}).get("vector_ids", []))
+
+    def record(self, candidate_id, digest, vector_ids):
+        self.entries[candidate_id] = {"hash": digest, "vector_ids": list(vector_ids)}
+
+    def remove(self, candidate_id):
+        return self.entries.pop(candidate_id, None)
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, self.path)
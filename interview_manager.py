@@ -1,17 +1,77 @@
-from prompts import PROMPTS
+from prompts import PROMPTS, OFFLINE_QUESTIONS
 from data_loader import get_candidate_by_phone
-import re
-import nltk
-from nltk.corpus import words
+from resources import (
+    get_gibberish_detector, get_question_cache, get_answer_cache, get_speculation_executor, get_candidate_session_loader,
+)
+from question_cache import is_static_prompt
+from answer_cache import SEMANTIC_PROMPTS
+from config import QUESTION_CACHE_ENABLED, ANSWER_CACHE_ENABLED, SPECULATIVE_GENERATION, RESUME_RETRIEVAL_ENABLED, TRACE_SESSIONS
+from metrics import registry as metrics, record_llm_tokens, SessionTrace
+from resume_context import ResumeContextRetriever
+from response_filter import DisclosureFilter, contains_disclosure
+from resilient_llm import LLMUnavailable
 import random
+import time
 
-nltk.download('words', quiet=True)
-ENGLISH_WORDS = set(words.words())
+# Step marker for literal text that appears in the reply before a generated part
+SAY = "say"
+
+# Asked after a gibberish answer; the candidate's next reply still answers the same question
+CLARIFICATION = "I'm sorry, I didn't quite understand that. Could you please clarify?"
+
+# Interview progress persisted between turns (see session_store.py)
+STATE_FIELDS = (
+    "current_stage", "candidate_info", "interview_ended", "question_count",
+    "awaiting_candidate_questions", "tech_stage_started",
+)
+SET_STATE_FIELDS = ("asked_question_topics", "covered_topics", "covered_tech_topics")
+
+# HR topics in logical order
+HR_TOPICS = (
+    "current_role_question",
+    "technical_skills_question",   # General tech experience here (can stay in HR if you want)
+    "new_opportunity_question",
+    "career_goals_question",
+    "location_preferences_question",
+    "notice_period_question",
+    "salary_expectations_question"
+)
+
+# Separate technical topics (deep dive into tech skills/projects etc)
+TECH_TOPICS = (
+    "tech_project_deep_dive",
+    "tech_function_design",
+    "tech_syntax_and_language",
+    "tech_problem_solving",
+    "tech_education_application"
+)
 
 class ConversationalHRAssistant:
-    def __init__(self, groq_llm=None, use_model="groq"):
+    def __init__(self, groq_llm=None, use_model="groq", question_cache=None, speculate=SPECULATIVE_GENERATION,
+                 resume_retriever=None, session_loader=None, answer_cache=None):
         self.groq_llm = groq_llm
         self.use_model = use_model
+        if question_cache is None and QUESTION_CACHE_ENABLED:
+            question_cache = get_question_cache()
+        self.question_cache = question_cache
+        # Answers to candidate questions, matched by meaning across sessions
+        if answer_cache is None and ANSWER_CACHE_ENABLED:
+            answer_cache = get_answer_cache()
+        self.answer_cache = answer_cache
+        # Topic-specific resume chunks for the technical prompts, cached per session
+        if resume_retriever is None and RESUME_RETRIEVAL_ENABLED:
+            resume_retriever = ResumeContextRetriever()
+        self.resume_retriever = resume_retriever
+        self.session_loader = session_loader
+        # Next question generated in the background while the candidate answers
+        self.speculate = speculate
+        self.speculation = None
+        self.speculation_stats = {"started": 0, "used": 0, "wasted": 0, "cancelled": 0}
+        # Per-turn streaming latency: time to first chunk and to the full reply
+        self.turn_timings = []
+        self.trace = SessionTrace() if TRACE_SESSIONS else None
+        # Called with (seq, entry) for every history line so a store can append it
+        self.transcript_sink = None
         self.interview_history = []
         self.current_stage = "greeting"
         self.candidate_info = None
@@ -21,26 +81,10 @@ class ConversationalHRAssistant:
         self.awaiting_candidate_questions = False
         self.asked_question_topics = set()
 
-        # HR topics in logical order
-        self.hr_topics = [
-            "current_role_question",
-            "technical_skills_question",   # General tech experience here (can stay in HR if you want)
-            "new_opportunity_question",
-            "career_goals_question",
-            "location_preferences_question",
-            "notice_period_question",
-            "salary_expectations_question"
-        ]
+        self.hr_topics = list(HR_TOPICS)
         self.covered_topics = set()
 
-        # Separate technical topics (deep dive into tech skills/projects etc)
-        self.tech_topics = [
-            "tech_project_deep_dive",
-            "tech_function_design",
-            "tech_syntax_and_language",
-            "tech_problem_solving",
-            "tech_education_application"
-        ]
+        self.tech_topics = list(TECH_TOPICS)
         self.covered_tech_topics = set()
 
         self.tech_stage_started = False  # Track if we've moved on to tech questions
@@ -51,8 +95,27 @@ class ConversationalHRAssistant:
         else:
             raise ValueError("LLM not initialized or model not supported.")
 
-    def add_to_history(self, speaker, text):
-        self.interview_history.append({"speaker": speaker, "text": text})
+    def add_to_history(self, speaker, text, topic=None):
+        entry = {"speaker": speaker, "text": text}
+        # Interview questions carry their topic so answers can be graded per topic
+        if topic is not None:
+            entry["topic"] = topic
+        self.interview_history.append(entry)
+        if self.transcript_sink is not None:
+            self.transcript_sink(len(self.interview_history) - 1, entry)
+
+    def snapshot_state(self):
+        state = {field: getattr(self, field) for field in STATE_FIELDS}
+        state.update({field: sorted(getattr(self, field)) for field in SET_STATE_FIELDS})
+        return state
+
+    def restore_state(self, state, history=()):
+        for field in STATE_FIELDS:
+            if field in state:
+                setattr(self, field, state[field])
+        for field in SET_STATE_FIELDS:
+            setattr(self, field, set(state.get(field, ())))
+        self.interview_history = list(history)
 
     def identify_candidate(self, phone_number, candidate_db):
         return get_candidate_by_phone(phone_number, candidate_db)
@@ -72,65 +135,367 @@ class ConversationalHRAssistant:
         self.add_to_history("HR", end_msg)
         return end_msg
 
-    def _generate_question(self, prompt_key, **kwargs):
+    def _candidate_session(self):
+        if not self.candidate_info or not self.candidate_info.get("candidate_id"):
+            return None
+        loader = self.session_loader or get_candidate_session_loader()
+        with metrics.timer("candidate_session_seconds", trace=self.trace):
+            return loader.load(self.candidate_info)
+
+    def prefetch_candidate_session(self):
+        # Fetch the candidate's chunks in the background while the HR topics run
+        if self.candidate_info and self.candidate_info.get("candidate_id"):
+            return get_speculation_executor().submit(self._candidate_session)
+        return None
+
+    def _resume_context(self, topic, resume=""):
+        candidate_id = self.candidate_info.get("candidate_id") if self.candidate_info else None
+        if not candidate_id:
+            return resume
+        session = None
+        try:
+            session = self._candidate_session()
+            context = session.context_for(topic) if session else ""
+            if not context and self.resume_retriever is not None:
+                context = self.resume_retriever.context_for(candidate_id, topic)
+            if context:
+                return context
+        except Exception as e:
+            print(f"Error retrieving resume context: {e}")
+        # Records without a resume_text of their own fall back to the resume the session reassembled
+        return resume or (session.resume_text if session is not None else "")
+
+    def _format_prompt(self, prompt_key, **kwargs):
+        # Resume-based prompts get the retrieved chunks for their topic rather
+        # than the whole resume; this runs on the speculation thread when the
+        # question is generated ahead of time.
+        if "resume" in kwargs:
+            with metrics.timer("resume_context_seconds", trace=self.trace):
+                kwargs["resume"] = self._resume_context(prompt_key, kwargs["resume"])
+        return PROMPTS.get(prompt_key, "").format(**kwargs)
+
+    def _invoke_llm(self, prompt_key, **kwargs):
         llm = self._get_llm()
-        prompt = PROMPTS.get(prompt_key, "")
+        prompt = self._format_prompt(prompt_key, **kwargs)
+        with metrics.timer("llm_call_seconds", trace=self.trace, prompt=prompt_key):
+            message = llm.invoke(prompt)
+        record_llm_tokens(prompt, message)
+        return self._filter_response(message.content.strip())
+
+    @staticmethod
+    def _filter_response(response):
+        # Filter out any AI disclosures
+        if contains_disclosure(response):
+            metrics.inc("disclosure_filter_hits_total")
+            return None
+        return response
+
+    def _fallback(self, prompt_key, error=None, kwargs=None):
+        # Every fallback question is counted; errors are logged rather than swallowed
+        if error is None:
+            metrics.inc("question_fallbacks_total", prompt=prompt_key, reason="filtered")
+            return "Could you tell me more about that?"
+        print(f"Error generating {prompt_key}: {error}")
+        metrics.inc("question_fallbacks_total", prompt=prompt_key, reason=type(error).__name__)
+        if self.trace is not None:
+            self.trace.event("fallback", prompt=prompt_key, error=repr(error))
+        if isinstance(error, LLMUnavailable):
+            # During an outage keep the interview on topic with a cached or fixed question
+            cached = None
+            if self.question_cache is not None:
+                cached = self.question_cache.any(prompt_key, kwargs or {})
+            return cached or OFFLINE_QUESTIONS.get(prompt_key, "Could you elaborate on that?")
+        return "Could you elaborate on that?"
+
+    def _generate_question(self, prompt_key, **kwargs):
+        speculative = self._take_speculation(prompt_key, kwargs)
+        if speculative is not None:
+            return speculative.result()
+        return self._produce_question(prompt_key, **kwargs)
+
+    def _answer_cache_question(self, prompt_key, kwargs):
+        if self.answer_cache is None or prompt_key not in SEMANTIC_PROMPTS:
+            return None
+        return kwargs.get(SEMANTIC_PROMPTS[prompt_key])
+
+    def _lookup_answer(self, question):
+        # A failing embedding model costs a cache miss, not the answer
         try:
-            response = llm.invoke(prompt.format(**kwargs)).content.strip()
-            # Filter out any AI disclosures
-            if "as an AI" in response.lower() or "language model" in response.lower():
-                return "Could you tell me more about that?"
+            vector = self.answer_cache.embed(question)
+        except Exception as e:
+            print(f"Error embedding candidate question: {e}")
+            return None, None
+        return self.answer_cache.get(question, vector), vector
+
+    def _store_answer(self, question, vector, answer):
+        if vector is not None and answer is not None:
+            self.answer_cache.add(question, answer, vector)
+
+    def _produce_question(self, prompt_key, **kwargs):
+        try:
+            question = self._answer_cache_question(prompt_key, kwargs)
+            if question is not None:
+                response, vector = self._lookup_answer(question)
+                if response is None:
+                    response = self._invoke_llm(prompt_key, **kwargs)
+                    self._store_answer(question, vector, response)
+            elif self.question_cache is not None and is_static_prompt(prompt_key):
+                response = self.question_cache.get_or_generate(
+                    prompt_key, kwargs, lambda: self._invoke_llm(prompt_key, **kwargs)
+                )
+            else:
+                response = self._invoke_llm(prompt_key, **kwargs)
+            if response is None:
+                return self._fallback(prompt_key)
             return response
-        except Exception:
-            return "Could you elaborate on that?"
+        except Exception as e:
+            return self._fallback(prompt_key, e, kwargs)
+
+    def _resume_text(self):
+        # Only the record's own text: it is part of the speculation key, so it must not change once
+        # the candidate session loads. _resume_context swaps in the session's resume at format time.
+        return self.candidate_info.get("resume_text", "") if self.candidate_info else ""
+
+    def _predict_next_prompt(self):
+        # Mirrors the topic order in generate_next_question; follow-ups depend on
+        # the candidate's answer and are never predicted.
+        if not self.tech_stage_started:
+            uncovered_hr = [t for t in self.hr_topics if t not in self.covered_topics]
+            if uncovered_hr:
+                return uncovered_hr[0], {}
+            return self.tech_topics[0], {"resume": self._resume_text()}
+        uncovered_tech = [t for t in self.tech_topics if t not in self.covered_tech_topics]
+        if uncovered_tech:
+            return uncovered_tech[0], {"resume": self._resume_text()}
+        return None
+
+    def _start_speculation(self):
+        if not self.speculate or self.speculation is not None:
+            return
+        prediction = self._predict_next_prompt()
+        if prediction is None:
+            return
+        prompt_key, kwargs = prediction
+        self.speculation = (prompt_key, kwargs, self._submit_speculation(prompt_key, kwargs))
+        self.speculation_stats["started"] += 1
+        metrics.inc("speculations_total", outcome="started")
+
+    def _submit_speculation(self, prompt_key, kwargs):
+        return get_speculation_executor().submit(self._produce_question, prompt_key, **kwargs)
+
+    def _take_speculation(self, prompt_key, kwargs):
+        if self.speculation is None:
+            return None
+        spec_key, spec_kwargs, future = self.speculation
+        if spec_key != prompt_key or spec_kwargs != kwargs:
+            return None
+        self.speculation = None
+        self.speculation_stats["used"] += 1
+        metrics.inc("speculations_total", outcome="used")
+        return future
+
+    def _discard_speculation(self):
+        if self.speculation is None:
+            return
+        _, _, future = self.speculation
+        self.speculation = None
+        outcome = "cancelled" if future.cancel() else "wasted"
+        self.speculation_stats[outcome] += 1
+        metrics.inc("speculations_total", outcome=outcome)
+
+    def close(self):
+        # Call once the conversation is over, finished or abandoned, so no speculative question keeps running
+        self._discard_speculation()
+
+    def prewarm_question_cache(self):
+        if self.question_cache is None:
+            return
+
+        def generate(prompt_key):
+            try:
+                return self._invoke_llm(prompt_key)
+            except Exception:
+                return None
+
+        static_keys = [key for key in self.hr_topics + ["general_hr_question"] if is_static_prompt(key)]
+        self.question_cache.prewarm(static_keys, generate)
+
+    # The conversation flow is written once as generators of "steps": each step
+    # yields (prompt_key, kwargs) and receives the generated text back. _drive
+    # runs them with blocking LLM calls; AsyncHRAssistant runs the same steps
+    # with ainvoke, and stream_response streams them chunk by chunk.
+    def _drive(self, steps):
+        try:
+            prompt_key, kwargs = next(steps)
+            while True:
+                if prompt_key == SAY:
+                    reply = kwargs["text"]
+                else:
+                    reply = self._generate_question(prompt_key, **kwargs)
+                prompt_key, kwargs = steps.send(reply)
+        except StopIteration as stop:
+            return stop.value
+
+    def _say(self, text):
+        yield SAY, {"text": text}
+        return text
+
+    def _stream_question(self, prompt_key, kwargs):
+        speculative = self._take_speculation(prompt_key, kwargs)
+        if speculative is not None:
+            text = speculative.result()
+            yield text
+            return text
+        cacheable = self.question_cache is not None and is_static_prompt(prompt_key)
+        if cacheable:
+            cached = self.question_cache.get(prompt_key, kwargs)
+            if cached is not None:
+                yield cached
+                return cached
+        question = self._answer_cache_question(prompt_key, kwargs)
+        if question is not None:
+            cached, question_vector = self._lookup_answer(question)
+            if cached is not None:
+                yield cached
+                return cached
+
+        response_filter = DisclosureFilter()
+        try:
+            llm = self._get_llm()
+            prompt = self._format_prompt(prompt_key, **kwargs)
+            with metrics.timer("llm_call_seconds", trace=self.trace, prompt=prompt_key):
+                for chunk in llm.stream(prompt):
+                    released = response_filter.feed(chunk.content)
+                    if released:
+                        yield released
+                    if response_filter.flagged:
+                        break
+            record_llm_tokens(prompt, response_filter.text)
+            if not response_filter.flagged:
+                released = response_filter.finish()
+                if released:
+                    yield released
+                if cacheable:
+                    self.question_cache.add(prompt_key, kwargs, response_filter.text)
+                if question is not None:
+                    self._store_answer(question, question_vector, response_filter.text)
+                return response_filter.text
+            metrics.inc("disclosure_filter_hits_total")
+            fallback = self._fallback(prompt_key)
+        except Exception as e:
+            fallback = self._fallback(prompt_key, e, kwargs)
+        # Whatever already reached the candidate stays part of the reply
+        emitted = response_filter.emitted_text
+        separator = " " if emitted and not emitted.endswith(" ") else ""
+        yield f"{separator}{fallback}"
+        return f"{emitted}{separator}{fallback}"
+
+    def _track_chunks(self, chunks, turn):
+        try:
+            while True:
+                chunk = next(chunks)
+                if chunk and turn["first_chunk"] is None:
+                    turn["first_chunk"] = time.perf_counter()
+                turn["emitted"].append(chunk)
+                yield chunk
+        except StopIteration as stop:
+            return stop.value
+
+    def _record_turn_timing(self, turn):
+        end = time.perf_counter()
+        first_chunk = turn["first_chunk"] or end
+        self.turn_timings.append({
+            "turn": len(self.turn_timings) + 1,
+            "ttft": first_chunk - turn["start"],
+            "total": end - turn["start"],
+        })
+        metrics.observe("turn_ttft_seconds", first_chunk - turn["start"])
+        metrics.observe("turn_seconds", end - turn["start"], mode="stream")
+        if self.trace is not None:
+            self.trace.span("turn", turn["start"], end - turn["start"], ttft=first_chunk - turn["start"])
+
+    def stream_response(self, candidate_response):
+        # Same flow as process_response, but yields the reply in chunks as the
+        # LLM produces them. The full text is recorded in interview_history.
+        turn = {"start": time.perf_counter(), "first_chunk": None, "emitted": []}
+        steps = self._response_steps(candidate_response)
+        try:
+            prompt_key, kwargs = next(steps)
+            while True:
+                if prompt_key == SAY:
+                    chunks = self._say_chunks(kwargs["text"])
+                else:
+                    chunks = self._stream_question(prompt_key, kwargs)
+                reply = yield from self._track_chunks(chunks, turn)
+                prompt_key, kwargs = steps.send(reply)
+        except StopIteration as stop:
+            final_text = stop.value
+        # Literal text after the last generated part has not been sent yet
+        emitted = "".join(turn["emitted"])
+        if final_text.startswith(emitted) and len(final_text) > len(emitted):
+            yield from self._track_chunks(iter([final_text[len(emitted):]]), turn)
+        self._record_turn_timing(turn)
+
+    def _say_chunks(self, text):
+        yield text
+        return text
 
     def generate_next_question(self, last_response=None, resume=""):
+        return self._drive(self._next_question_steps(last_response, resume))
+
+    def _next_question_steps(self, last_response=None, resume=""):
         # If tech stage hasn't started, cover HR topics first
         if not self.tech_stage_started:
             uncovered_hr = [t for t in self.hr_topics if t not in self.covered_topics]
             if uncovered_hr:
                 topic = uncovered_hr[0]
                 self.covered_topics.add(topic)
-                question = self._generate_question(topic)
+                question = yield topic, {}
             else:
                 # HR topics done, start technical stage
                 self.tech_stage_started = True
                 topic = self.tech_topics[0]
                 self.covered_tech_topics.add(topic)
-                question = self._generate_question(topic, resume=resume)
+                question = yield topic, {"resume": resume}
         else:
             # Technical stage ongoing
             uncovered_tech = [t for t in self.tech_topics if t not in self.covered_tech_topics]
             if uncovered_tech:
                 topic = uncovered_tech[0]
                 self.covered_tech_topics.add(topic)
-                question = self._generate_question(topic, resume=resume)
+                question = yield topic, {"resume": resume}
             else:
                 # All tech topics covered, fallback to follow-ups or general
                 if last_response and self.question_count < self.max_questions:
-                    question = self._generate_question("tech_followup_question", last_response=last_response)
+                    question = yield "tech_followup_question", {"last_response": last_response}
                     topic = "tech_followup"
                 else:
-                    question = self._generate_question("general_hr_question")
+                    question = yield "general_hr_question", {}
                     topic = "general"
         
         self.asked_question_topics.add(topic)
-        self.add_to_history("HR", question)
+        self.add_to_history("HR", question, topic)
+        self._discard_speculation()
+        self._start_speculation()
         return question
 
     def handle_candidate_questions(self, question):
-        response = self._generate_question("handle_candidate_question", question=question)
+        return self._drive(self._candidate_question_steps(question))
+
+    def _candidate_question_steps(self, question):
+        response = yield "handle_candidate_question", {"question": question}
         self.add_to_history("HR", response)
         return response
 
     def is_gibberish(self, response):
-        tokens = re.findall(r'\b\w+\b', response.lower())
-        if not tokens:
-            return True
-        english_word_count = sum(1 for token in tokens if token in ENGLISH_WORDS)
-        return english_word_count / len(tokens) < 0.3
+        with metrics.timer("gibberish_seconds", trace=self.trace):
+            return get_gibberish_detector().is_gibberish(response)
 
     def process_response(self, candidate_response):
+        with metrics.timer("turn_seconds", trace=self.trace, mode="sync"):
+            return self._drive(self._response_steps(candidate_response))
+
+    def _response_steps(self, candidate_response):
         if self.interview_ended:
             return "The interview has already ended."
 
@@ -153,28 +518,30 @@ class ConversationalHRAssistant:
             else:
                 self.current_stage = "interview"
                 intro_msg = "Great! I'd like to ask you a few questions about your background and experience to see if there's a good fit with our current openings."
-                first_question = self.generate_next_question()
+                yield from self._say(f"{intro_msg}\n\n")
+                first_question = yield from self._next_question_steps()
                 return f"{intro_msg}\n\n{first_question}"
 
         # Interview stage
         elif self.current_stage == "interview":
             if self.is_gibberish(candidate_response):
-                msg = "I'm sorry, I didn't quite understand that. Could you please clarify?"
-                self.add_to_history("HR", msg)
-                return msg
+                self.add_to_history("HR", CLARIFICATION)
+                return CLARIFICATION
 
             if "?" in candidate_response:
-                hr_reply = self.handle_candidate_questions(candidate_response)
+                hr_reply = yield from self._candidate_question_steps(candidate_response)
 
                 # Check if we're ready to wrap up
                 total_covered = len(self.covered_topics) + len(self.covered_tech_topics)
                 if total_covered >= (len(self.hr_topics) + len(self.tech_topics)):
                     self.current_stage = "wrap_up"
+                    self._discard_speculation()
                     wrap_msg = "Thank you for sharing all this valuable information! Do you have any other questions for me about the position or our company?"
                     self.add_to_history("HR", wrap_msg)
                     return f"{hr_reply}\n\n{wrap_msg}"
 
-                follow_up = self.generate_next_question()
+                yield from self._say("\n\n")
+                follow_up = yield from self._next_question_steps(resume=self._resume_text())
                 return f"{hr_reply}\n\n{follow_up}"
 
             self.question_count += 1
@@ -182,6 +549,7 @@ class ConversationalHRAssistant:
             total_covered = len(self.covered_topics) + len(self.covered_tech_topics)
             if total_covered >= (len(self.hr_topics) + len(self.tech_topics)) or self.question_count >= self.max_questions:
                 self.current_stage = "wrap_up"
+                self._discard_speculation()
                 wrap_msg = "Thank you for sharing all this valuable information! Do you have any questions for me about the position or our company?"
                 self.add_to_history("HR", wrap_msg)
                 return wrap_msg
@@ -199,13 +567,15 @@ class ConversationalHRAssistant:
                 ]
                 transition = random.choice(transitions) if self.question_count > 1 else ""
 
-            next_q = self.generate_next_question(last_response=candidate_response, resume=self.candidate_info.get("resume_text", "") if self.candidate_info else "")
+            if transition:
+                yield from self._say(transition)
+            next_q = yield from self._next_question_steps(last_response=candidate_response, resume=self._resume_text())
             return f"{transition}{next_q}"
 
         # Wrap-up stage
         elif self.current_stage == "wrap_up":
             if "?" in candidate_response:
-                hr_reply = self.handle_candidate_questions(candidate_response)
+                hr_reply = yield from self._candidate_question_steps(candidate_response)
                 follow_up_msg = "Do you have any other questions for me?"
                 self.add_to_history("HR", follow_up_msg)
                 return f"{hr_reply}\n\n{follow_up_msg}"
@@ -1,4 +1,55 @@
+import asyncio
+import threading
+import weakref
+
+import httpx
 from langchain_groq import ChatGroq
 
-def initialize_groq_llm(api_key):
-    return ChatGroq(api_key=api_key, model_name="llama3-8b-8192")
\ No newline at end of file
+from config import LLM_CALL_TIMEOUT, LLM_MAX_CONNECTIONS
+
+GROQ_MODEL_NAME = "llama3-8b-8192"
+
+
+class GroqLLM:
+    # ChatGroq behind pooled HTTP clients, so calls reuse warm TLS connections
+    # instead of opening new ones. The sync pool is shared by every session; an
+    # httpx.AsyncClient is bound to the event loop it first runs on, so each
+    # loop (asyncio.run in tests, load_test, a restarted SessionManager) gets its own.
+    def __init__(self, api_key, timeout=LLM_CALL_TIMEOUT, max_connections=LLM_MAX_CONNECTIONS):
+        self.api_key = api_key
+        self.timeout = timeout
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self.http_client = httpx.Client(limits=self.limits, timeout=timeout)
+        self.llm = self._chat(http_client=self.http_client)
+        self.async_llms = weakref.WeakKeyDictionary()
+        self.lock = threading.Lock()
+
+    def _chat(self, **clients):
+        # Retries are handled by resilient_llm.ResilientLLM, not the Groq SDK
+        return ChatGroq(api_key=self.api_key, model_name=GROQ_MODEL_NAME, max_retries=0, **clients)
+
+    def _async_llm(self):
+        loop = asyncio.get_running_loop()
+        with self.lock:
+            llm = self.async_llms.get(loop)
+            if llm is None:
+                client = httpx.AsyncClient(limits=self.limits, timeout=self.timeout)
+                llm = self.async_llms[loop] = self._chat(http_async_client=client)
+        return llm
+
+    def invoke(self, prompt):
+        return self.llm.invoke(prompt)
+
+    def stream(self, prompt):
+        return self.llm.stream(prompt)
+
+    async def ainvoke(self, prompt):
+        return await self._async_llm().ainvoke(prompt)
+
+    async def astream(self, prompt):
+        async for chunk in self._async_llm().astream(prompt):
+            yield chunk
+
+
+def initialize_groq_llm(api_key, timeout=LLM_CALL_TIMEOUT):
+    return GroqLLM(api_key, timeout=timeout)
@@ -0,0 +1,246 @@
+import argparse
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import resources
+from candidate_reader import CandidateReader
+from config import LEXICON_PATH, LLM_RESILIENCE_ENABLED
+from embedding_service import EmbeddingService
+from fake_embedding import FakeEmbeddingModel
+from fake_index import FakeIndex
+from fake_llm import FakeLLM
+from gibberish import TECH_TERMS, GibberishDetector, Lexicon, candidate_vocabulary, tokenize
+from metrics import registry as metrics
+from resilient_llm import ResilientLLM
+from vector_store import PineconeStore
+
+# Offline load test: ingests a synthetic candidate dump into a fake index, then
+# runs scripted interviews through ConversationalHRAssistant.process_response
+# against a fake LLM. Results can be saved as a baseline and later runs
+# compared against it, failing on regressions.
+
+# Metrics checked against the baseline, by which direction counts as a regression
+LOWER_IS_BETTER = ("turn_p50_ms", "turn_p95_ms", "turn_p99_ms", "peak_rss_mb")
+HIGHER_IS_BETTER = ("turns_per_sec", "ingest_candidates_per_sec")
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def synthesize_candidates(source_path, count, path, seed=0):
+    # Copies of the dummy candidates with unique names, phones and emails, so
+    # ingest deduplication does not fold them back into the templates
+    rng = random.Random(seed)
+    templates = list(CandidateReader(source_path))
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(count):
+            candidate = dict(templates[i % len(templates)])
+            candidate["name"] = f"{candidate.get('name', 'Candidate')} {chr(65 + i % 26)}{chr(65 + i // 26 % 26)}{chr(65 + i // 676 % 26)}"
+            candidate["phone"] = f"+1-555-{i // 10000:03d}-{i % 10000:04d}"
+            candidate["email"] = f"candidate{i}@example.com"
+            candidate["experience_years"] = rng.randint(0, 20)
+            f.write(json.dumps(candidate) + "\n")
+    return path
+
+
+def persona_script(candidate, rng):
+    skills = ", ".join(candidate.get("skills") or []) or "Python"
+    projects = candidate.get("projects") or []
+    answers = [
+        f"I currently work as a {candidate.get('current_role', 'developer')} at {candidate.get('company', 'my company')}.",
+        f"I mostly use {skills} in my day to day work.",
+        "I am looking for a role with more ownership and a strong engineering team.",
+        "In the long run I want to lead a team and keep growing technically.",
+        f"I am based in {candidate.get('location', 'the city')} and I am open to relocation.",
+        "My notice period is thirty days.",
+        "I am expecting a competitive salary in line with the market.",
+    ]
+    for project in projects:
+        answers.append(f"I built {project.get('title', 'a system')}. {project.get('description', '')}")
+    answers.append(f"I studied {candidate.get('education', 'computer science')}.")
+    answers.append("I profiled the slow queries, added indexes and cached the hot paths.")
+    if rng.random() < 0.2:
+        answers.insert(rng.randrange(len(answers)), "asdf qwer zxcv")
+    if rng.random() < 0.3:
+        answers.insert(rng.randrange(len(answers)), "What does the team work on day to day?")
+    if rng.random() < 0.1:
+        # Declines at the availability check
+        return ["Yes, speaking.", "I am busy, please call later."]
+    return ["Yes, speaking.", "Sure, this is a good time."] + answers * 2 + ["That's all, thank you."]
+
+
+def offline_gibberish_detector(candidates, scripts):
+    # The NLTK word list cannot be downloaded offline, so the lexicon is built
+    # from the words the scripted personas actually use
+    words = set(TECH_TERMS)
+    for candidate in candidates:
+        words |= candidate_vocabulary(candidate)
+    for script in scripts:
+        for answer in script:
+            if answer != "asdf qwer zxcv":
+                words.update(tokenize(answer))
+    return GibberishDetector(Lexicon.build(words))
+
+
+def bench_ingest(json_path, count, store, upsert_workers):
+    from ingest import ingest_candidates
+
+    start = time.perf_counter()
+    ingest_candidates(json_path, store=store, upsert_workers=upsert_workers, manifest_path=None, full=True)
+    elapsed = time.perf_counter() - start
+    return {
+        "ingest_candidates": count,
+        "ingest_seconds": elapsed,
+        "ingest_candidates_per_sec": count / elapsed,
+    }
+
+
+def run_persona(llm, phone, script, max_turns):
+    from data_loader import get_candidate_by_phone
+    from interview_manager import ConversationalHRAssistant
+
+    candidate_info = get_candidate_by_phone(phone)
+    if not candidate_info:
+        raise LookupError(f"Candidate {phone} not found in the phone index")
+    assistant = ConversationalHRAssistant(groq_llm=llm)
+    assistant.candidate_info = candidate_info
+    assistant.prefetch_candidate_session()
+    assistant.initial_greeting(candidate_info["name"])
+    latencies = []
+    for answer in script[:max_turns]:
+        if assistant.interview_ended:
+            break
+        start = time.perf_counter()
+        assistant.process_response(answer)
+        latencies.append(time.perf_counter() - start)
+    assistant.close()
+    return latencies
+
+
+def bench_interviews(fake_llm, personas, concurrency, max_turns):
+    # Same wrapping as resources.get_llm, so retries and hedging are measured too
+    llm = ResilientLLM(fake_llm) if LLM_RESILIENCE_ENABLED else fake_llm
+    latencies = []
+    lock = threading.Lock()
+
+    def run(persona):
+        turn_latencies = run_persona(llm, *persona, max_turns)
+        with lock:
+            latencies.extend(turn_latencies)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for future in [executor.submit(run, persona) for persona in personas]:
+            future.result()
+    elapsed = time.perf_counter() - start
+    turns = np.asarray(latencies) * 1000
+    return {
+        "interviews": len(personas),
+        "turns": len(turns),
+        "turns_per_sec": len(turns) / elapsed,
+        "turn_p50_ms": float(np.percentile(turns, 50)),
+        "turn_p95_ms": float(np.percentile(turns, 95)),
+        "turn_p99_ms": float(np.percentile(turns, 99)),
+        "llm_calls": fake_llm.calls,
+        "llm_failures": fake_llm.failures,
+    }
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for key in LOWER_IS_BETTER + HIGHER_IS_BETTER:
+        if key not in results or not baseline.get(key):
+            continue
+        change = (results[key] - baseline[key]) / baseline[key]
+        if key in HIGHER_IS_BETTER:
+            change = -change
+        if change > tolerance:
+            regressions.append(f"{key}: {baseline[key]:.2f} -> {results[key]:.2f} ({change:+.0%} worse)")
+    return regressions
+
+
+def run(args):
+    source_path = os.path.abspath(args.json_path)
+    workdir = tempfile.mkdtemp(prefix="hr_load_test_")
+    # ingest.py writes its phone index and lexicon into the working directory
+    os.chdir(workdir)
+    candidates_path = synthesize_candidates(source_path, args.candidates, os.path.join(workdir, "candidates.jsonl"), args.seed)
+
+    store = PineconeStore(FakeIndex(latency=args.index_latency, error_rate=args.index_error_rate, seed=args.seed))
+    resources.provide("vector_store", store)
+    if not args.real_embeddings:
+        resources.provide("embedding_model", EmbeddingService(FakeEmbeddingModel()))
+
+    results = {"config": vars(args)}
+    results.update(bench_ingest(candidates_path, args.candidates, store, args.upsert_workers))
+    results["ingest_peak_rss_mb"] = peak_rss_mb()
+
+    rng = random.Random(args.seed)
+    candidates = list(CandidateReader(candidates_path))[:args.interviews]
+    personas = [(candidate["phone"], persona_script(candidate, rng)) for candidate in candidates]
+    if not os.path.exists(LEXICON_PATH):
+        resources.provide("gibberish_detector", offline_gibberish_detector(candidates, [script for _, script in personas]))
+
+    llm = FakeLLM(latency=args.llm_latency, jitter=args.llm_jitter, error_rate=args.llm_error_rate, seed=args.seed)
+    metrics.reset()
+    results.update(bench_interviews(llm, personas, args.concurrency, args.max_turns))
+    results["peak_rss_mb"] = peak_rss_mb()
+    results["answer_cache"] = resources.get_answer_cache().stats()
+    results["stages"] = [
+        {key: h[key] for key in ("name", "labels", "count", "p50", "p95", "p99")}
+        for h in metrics.to_json()["histograms"] if "prompt" not in h["labels"]
+    ]
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline load test of ingest and interview turns against fakes.")
+    parser.add_argument("json_path", nargs="?", default="dummy-resume.json")
+    parser.add_argument("--candidates", type=int, default=2000, help="Synthetic candidates to ingest")
+    parser.add_argument("--interviews", type=int, default=200, help="Scripted interviews to run")
+    parser.add_argument("--concurrency", type=int, default=16, help="Interviews run at once")
+    parser.add_argument("--max-turns", type=int, default=40)
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Fake LLM latency in seconds")
+    parser.add_argument("--llm-jitter", type=float, default=0.0)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--index-latency", type=float, default=0.0, help="Fake index latency in seconds")
+    parser.add_argument("--index-error-rate", type=float, default=0.0)
+    parser.add_argument("--upsert-workers", type=int, default=4)
+    parser.add_argument("--real-embeddings", action="store_true", help="Use the configured embedding model instead of the fake")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the results to this JSON file (e.g. a new baseline)")
+    parser.add_argument("--baseline", help="Compare against this results file and exit 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression against the baseline")
+    args = parser.parse_args()
+    output = os.path.abspath(args.output) if args.output else None
+    baseline_path = os.path.abspath(args.baseline) if args.baseline else None
+
+    results = run(args)
+    print(f"Ingest: {results['ingest_candidates_per_sec']:.1f} candidates/s ({results['ingest_seconds']:.2f}s)")
+    print(f"Interviews: {results['turns']} turns, {results['turns_per_sec']:.1f} turns/s, "
+          f"p50 {results['turn_p50_ms']:.2f}ms p95 {results['turn_p95_ms']:.2f}ms p99 {results['turn_p99_ms']:.2f}ms")
+    print(f"Peak RSS: {results['peak_rss_mb']:.0f} MB")
+    print(f"Answer cache: {results['answer_cache']['hit_rate']:.0%} hit rate over "
+          f"{results['answer_cache']['hits'] + results['answer_cache']['misses']} candidate questions")
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {output}")
+    if baseline_path:
+        with open(baseline_path, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        sys.exit(1 if regressions else 0)
@@ -1,16 +1,41 @@
 import time
-from config import GROQ_API_KEY
+_import_start = time.perf_counter()
+
+import argparse
+from config import GROQ_API_KEY, QUESTION_CACHE_PREWARM, TRANSCRIPT_ARCHIVE_PATH
 from data_loader import get_candidate_by_phone
-from llm_interface import initialize_groq_llm
 from interview_manager import ConversationalHRAssistant
+from resources import get_llm, startup_timings, startup_report, warm_up
+from metrics import registry as metrics, SessionTrace
+
+startup_timings["imports"] = time.perf_counter() - _import_start
 
 def main():
+    parser = argparse.ArgumentParser(description="Run a screening interview in the terminal.")
+    parser.add_argument("--warm-up", action="store_true", help="Load models, indexes and clients before prompting")
+    parser.add_argument("--startup-report", action="store_true", help="Print startup time per component")
+    parser.add_argument("--stream", action="store_true", help="Stream HR replies as they are generated")
+    parser.add_argument("--metrics-out", help="Write latency histograms and counters here (.json, otherwise Prometheus text)")
+    parser.add_argument("--trace-out", help="Write this session's per-stage trace as JSON")
+    args = parser.parse_args()
+
     if not GROQ_API_KEY:
         print("GROQ_API_KEY environment variable not set.")
         return
 
-    groq_llm = initialize_groq_llm(GROQ_API_KEY)
+    if args.warm_up:
+        warm_up()
+
+    groq_llm = get_llm()
     hr_assistant = ConversationalHRAssistant(groq_llm=groq_llm)
+    if args.trace_out and hr_assistant.trace is None:
+        hr_assistant.trace = SessionTrace()
+    if QUESTION_CACHE_PREWARM:
+        start = time.perf_counter()
+        hr_assistant.prewarm_question_cache()
+        startup_timings["question_cache"] = time.perf_counter() - start
+    if args.startup_report:
+        print(startup_report())
 
     phone_number = input("Enter phone number of the candidate: ").strip()
     candidate_info = get_candidate_by_phone(phone_number)
@@ -19,6 +44,7 @@ def main():
         return
 
     hr_assistant.candidate_info = candidate_info
+    hr_assistant.prefetch_candidate_session()
     print("\n--- INTERVIEW STARTING ---\n")
     
     greeting = hr_assistant.initial_greeting(candidate_info["name"])
@@ -30,15 +56,39 @@ def main():
         if candidate_response.lower() in ["exit", "quit", "end"]:
             print("Interview simulation ended by user.")
             break
-        hr_response = hr_assistant.process_response(candidate_response)
-        print(f"HR: {hr_response}")
+        if args.stream:
+            print("HR: ", end="", flush=True)
+            for chunk in hr_assistant.stream_response(candidate_response):
+                print(chunk, end="", flush=True)
+            print()
+        else:
+            hr_response = hr_assistant.process_response(candidate_response)
+            print(f"HR: {hr_response}")
         time.sleep(0.5)
+    hr_assistant.close()
 
     print("\n--- INTERVIEW COMPLETED ---\n")
+    # Finished interviews are graded later in bulk by evaluation.py; abandoned ones are not archived
+    if hr_assistant.interview_ended:
+        from evaluation import archive_transcript
+
+        archive_transcript(TRANSCRIPT_ARCHIVE_PATH, candidate_info, hr_assistant.interview_history)
     if input("See full interview transcript? (y/n): ").strip().lower() == 'y':
         print("\n=== INTERVIEW TRANSCRIPT ===\n")
         for entry in hr_assistant.interview_history:
             print(f"{entry['speaker']}: {entry['text']}\n")
 
+    if args.metrics_out:
+        metrics.write(args.metrics_out)
+        print(f"Metrics written to {args.metrics_out}")
+    if args.trace_out and hr_assistant.trace is not None:
+        hr_assistant.trace.write(args.trace_out)
+        print(f"Session trace written to {args.trace_out}")
+
+    if args.stream and hr_assistant.turn_timings:
+        print("\n=== TIME TO FIRST TOKEN ===\n")
+        for timing in hr_assistant.turn_timings:
+            print(f"Turn {timing['turn']}: first chunk {timing['ttft'] * 1000:.0f} ms, full reply {timing['total'] * 1000:.0f} ms")
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
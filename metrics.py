@@ -0,0 +1,182 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+
+from config import METRICS_ENABLED
+
+# Latency buckets in seconds, upper bounds as in Prometheus histograms
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def percentile(self, q):
+        # Linear interpolation inside the bucket holding the q-th observation
+        if not self.count:
+            return 0.0
+        rank = q / 100 * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.max
+
+
+class MetricsRegistry:
+    # Process-wide latency histograms and counters, keyed by name and labels.
+    # Exported as Prometheus text or JSON; see main.py --metrics-out.
+    def __init__(self, enabled=METRICS_ENABLED):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.counters = {}
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def observe(self, name, value, **labels):
+        if not self.enabled:
+            return
+        key = self._key(name, labels)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def inc(self, name, amount=1, **labels):
+        if not self.enabled:
+            return
+        key = self._key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    @contextmanager
+    def timer(self, name, trace=None, **labels):
+        # Observes the block's duration even when it raises; with a trace, the
+        # span is also appended to that session's trace
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.observe(name, elapsed, **labels)
+            if trace is not None:
+                trace.span(name, start, elapsed, **labels)
+
+    def reset(self):
+        with self.lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+    def to_json(self):
+        with self.lock:
+            histograms = [
+                {
+                    "name": name, "labels": dict(labels), "count": h.count, "sum": h.sum, "max": h.max,
+                    "p50": h.percentile(50), "p95": h.percentile(95), "p99": h.percentile(99),
+                }
+                for (name, labels), h in sorted(self.histograms.items())
+            ]
+            counters = [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(self.counters.items())
+            ]
+        return {"histograms": histograms, "counters": counters}
+
+    def to_prometheus(self):
+        def label_text(labels, extra=()):
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ""
+            return "{" + ",".join(f'{key}="{value}"' for key, value in pairs) + "}"
+
+        lines = []
+        with self.lock:
+            for name in sorted({name for name, _ in self.counters}):
+                lines.append(f"# TYPE {name} counter")
+                for (metric, labels), value in sorted(self.counters.items()):
+                    if metric == name:
+                        lines.append(f"{name}{label_text(labels)} {value}")
+            for name in sorted({name for name, _ in self.histograms}):
+                lines.append(f"# TYPE {name} histogram")
+                for (metric, labels), h in sorted(self.histograms.items()):
+                    if metric != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(list(h.buckets) + ["+Inf"], h.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{label_text(labels, [('le', bound)])} {cumulative}")
+                    lines.append(f"{name}_sum{label_text(labels)} {h.sum}")
+                    lines.append(f"{name}_count{label_text(labels)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            if path.endswith(".json"):
+                json.dump(self.to_json(), f, indent=2)
+            else:
+                f.write(self.to_prometheus())
+
+
+class SessionTrace:
+    # Ordered spans for one interview, kept only when tracing is switched on,
+    # so a slow turn seen in the p99 can be broken down stage by stage.
+    def __init__(self, session_id=None):
+        self.session_id = session_id
+        self.origin = time.perf_counter()
+        self.spans = []
+        self.events = []
+        self.lock = threading.Lock()
+
+    def span(self, name, start, duration, **labels):
+        with self.lock:
+            self.spans.append({"name": name, "start": start - self.origin, "duration": duration, **labels})
+
+    def event(self, name, **fields):
+        with self.lock:
+            self.events.append({"name": name, "at": time.perf_counter() - self.origin, **fields})
+
+    def to_json(self):
+        with self.lock:
+            return {"session_id": self.session_id, "spans": list(self.spans), "events": list(self.events)}
+
+    def write(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_json(), f, indent=2)
+
+
+def estimate_tokens(text):
+    return len(str(text).split()) * 4 // 3
+
+
+def record_llm_tokens(prompt, message, **labels):
+    # Real usage from the provider when the response carries it
+    usage = getattr(message, "usage_metadata", None) or {}
+    registry.inc("llm_prompt_tokens_total", usage.get("input_tokens") or estimate_tokens(prompt), **labels)
+    registry.inc("llm_completion_tokens_total", usage.get("output_tokens") or estimate_tokens(getattr(message, "content", message)), **labels)
+
+
+registry = MetricsRegistry()
@@ -0,0 +1,97 @@
+import json
+import os
+import re
+import sqlite3
+
+DEFAULT_COUNTRY_CODE = "1"
+
+# Trailing extensions as produced by HRIS exports: "x073", "ext. 12", "extension 9", "#45"
+EXTENSION_PATTERN = re.compile(r"\s*(?:x|ext\.?|extension|#)\s*\d+\s*$", re.IGNORECASE)
+
+
+def normalize_phone(phone_number, default_country_code=DEFAULT_COUNTRY_CODE):
+    if not phone_number:
+        return ""
+    raw = EXTENSION_PATTERN.sub("", str(phone_number).strip())
+    digits = re.sub(r"\D", "", raw)
+    if not digits:
+        return ""
+
+    if raw.startswith("+"):
+        return f"+{digits}"
+    if digits.startswith("00"):
+        # International dialling prefix, e.g. 001-418-099-8583
+        return f"+{digits[2:]}"
+    if len(digits) == 10:
+        return f"+{default_country_code}{digits}"
+    if len(digits) == 11 and digits.startswith(default_country_code):
+        return f"+{digits}"
+    return f"+{digits}"
+
+
+class PhoneIndex:
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+
+    def _connect(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS phones ("
+            "phone_key TEXT PRIMARY KEY, "
+            "candidate_id TEXT NOT NULL, "
+            "metadata TEXT NOT NULL)"
+        )
+        return conn
+
+    def load(self):
+        if not os.path.exists(self.path):
+            self.entries = {}
+            return self
+        conn = self._connect()
+        try:
+            rows = conn.execute("SELECT phone_key, metadata FROM phones").fetchall()
+        finally:
+            conn.close()
+        self.entries = {key: json.loads(meta) for key, meta in rows}
+        return self
+
+    def add(self, phone_number, metadata):
+        key = normalize_phone(phone_number)
+        if not key:
+            return None
+        self.entries[key] = dict(metadata)
+        return key
+
+    def remove_candidate(self, candidate_id):
+        stale = [key for key, meta in self.entries.items() if meta.get("candidate_id") == candidate_id]
+        for key in stale:
+            del self.entries[key]
+        return len(stale)
+
+    def get(self, phone_number):
+        key = normalize_phone(phone_number)
+        if not key:
+            return None
+        return self.entries.get(key)
+
+    def save(self):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM phones")
+                conn.executemany(
+                    "INSERT INTO phones (phone_key, candidate_id, metadata) VALUES (?, ?, ?)",
+                    [(key, meta.get("candidate_id", ""), json.dumps(meta)) for key, meta in self.entries.items()],
+                )
+        finally:
+            conn.close()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, phone_number):
+        return normalize_phone(phone_number) in self.entries
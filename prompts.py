@@ -124,3 +124,36 @@ Ask ONE targeted follow-up question about their approach to error handling or mi
 Ask ONE question about how the candidate identified and optimized a performance bottleneck—such as in a database query, data processing job, or front-end rendering. Return ONLY the single question.""",
 
 }
+
+# Fixed questions used when the LLM is unavailable (circuit open or retries exhausted)
+OFFLINE_QUESTIONS = {
+    "initial_question": "Could you start by telling me a little about your background?",
+    "followup_question": "Could you tell me a bit more about that?",
+    "handle_candidate_question": "That's a great question. I'll make sure the hiring team follows up with the details.",
+    "current_role_question": "Could you walk me through your current role and your main responsibilities?",
+    "new_opportunity_question": "What are you looking for in your next role?",
+    "technical_skills_question": "Which technical skills have you used most in your recent projects?",
+    "salary_expectations_question": "What are your salary expectations for this position?",
+    "location_preferences_question": "Do you have any preferences regarding work location or remote work?",
+    "notice_period_question": "What is your notice period with your current employer?",
+    "career_goals_question": "Where would you like your career to be in the next few years?",
+    "general_hr_question": "What kind of team environment helps you do your best work?",
+    "tech_project_deep_dive": "Could you pick one of your projects and walk me through its architecture?",
+    "tech_function_design": "How would you design a function to process a large batch of records, including error handling?",
+    "tech_syntax_and_language": "Which language features do you rely on most in your main programming language?",
+    "tech_problem_solving": "Can you describe a difficult technical problem you solved recently and how you approached it?",
+    "tech_education_application": "How have you applied what you learned in your studies to your work?",
+    "tech_followup_question": "What would you do differently if you built that again?",
+    "tech_project_impact": "What measurable impact did your most recent project have?",
+    "tech_platform_choice": "How did you choose the platform or technology stack for one of your projects?",
+    "tech_scalability_decision": "Tell me about a design decision you made to help a system scale.",
+    "tech_error_handling_followup": "How did you handle errors and failures in that system?",
+    "tech_performance_tuning": "Can you describe a performance bottleneck you found and how you fixed it?",
+}
+
+# Post-interview grading (evaluation.py); several answers are graded per request
+EVALUATION_PROMPT = """You are a senior recruiter reviewing a phone screening.
+Grade each numbered answer from 1 (poor) to 5 (excellent) for how relevant, specific and clear it is as a reply to its question.
+Reply with ONLY a JSON array with one object per answer, like [{{"id": 1, "score": 4}}, {{"id": 2, "score": 2}}].
+
+{pairs}"""
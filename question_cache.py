@@ -0,0 +1,102 @@
+import random
+import string
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from prompts import PROMPTS
+from metrics import registry as metrics
+
+
+def is_static_prompt(prompt_key):
+    # A prompt with no format fields yields the same kind of question for every candidate
+    template = PROMPTS.get(prompt_key, "")
+    return bool(template) and all(field is None for _, field, _, _ in string.Formatter().parse(template))
+
+
+class QuestionCache:
+    # Keeps up to `variants` generated questions per (prompt key, arguments) so
+    # repeated interviews reuse them instead of paying an LLM round trip, while
+    # still rotating wording between conversations.
+    def __init__(self, variants=3, ttl=3600, max_entries=256):
+        self.variants = variants
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(prompt_key, kwargs):
+        return (prompt_key, tuple(sorted((name, str(value)) for name, value in kwargs.items())))
+
+    def _live_pool(self, key, now):
+        pool = self.entries.get(key)
+        if pool is None:
+            return None
+        if self.ttl:
+            pool[:] = [(text, created) for text, created in pool if now - created < self.ttl]
+        self.entries.move_to_end(key)
+        return pool
+
+    def get(self, prompt_key, kwargs):
+        with self.lock:
+            pool = self._live_pool(self.make_key(prompt_key, kwargs), time.monotonic())
+            if pool and len(pool) >= self.variants:
+                self.hits += 1
+                metrics.inc("question_cache_total", result="hit")
+                return random.choice(pool)[0]
+            self.misses += 1
+            metrics.inc("question_cache_total", result="miss")
+            return None
+
+    def any(self, prompt_key, kwargs):
+        # Any stored variant, even from a partly filled or expired pool
+        with self.lock:
+            pool = self.entries.get(self.make_key(prompt_key, kwargs))
+            return random.choice(pool)[0] if pool else None
+
+    def add(self, prompt_key, kwargs, text):
+        key = self.make_key(prompt_key, kwargs)
+        now = time.monotonic()
+        with self.lock:
+            pool = self._live_pool(key, now)
+            if pool is None:
+                pool = self.entries[key] = []
+            if len(pool) < self.variants:
+                pool.append((text, now))
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def get_or_generate(self, prompt_key, kwargs, generate):
+        cached = self.get(prompt_key, kwargs)
+        if cached is not None:
+            return cached
+        text = generate()
+        # generate() returns None for responses that must not be reused
+        if text is not None:
+            self.add(prompt_key, kwargs, text)
+        return text
+
+    async def aget_or_generate(self, prompt_key, kwargs, agenerate):
+        cached = self.get(prompt_key, kwargs)
+        if cached is not None:
+            return cached
+        text = await agenerate()
+        if text is not None:
+            self.add(prompt_key, kwargs, text)
+        return text
+
+    def prewarm(self, prompt_keys, generate, workers=4):
+        # generate(prompt_key) -> text or None; fills every variant slot up front
+        jobs = [key for key in prompt_keys for _ in range(self.variants)]
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for prompt_key, text in zip(jobs, executor.map(generate, jobs)):
+                if text is not None:
+                    self.add(prompt_key, {}, text)
+
+    def stats(self):
+        with self.lock:
+            return {"entries": len(self.entries), "hits": self.hits, "misses": self.misses}
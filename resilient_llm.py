@@ -0,0 +1,280 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError as FutureTimeout, wait
+
+from tenacity import (
+    AsyncRetrying, Retrying, retry_if_exception, stop_after_attempt, stop_after_delay, wait_random_exponential,
+)
+
+from config import (
+    LLM_DEADLINE, LLM_ATTEMPT_TIMEOUT, LLM_MAX_ATTEMPTS, LLM_HEDGE_AFTER,
+    LLM_BREAKER_FAILURES, LLM_BREAKER_RESET, LLM_MAX_CONCURRENCY,
+)
+from metrics import registry as metrics
+
+
+class LLMUnavailable(Exception):
+    # The provider could not answer in time; callers fall back to canned questions
+    pass
+
+
+class CircuitOpenError(LLMUnavailable):
+    pass
+
+
+class LLMDeadlineExceeded(LLMUnavailable, TimeoutError):
+    pass
+
+
+class CircuitBreaker:
+    # Opens after `failure_threshold` consecutive failed attempts and rejects
+    # calls for `reset_timeout` seconds; then a single probe call decides
+    # whether to close again.
+    def __init__(self, failure_threshold=LLM_BREAKER_FAILURES, reset_timeout=LLM_BREAKER_RESET):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.lock = threading.Lock()
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+
+    def before_call(self):
+        with self.lock:
+            if self.state == "closed":
+                return
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"
+            if self.state == "half_open" and not self.probing:
+                self.probing = True
+                return
+        metrics.inc("llm_circuit_rejections_total")
+        raise CircuitOpenError("LLM circuit breaker is open")
+
+    def record_success(self):
+        with self.lock:
+            if self.state != "closed":
+                metrics.inc("llm_circuit_transitions_total", to="closed")
+            self.state = "closed"
+            self.failures = 0
+            self.probing = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.probing = False
+            if self.state == "half_open" or (self.state == "closed" and self.failures >= self.failure_threshold):
+                self.state = "open"
+                self.opened_at = time.monotonic()
+                metrics.inc("llm_circuit_transitions_total", to="open")
+
+
+class ResilientLLM:
+    # Wraps a chat model (ChatGroq, FakeLLM) with the same invoke/ainvoke/
+    # stream/astream surface. Each call has an overall deadline; each attempt
+    # has its own timeout and is retried with jittered backoff. A request still
+    # pending after `hedge_after` seconds gets one duplicate, and whichever
+    # answers first wins. A duplicate is only sent while fewer than
+    # `max_concurrency` requests are outstanding. Streams are retried only
+    # until their first chunk.
+    def __init__(self, llm, deadline=LLM_DEADLINE, attempt_timeout=LLM_ATTEMPT_TIMEOUT,
+                 max_attempts=LLM_MAX_ATTEMPTS, hedge_after=LLM_HEDGE_AFTER, breaker=None,
+                 max_backoff=2.0, max_concurrency=LLM_MAX_CONCURRENCY):
+        self.llm = llm
+        self.deadline = deadline
+        self.attempt_timeout = attempt_timeout
+        self.max_attempts = max_attempts
+        self.hedge_after = hedge_after
+        self.breaker = breaker or CircuitBreaker()
+        self.max_backoff = max_backoff
+        self.max_concurrency = max_concurrency
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="llm")
+        # Requests sent to the provider and not yet finished, hedges included
+        self.in_flight = 0
+        self.in_flight_lock = threading.Lock()
+
+    def _track(self, request, hedge=False):
+        # Registers a future or task; a hedge is refused (None) when no permit is free
+        with self.in_flight_lock:
+            if hedge and self.in_flight >= self.max_concurrency:
+                metrics.inc("llm_hedges_skipped_total")
+                return None
+            self.in_flight += 1
+        request = request()
+        request.add_done_callback(self._untrack)
+        return request
+
+    def _untrack(self, request):
+        with self.in_flight_lock:
+            self.in_flight -= 1
+
+    def _retry_kwargs(self):
+        return {
+            "stop": stop_after_attempt(self.max_attempts) | stop_after_delay(self.deadline),
+            "wait": wait_random_exponential(multiplier=0.1, max=self.max_backoff),
+            "retry": retry_if_exception(lambda e: not isinstance(e, CircuitOpenError)),
+            "before_sleep": lambda state: metrics.inc("llm_retries_total"),
+            "reraise": True,
+        }
+
+    def _attempt_deadline(self, call_deadline):
+        remaining = call_deadline - time.monotonic()
+        if remaining <= 0:
+            raise LLMDeadlineExceeded(f"LLM call exceeded its {self.deadline}s deadline")
+        return time.monotonic() + min(self.attempt_timeout, remaining)
+
+    def _guarded(self, attempt):
+        # Every attempt passes the breaker and reports back to it
+        self.breaker.before_call()
+        try:
+            result = attempt()
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return result
+
+    def _call(self, attempt):
+        try:
+            for retry in Retrying(**self._retry_kwargs()):
+                with retry:
+                    return self._guarded(attempt)
+        except LLMUnavailable:
+            raise
+        except Exception as e:
+            raise LLMUnavailable(f"LLM call failed after retries: {e}") from e
+
+    async def _acall(self, attempt):
+        try:
+            async for retry in AsyncRetrying(**self._retry_kwargs()):
+                with retry:
+                    self.breaker.before_call()
+                    try:
+                        result = await attempt()
+                    except Exception:
+                        self.breaker.record_failure()
+                        raise
+                    self.breaker.record_success()
+                    return result
+        except LLMUnavailable:
+            raise
+        except Exception as e:
+            raise LLMUnavailable(f"LLM call failed after retries: {e}") from e
+
+    def _hedged_invoke(self, prompt, deadline):
+        futures = {self._track(lambda: self.executor.submit(self.llm.invoke, prompt))}
+        hedged = not self.hedge_after
+        error = None
+        while futures:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, futures = wait(futures, timeout=remaining if hedged else min(self.hedge_after, remaining),
+                                 return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for other in futures:
+                        other.cancel()
+                    return future.result()
+                error = future.exception()
+            if not done and not hedged:
+                hedged = True
+                hedge = self._track(lambda: self.executor.submit(self.llm.invoke, prompt), hedge=True)
+                if hedge is not None:
+                    metrics.inc("llm_hedges_total")
+                    futures.add(hedge)
+        if error is not None and not futures:
+            raise error
+        metrics.inc("llm_timeouts_total")
+        raise LLMDeadlineExceeded(f"LLM attempt timed out after {self.attempt_timeout}s")
+
+    async def _ahedged_invoke(self, prompt, deadline):
+        tasks = {self._track(lambda: asyncio.ensure_future(self.llm.ainvoke(prompt)))}
+        hedged = not self.hedge_after
+        error = None
+        try:
+            while tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                done, tasks = await asyncio.wait(tasks, timeout=remaining if hedged else min(self.hedge_after, remaining),
+                                                 return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+                if not done and not hedged:
+                    hedged = True
+                    hedge = self._track(lambda: asyncio.ensure_future(self.llm.ainvoke(prompt)), hedge=True)
+                    if hedge is not None:
+                        metrics.inc("llm_hedges_total")
+                        tasks.add(hedge)
+        finally:
+            for task in tasks:
+                task.cancel()
+        if error is not None and not tasks:
+            raise error
+        metrics.inc("llm_timeouts_total")
+        raise LLMDeadlineExceeded(f"LLM attempt timed out after {self.attempt_timeout}s")
+
+    def invoke(self, prompt):
+        call_deadline = time.monotonic() + self.deadline
+        return self._call(lambda: self._hedged_invoke(prompt, self._attempt_deadline(call_deadline)))
+
+    async def ainvoke(self, prompt):
+        call_deadline = time.monotonic() + self.deadline
+        return await self._acall(lambda: self._ahedged_invoke(prompt, self._attempt_deadline(call_deadline)))
+
+    def stream(self, prompt):
+        call_deadline = time.monotonic() + self.deadline
+
+        def open_stream():
+            deadline = self._attempt_deadline(call_deadline)
+            chunks = iter(self.llm.stream(prompt))
+            # The first chunk is read on a worker so the attempt timeout can be enforced
+            first = self.executor.submit(next, chunks, None)
+            try:
+                return first.result(timeout=max(deadline - time.monotonic(), 0)), chunks
+            except FutureTimeout:
+                # A running generator cannot be closed from here; close it once the read returns
+                first.add_done_callback(lambda _: chunks.close() if hasattr(chunks, "close") else None)
+                metrics.inc("llm_timeouts_total")
+                raise LLMDeadlineExceeded(f"LLM stream sent no chunk within {self.attempt_timeout}s")
+
+        first, chunks = self._call(open_stream)
+        if first is None:
+            return
+        yield first
+        try:
+            yield from chunks
+        except Exception:
+            self.breaker.record_failure()
+            raise
+
+    async def astream(self, prompt):
+        call_deadline = time.monotonic() + self.deadline
+
+        async def open_stream():
+            chunks = self.llm.astream(prompt)
+            timeout = self._attempt_deadline(call_deadline) - time.monotonic()
+            try:
+                return await asyncio.wait_for(chunks.__anext__(), timeout), chunks
+            except StopAsyncIteration:
+                return None, chunks
+            except Exception:
+                await chunks.aclose()
+                raise
+
+        first, chunks = await self._acall(open_stream)
+        if first is None:
+            return
+        yield first
+        try:
+            async for chunk in chunks:
+                yield chunk
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        finally:
+            await chunks.aclose()
@@ -0,0 +1,189 @@
+import os
+import threading
+import time
+
+from config import (
+    PHONE_INDEX_PATH, LEXICON_PATH, CANDIDATE_CATALOG_PATH, LLM_RESILIENCE_ENABLED, VECTOR_STORE, PINECONE_API_KEY, GROQ_API_KEY,
+    QUESTION_CACHE_VARIANTS, QUESTION_CACHE_TTL, QUESTION_CACHE_MAX_ENTRIES, SPECULATION_WORKERS,
+    ANSWER_CACHE_FAQ_PATH, LLM_ATTEMPT_TIMEOUT, LLM_CALL_TIMEOUT,
+)
+
+# Process-wide singletons, created on first use rather than at import time
+_resources = {}
+_lock = threading.Lock()
+# One lock per resource, so a factory can ask for other resources while it builds
+_locks = {}
+startup_timings = {}
+
+
+def _get(name, factory):
+    resource = _resources.get(name)
+    if resource is not None:
+        return resource
+    with _lock:
+        lock = _locks.setdefault(name, threading.Lock())
+    with lock:
+        resource = _resources.get(name)
+        if resource is None:
+            start = time.perf_counter()
+            resource = factory()
+            startup_timings[name] = time.perf_counter() - start
+            with _lock:
+                _resources[name] = resource
+    return resource
+
+
+def provide(name, resource):
+    # Installs a ready-made resource (e.g. a fake in load_test.py) before first use
+    with _lock:
+        _resources[name] = resource
+
+
+def _load_embedding_model():
+    from embedding_service import EmbeddingService
+
+    return EmbeddingService()
+
+
+def _load_vector_store():
+    from vector_store import create_vector_store
+
+    if VECTOR_STORE == "pinecone" and not PINECONE_API_KEY:
+        raise ValueError("PINECONE_API_KEY not found in environment.")
+    # The local FAISS index is memory-mapped read-only for serving
+    return create_vector_store(read_only=True)
+
+
+def _load_phone_index():
+    from phone_index import PhoneIndex
+
+    return PhoneIndex(PHONE_INDEX_PATH).load()
+
+
+def _load_gibberish_detector():
+    from gibberish import GibberishDetector, Lexicon, build_lexicon
+
+    # The lexicon written by ingest.py is memory-mapped and shared by every
+    # worker; without one, the NLTK word list is packed in memory instead
+    if os.path.exists(LEXICON_PATH):
+        return GibberishDetector(Lexicon.load(LEXICON_PATH))
+    return GibberishDetector(build_lexicon(path=None))
+
+
+def _load_llm():
+    from llm_interface import initialize_groq_llm
+
+    if not GROQ_API_KEY:
+        raise ValueError("GROQ_API_KEY environment variable not set.")
+    # With ResilientLLM an abandoned attempt must not hold a connection past its own timeout
+    llm = initialize_groq_llm(GROQ_API_KEY, timeout=LLM_ATTEMPT_TIMEOUT if LLM_RESILIENCE_ENABLED else LLM_CALL_TIMEOUT)
+    if LLM_RESILIENCE_ENABLED:
+        from resilient_llm import ResilientLLM
+
+        llm = ResilientLLM(llm)
+    return llm
+
+
+def _load_question_cache():
+    from question_cache import QuestionCache
+
+    return QuestionCache(
+        variants=QUESTION_CACHE_VARIANTS, ttl=QUESTION_CACHE_TTL, max_entries=QUESTION_CACHE_MAX_ENTRIES
+    )
+
+
+def _load_answer_cache():
+    from answer_cache import AnswerCache, load_faq
+
+    # AnswerCache resolves the embedding model itself when it first embeds a question
+    return AnswerCache(None, faq=load_faq(ANSWER_CACHE_FAQ_PATH))
+
+
+def _load_speculation_executor():
+    from concurrent.futures import ThreadPoolExecutor
+
+    return ThreadPoolExecutor(max_workers=SPECULATION_WORKERS, thread_name_prefix="speculation")
+
+
+def _load_candidate_session_loader():
+    from candidate_session import CandidateSessionLoader
+
+    return CandidateSessionLoader()
+
+
+def _load_candidate_ranker():
+    from candidate_ranker import CandidateRanker
+
+    if not os.path.exists(CANDIDATE_CATALOG_PATH):
+        raise FileNotFoundError(f"{CANDIDATE_CATALOG_PATH} not found; run ingest.py first.")
+    return CandidateRanker.load(CANDIDATE_CATALOG_PATH)
+
+
+def get_embedding_model():
+    return _get("embedding_model", _load_embedding_model)
+
+
+def get_vector_store():
+    return _get("vector_store", _load_vector_store)
+
+
+def get_phone_index():
+    return _get("phone_index", _load_phone_index)
+
+
+def get_gibberish_detector():
+    return _get("gibberish_detector", _load_gibberish_detector)
+
+
+def get_llm():
+    return _get("llm", _load_llm)
+
+
+def get_question_cache():
+    return _get("question_cache", _load_question_cache)
+
+
+def get_candidate_ranker():
+    return _get("candidate_ranker", _load_candidate_ranker)
+
+
+def get_answer_cache():
+    return _get("answer_cache", _load_answer_cache)
+
+
+def get_speculation_executor():
+    return _get("speculation_executor", _load_speculation_executor)
+
+
+def get_candidate_session_loader():
+    return _get("candidate_session_loader", _load_candidate_session_loader)
+
+
+COMPONENTS = {
+    "phone_index": get_phone_index,
+    "gibberish_detector": get_gibberish_detector,
+    "llm": get_llm,
+    "embedding_model": get_embedding_model,
+    "vector_store": get_vector_store,
+}
+
+
+def warm_up(components=None):
+    for name in components or COMPONENTS:
+        try:
+            COMPONENTS[name]()
+        except Exception as e:
+            print(f"Failed to warm up {name}: {e}")
+    return startup_report()
+
+
+def startup_report():
+    lines = ["Startup time by component:"]
+    for name, seconds in sorted(startup_timings.items(), key=lambda item: -item[1]):
+        lines.append(f"  {name:<16} {seconds * 1000:8.1f} ms")
+    lines.append(f"  {'total':<16} {sum(startup_timings.values()) * 1000:8.1f} ms")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    print(warm_up())
@@ -0,0 +1,44 @@
+DISCLOSURE_PHRASES = ("as an ai", "language model")
+_HOLD_BACK = max(len(phrase) for phrase in DISCLOSURE_PHRASES) - 1
+
+
+def contains_disclosure(text):
+    lowered = text.lower()
+    return any(phrase in lowered for phrase in DISCLOSURE_PHRASES)
+
+
+class DisclosureFilter:
+    # Applies the AI-disclosure filter to a streamed response. Text is released
+    # only once it can no longer be the start of a flagged phrase, so a bad
+    # response is cut off before the phrase itself reaches the candidate.
+    def __init__(self):
+        self.text = ""
+        self.emitted = 0
+        self.flagged = False
+
+    def feed(self, chunk):
+        if self.flagged:
+            return ""
+        self.text += chunk or ""
+        if not self.emitted:
+            self.text = self.text.lstrip()
+        if contains_disclosure(self.text):
+            self.flagged = True
+            return ""
+        safe_end = max(self.emitted, len(self.text) - _HOLD_BACK)
+        released = self.text[self.emitted:safe_end]
+        self.emitted = safe_end
+        return released
+
+    def finish(self):
+        if self.flagged:
+            return ""
+        self.text = self.text.rstrip()
+        self.emitted = min(self.emitted, len(self.text))
+        released = self.text[self.emitted:]
+        self.emitted = len(self.text)
+        return released
+
+    @property
+    def emitted_text(self):
+        return self.text[:self.emitted]
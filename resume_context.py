@@ -0,0 +1,94 @@
+import threading
+
+from config import RESUME_CONTEXT_TOP_K, RESUME_CONTEXT_TOKEN_BUDGET, RESUME_CONTEXT_SCORE_MARGIN
+from resources import get_embedding_model, get_vector_store
+from metrics import registry as metrics
+
+# What each resume-based prompt needs to see, used as the retrieval query
+TOPIC_QUERIES = {
+    "tech_project_deep_dive": "Project: implementation details, architecture, libraries and performance",
+    "tech_function_design": "Skills: programming languages, APIs, data processing and algorithms",
+    "tech_syntax_and_language": "Skills: programming languages and frameworks used",
+    "tech_problem_solving": "Current Role and Project: real-world problems, scaling and debugging",
+    "tech_education_application": "Education: degree, university and applied theory",
+    "tech_project_impact": "Project: measurable impact, cost savings and efficiency gains",
+    "tech_platform_choice": "Skills and Project: platforms and technologies chosen",
+    "tech_scalability_decision": "Project: system design, data pipelines, throughput and latency",
+    "tech_performance_tuning": "Project: performance bottlenecks, database queries and optimization",
+}
+
+
+def topic_query_vector(topic):
+    # Topic queries are fixed, so the embedding service's query cache embeds each once
+    query = TOPIC_QUERIES.get(topic, topic.replace("_", " "))
+    return get_embedding_model().encode_query(query)
+
+
+def count_tokens(text):
+    tokenizer = getattr(get_embedding_model(), "tokenizer", None)
+    if tokenizer is None:
+        return len(text.split()) * 4 // 3
+    return len(tokenizer.encode(text, add_special_tokens=False))
+
+
+def fit_to_budget(chunks, token_budget):
+    selected, used = [], 0
+    for chunk in chunks:
+        tokens = count_tokens(chunk)
+        if used + tokens <= token_budget:
+            selected.append(chunk)
+            used += tokens
+            continue
+        if not selected:
+            # Keep the most relevant chunk even if it has to be cut
+            words = chunk.split()
+            ratio = token_budget / max(tokens, 1)
+            selected.append(" ".join(words[:max(1, int(len(words) * ratio))]))
+        break
+    return selected
+
+
+def select_chunks(chunks, scores, top_k=RESUME_CONTEXT_TOP_K, margin=RESUME_CONTEXT_SCORE_MARGIN,
+                  token_budget=RESUME_CONTEXT_TOKEN_BUDGET):
+    # The best-matching section always goes in; further sections only when they
+    # score nearly as well, so a topic does not pull in the rest of the resume
+    ranked = sorted(zip(scores, range(len(chunks))), key=lambda pair: -pair[0])
+    if not ranked:
+        return ""
+    best = ranked[0][0]
+    selected = [chunks[i] for score, i in ranked[:top_k] if chunks[i] and score >= best - margin]
+    return "\n".join(fit_to_budget(selected, token_budget))
+
+
+class ResumeContextRetriever:
+    # Fetches the resume chunks most relevant to one interview topic for one
+    # candidate, trimmed to a token budget. Results are cached for the session.
+    def __init__(self, store=None, top_k=RESUME_CONTEXT_TOP_K, token_budget=RESUME_CONTEXT_TOKEN_BUDGET,
+                 margin=RESUME_CONTEXT_SCORE_MARGIN):
+        self.store = store
+        self.top_k = top_k
+        self.token_budget = token_budget
+        self.margin = margin
+        self.cache = {}
+        self.lock = threading.Lock()
+
+    def context_for(self, candidate_id, topic):
+        key = (candidate_id, topic)
+        with self.lock:
+            if key in self.cache:
+                return self.cache[key]
+        store = self.store or get_vector_store()
+        vector = topic_query_vector(topic)
+        with metrics.timer("vector_store_seconds", op="query"):
+            matches = store.query(
+                vector,
+                top_k=self.top_k,
+                filter={"candidate_id": {"$eq": candidate_id}, "is_phone_entry": {"$eq": "false"}},
+            )
+        context = select_chunks(
+            [match["metadata"].get("text", "") for match in matches], [match["score"] for match in matches],
+            self.top_k, self.margin, self.token_budget,
+        )
+        with self.lock:
+            self.cache[key] = context
+        return context
@@ -0,0 +1,162 @@
+import sqlite3
+import threading
+import time
+
+import orjson
+
+from config import SESSION_STORE, SESSION_DB_PATH, SESSION_STORE_TTL, REDIS_URL
+
+
+def dumps(value):
+    return orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+class SessionStore:
+    # Persists interview state so any worker can resume any session. The
+    # small state snapshot is overwritten after each turn; the transcript is
+    # append-only, one entry per history line, so a turn never rewrites it.
+    def save_state(self, session_id, state):
+        raise NotImplementedError
+
+    def load_state(self, session_id):
+        raise NotImplementedError
+
+    def append_turn(self, session_id, seq, entry):
+        raise NotImplementedError
+
+    def load_transcript(self, session_id):
+        raise NotImplementedError
+
+    def delete(self, session_id):
+        raise NotImplementedError
+
+    def session_ids(self):
+        raise NotImplementedError
+
+    def purge(self, max_age=SESSION_STORE_TTL):
+        return 0
+
+
+class SQLiteSessionStore(SessionStore):
+    def __init__(self, path=SESSION_DB_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS session_state "
+            "(session_id TEXT PRIMARY KEY, state BLOB NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS transcript "
+            "(session_id TEXT NOT NULL, seq INTEGER NOT NULL, entry BLOB NOT NULL, "
+            "PRIMARY KEY (session_id, seq)) WITHOUT ROWID"
+        )
+        self.conn.commit()
+
+    def save_state(self, session_id, state):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO session_state (session_id, state, updated_at) VALUES (?, ?, ?)",
+                (session_id, dumps(state), time.time()),
+            )
+
+    def load_state(self, session_id):
+        with self.lock:
+            row = self.conn.execute("SELECT state FROM session_state WHERE session_id = ?", (session_id,)).fetchone()
+        return orjson.loads(row[0]) if row else None
+
+    def append_turn(self, session_id, seq, entry):
+        # Keyed by position, so replaying an append after a retry is harmless
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO transcript (session_id, seq, entry) VALUES (?, ?, ?)",
+                (session_id, seq, dumps(entry)),
+            )
+
+    def load_transcript(self, session_id):
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT entry FROM transcript WHERE session_id = ? ORDER BY seq", (session_id,)
+            ).fetchall()
+        return [orjson.loads(row[0]) for row in rows]
+
+    def delete(self, session_id):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM session_state WHERE session_id = ?", (session_id,))
+            self.conn.execute("DELETE FROM transcript WHERE session_id = ?", (session_id,))
+
+    def session_ids(self):
+        with self.lock:
+            return [row[0] for row in self.conn.execute("SELECT session_id FROM session_state")]
+
+    def purge(self, max_age=SESSION_STORE_TTL):
+        if not max_age:
+            return 0
+        cutoff = time.time() - max_age
+        with self.lock, self.conn:
+            stale = [row[0] for row in self.conn.execute(
+                "SELECT session_id FROM session_state WHERE updated_at < ?", (cutoff,)
+            )]
+            for session_id in stale:
+                self.conn.execute("DELETE FROM session_state WHERE session_id = ?", (session_id,))
+                self.conn.execute("DELETE FROM transcript WHERE session_id = ?", (session_id,))
+        return len(stale)
+
+    def close(self):
+        self.conn.close()
+
+
+class RedisSessionStore(SessionStore):
+    # Works with any client exposing the redis-py get/set/hset/hgetall/delete/expire/scan_iter
+    # calls, including fake_redis.FakeRedis. Expiry is left to key TTLs.
+    def __init__(self, client, prefix="hr:session:", ttl=SESSION_STORE_TTL):
+        self.client = client
+        self.prefix = prefix
+        self.ttl = int(ttl) or None
+
+    def _keys(self, session_id):
+        return f"{self.prefix}{session_id}:state", f"{self.prefix}{session_id}:transcript"
+
+    def save_state(self, session_id, state):
+        state_key, transcript_key = self._keys(session_id)
+        self.client.set(state_key, dumps(state), ex=self.ttl)
+        if self.ttl:
+            self.client.expire(transcript_key, self.ttl)
+
+    def load_state(self, session_id):
+        value = self.client.get(self._keys(session_id)[0])
+        return orjson.loads(value) if value else None
+
+    def append_turn(self, session_id, seq, entry):
+        # A hash field per position, so replaying an append after a retry is harmless
+        self.client.hset(self._keys(session_id)[1], str(seq), dumps(entry))
+
+    def load_transcript(self, session_id):
+        entries = self.client.hgetall(self._keys(session_id)[1])
+        return [orjson.loads(entries[seq]) for seq in sorted(entries, key=int)]
+
+    def delete(self, session_id):
+        self.client.delete(*self._keys(session_id))
+
+    def session_ids(self):
+        ids = []
+        for key in self.client.scan_iter(match=f"{self.prefix}*:state"):
+            key = key.decode("utf-8") if isinstance(key, bytes) else key
+            ids.append(key[len(self.prefix):-len(":state")])
+        return ids
+
+
+def create_session_store(backend=SESSION_STORE, path=SESSION_DB_PATH, redis_url=REDIS_URL):
+    if backend == "sqlite":
+        return SQLiteSessionStore(path)
+    if backend == "redis":
+        import redis
+
+        return RedisSessionStore(redis.Redis.from_url(redis_url))
+    if backend == "fake-redis":
+        from fake_redis import FakeRedis
+
+        return RedisSessionStore(FakeRedis())
+    raise ValueError(f"Unknown session store: {backend}")
@@ -0,0 +1,41 @@
+import numpy as np
+
+from answer_cache import AnswerCache
+
+FAQ = [
+    {"question": "Is this role remote?", "answer": "Hybrid, two office days."},
+    {"question": "What is the notice period?", "answer": "One month."},
+]
+
+
+class StubModel:
+    # One orthogonal direction per distinct question, so nothing is a near-duplicate
+    def __init__(self):
+        self.rows = {}
+
+    def encode_query(self, text):
+        vector = np.zeros(16, dtype=np.float32)
+        vector[self.rows.setdefault(text, len(self.rows))] = 1.0
+        return vector
+
+
+def test_eviction_never_overwrites_pinned_answers():
+    cache = AnswerCache(StubModel(), max_entries=1, faq=FAQ)
+    cache.add("Do you sponsor visas?", "Not currently.")
+    cache.add("Is there a signing bonus?", "Yes.")
+    assert cache.get("Is this role remote?") == "Hybrid, two office days."
+    assert cache.get("What is the notice period?") == "One month."
+    assert cache.get("Is there a signing bonus?") == "Yes."
+    assert cache.get("Do you sponsor visas?") is None
+    assert cache.stats()["entries"] == 3
+
+
+def test_no_room_for_unpinned_answers_skips_the_store():
+    cache = AnswerCache(StubModel(), max_entries=0, faq=FAQ)
+    cache.add("Do you sponsor visas?", "Not currently.")
+    assert cache.get("Do you sponsor visas?") is None
+    assert [cache.get(entry["question"]) for entry in FAQ] == [entry["answer"] for entry in FAQ]
+
+    empty = AnswerCache(StubModel(), max_entries=0)
+    empty.add("Do you sponsor visas?", "Not currently.")
+    assert empty.stats()["entries"] == 0
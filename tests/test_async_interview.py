@@ -0,0 +1,72 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+from async_interview import AsyncHRAssistant
+from prompts import OFFLINE_QUESTIONS
+
+
+class HangingLLM:
+    # Sends `chunks` and then never sends another
+    def __init__(self, chunks=()):
+        self.chunks = chunks
+
+    async def astream(self, prompt):
+        for chunk in self.chunks:
+            yield SimpleNamespace(content=chunk)
+        await asyncio.Event().wait()
+
+
+def stream_question(llm):
+    async def run():
+        semaphore = asyncio.Semaphore(1)
+        assistant = AsyncHRAssistant(
+            groq_llm=llm, llm_semaphore=semaphore, llm_timeout=0.2, speculate=False,
+            resume_retriever=SimpleNamespace(context_for=lambda candidate_id, topic: ""),
+        )
+        result = {}
+        chunks = [chunk async for chunk in assistant._astream_question("tech_project_deep_dive", {"resume": "R"}, result)]
+        return chunks, result["text"], semaphore.locked()
+
+    start = time.monotonic()
+    outcome = asyncio.run(asyncio.wait_for(run(), 5))
+    return outcome, time.monotonic() - start
+
+
+def test_stream_without_a_first_chunk_times_out():
+    (chunks, text, locked), elapsed = stream_question(HangingLLM())
+    assert elapsed < 2
+    assert not locked
+    assert text and "".join(chunks) == text
+
+
+def test_stream_stalling_midway_times_out():
+    (chunks, text, locked), elapsed = stream_question(HangingLLM(["Tell me ", "about "]))
+    assert elapsed < 2
+    assert not locked
+    # Whatever the disclosure filter already released is kept, and a fallback question follows
+    assert text.startswith("T") and text.endswith("?")
+    assert "".join(chunks) == text
+
+
+class SilentLLM:
+    async def ainvoke(self, prompt):
+        await asyncio.Event().wait()
+
+
+def test_timed_out_call_serves_the_offline_question():
+    async def run():
+        assistant = AsyncHRAssistant(
+            groq_llm=SilentLLM(), llm_timeout=0.1, speculate=False,
+            resume_retriever=SimpleNamespace(context_for=lambda candidate_id, topic: ""),
+        )
+        # A cached question would hide which fallback was taken
+        assistant.question_cache = None
+        return await assistant._aproduce_question("tech_project_deep_dive", resume="R")
+
+    assert asyncio.run(run()) == OFFLINE_QUESTIONS["tech_project_deep_dive"]
+
+
+def test_timed_out_stream_serves_the_offline_question():
+    (chunks, text, locked), _ = stream_question(HangingLLM())
+    assert text == OFFLINE_QUESTIONS["tech_project_deep_dive"]
@@ -0,0 +1,35 @@
+import json
+
+from chunking import chunk_by_fields, make_chunker
+from conftest import REPO_ROOT
+from ingest import generate_resume_text
+
+
+def load_resumes():
+    with open(f"{REPO_ROOT}/dummy-resume.json", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_resume_is_split_into_sections():
+    candidate = load_resumes()[0]
+    chunks = make_chunker("fields")(generate_resume_text(candidate))
+    assert len(chunks) == 2 + len(candidate["projects"])
+    assert chunks[0].startswith("Name:") and "Skills:" in chunks[0]
+    assert chunks[1] == f"Education: {candidate['education']}"
+    for chunk, project in zip(chunks[2:], candidate["projects"]):
+        assert chunk.startswith(f"Project: {project['title']}")
+
+
+def test_every_sample_resume_gets_several_chunks():
+    assert all(len(make_chunker("fields")(generate_resume_text(candidate))) > 1 for candidate in load_resumes())
+
+
+def test_oversized_section_is_capped_with_overlap():
+    lines = ["Project: Search"] + [f"Step {i}: " + "detail " * 10 for i in range(6)]
+    chunks = chunk_by_fields("\n".join(["Name: A"] + lines), max_chars=200, overlap=1)
+    assert chunks[0] == "Name: A"
+    pieces = chunks[1:]
+    assert len(pieces) > 1
+    assert all(len(piece) <= 200 for piece in pieces)
+    for previous, piece in zip(pieces, pieces[1:]):
+        assert piece.splitlines()[0] == previous.splitlines()[-1]
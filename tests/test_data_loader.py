@@ -0,0 +1,40 @@
+import numpy as np
+
+import data_loader
+from data_loader import digit_edit_distance, find_candidate_by_phone_embedding
+
+
+class StubStore:
+    def __init__(self, phones):
+        self.phones = phones
+
+    def query(self, vector, top_k=10, filter=None, include_values=False):
+        return [{"metadata": {"phone": phone, "name": phone, "is_phone_entry": "true"}} for phone in self.phones][:top_k]
+
+
+class StubModel:
+    def encode_query(self, text):
+        return np.zeros(4, dtype=np.float32)
+
+
+def lookup(monkeypatch, phones, query):
+    monkeypatch.setattr(data_loader, "get_vector_store", lambda: StubStore(phones))
+    monkeypatch.setattr(data_loader, "get_embedding_model", lambda: StubModel())
+    return find_candidate_by_phone_embedding(query, max_edits=1)
+
+
+def test_edit_distance():
+    assert digit_edit_distance("12125550199", "12125550199", 1) == 0
+    assert digit_edit_distance("12125550199", "12125550198", 1) == 1
+    assert digit_edit_distance("12125550199", "11990505959", 1) == 2
+
+
+def test_fuzzy_lookup_rejects_unrelated_numbers(monkeypatch):
+    assert lookup(monkeypatch, ["199-050-5959"], "+1-212-555-0199") is None
+    assert lookup(monkeypatch, ["199-050-5959"], "000") is None
+    assert lookup(monkeypatch, ["(212) 555-0199"], "+44 20 7946 0958") is None
+
+
+def test_fuzzy_lookup_accepts_single_digit_typo(monkeypatch):
+    meta = lookup(monkeypatch, ["199-050-5959", "(212) 555-0199"], "212-555-0198")
+    assert meta["phone"] == "(212) 555-0199"
@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from candidate_reader import CandidateReader
+from conftest import REPO_ROOT
+from gibberish import TECH_TERMS, GibberishDetector, Lexicon, candidate_vocabulary, tokenize
+
+# A small fixed lexicon stands in for the NLTK word list, which cannot be downloaded offline
+COMMON_WORDS = """
+a about after all also am an and any are as at be because been before but by can could did do does
+doing done for from get got had has have he her here him his how i if in into is it its just know last
+like made make many me more most my no not now of on one only or other our out over really said same
+see she so some still such than that the their them then there these they this those through time to
+too two up us very was way we well were what when where which while who why will with work would you
+your yes sure thanks thank good great please okay right team project projects role company job years
+year months month experience working worked build built data code python java system systems service
+design test tests testing production customer customers business people new part time full remote office
+""".split()
+
+GIBBERISH = [
+    "asdf qwer zxcv",
+    "jkjkjk hjkl fdsa",
+    "qqq wxqz lkjh poiu",
+    "sdfg ghjk mnbv",
+    "xyzzy zxcv",
+]
+
+ENGLISH = [
+    "I have worked on python backend services for five years",
+    "My notice period is two months and I could relocate",
+    "Yes, I deployed microservices with Kubernetes and mentored junior engineers",
+    "I enjoyed learning about distributed scheduling in my previous position",
+    "Salary expectations are flexible, I would prefer hybrid arrangements",
+]
+
+
+@pytest.fixture(scope="module")
+def detector():
+    words = set(COMMON_WORDS) | set(TECH_TERMS)
+    for candidate in CandidateReader(f"{REPO_ROOT}/dummy-resume.json"):
+        words |= candidate_vocabulary(candidate)
+    # The sample answers must be judged on n-gram scores, not lexicon hits
+    assert not any(word in words for text in GIBBERISH for word in tokenize(text))
+    return GibberishDetector(Lexicon.build(words), min_valid_ratio=0.3, ngram_threshold=-2.8)
+
+
+@pytest.mark.parametrize("text", GIBBERISH)
+def test_keyboard_mashing_is_gibberish(detector, text):
+    assert detector.is_gibberish(text)
+    assert not detector.valid_tokens(tokenize(text)).any()
+
+
+@pytest.mark.parametrize("text", ENGLISH)
+def test_english_answers_are_not_gibberish(detector, text):
+    assert not detector.is_gibberish(text)
+
+
+def test_unknown_english_words_pass_the_ngram_threshold(detector):
+    tokens = [token for text in ENGLISH for token in tokenize(text)]
+    unknown = [token for token, known in zip(tokens, detector.lexicon.contains(tokens)) if not known]
+    assert len(unknown) >= 15
+    assert detector.valid_tokens(unknown).mean() >= 0.8
+
+
+def test_batch_matches_single_calls(detector):
+    texts = GIBBERISH + ENGLISH + [""]
+    assert detector.is_gibberish_batch(texts).tolist() == [detector.is_gibberish(text) for text in texts]
+
+
+def test_saved_lexicon_loads_its_trigram_model(detector, tmp_path, monkeypatch):
+    path = str(tmp_path / "lexicon.npy")
+    detector.lexicon.save(path)
+    monkeypatch.setattr(Lexicon, "_trigram_model", lambda self, backoff: pytest.fail("trigram model was rebuilt"))
+    lexicon = Lexicon.load(path)
+    assert isinstance(lexicon.trigram_logprob, np.memmap)
+    assert np.array_equal(lexicon.trigram_logprob, detector.lexicon.trigram_logprob)
+    assert GibberishDetector(lexicon).is_gibberish_batch(GIBBERISH + ENGLISH).tolist() == \
+        detector.is_gibberish_batch(GIBBERISH + ENGLISH).tolist()
@@ -0,0 +1,34 @@
+from types import SimpleNamespace
+
+from interview_manager import ConversationalHRAssistant
+
+
+class StubLoader:
+    def __init__(self, session):
+        self.session = session
+
+    def load(self, candidate_info):
+        return self.session
+
+
+def make_assistant(context=""):
+    session = SimpleNamespace(context_for=lambda topic: context, resume_text="Name: Ada\nEducation: B.Sc in Physics")
+    retriever = SimpleNamespace(context_for=lambda candidate_id, topic: "")
+    assistant = ConversationalHRAssistant(speculate=False, resume_retriever=retriever, session_loader=StubLoader(session))
+    assistant.candidate_info = {"candidate_id": "c1", "name": "Ada", "phone": "555"}
+    return assistant
+
+
+def test_prompt_falls_back_to_the_session_resume():
+    # dummy-resume.json records carry no resume_text, so the session's reassembled resume is used
+    assistant = make_assistant()
+    assert assistant._resume_text() == ""
+    prompt = assistant._format_prompt("tech_project_deep_dive", resume=assistant._resume_text())
+    assert "Education: B.Sc in Physics" in prompt
+
+
+def test_topic_context_wins_over_the_full_resume():
+    assistant = make_assistant(context="Project: Search - ranking service")
+    prompt = assistant._format_prompt("tech_project_deep_dive", resume="")
+    assert "Project: Search" in prompt
+    assert "Education:" not in prompt
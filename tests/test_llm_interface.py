@@ -0,0 +1,24 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("langchain_groq")
+
+from llm_interface import initialize_groq_llm
+
+
+def test_transport_timeout_follows_the_caller():
+    llm = initialize_groq_llm("test-key", timeout=5)
+    assert llm.http_client.timeout.read == 5
+
+
+def test_each_event_loop_gets_its_own_async_client():
+    llm = initialize_groq_llm("test-key", timeout=5)
+
+    async def clients():
+        return llm._async_llm(), llm._async_llm()
+
+    first, again = asyncio.run(clients())
+    second, _ = asyncio.run(clients())
+    assert first is again
+    assert second is not first
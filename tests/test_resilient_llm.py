@@ -0,0 +1,49 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from fake_llm import FakeLLM
+from resilient_llm import LLMDeadlineExceeded, ResilientLLM
+
+
+def test_stream_first_chunk_respects_attempt_timeout():
+    fake = FakeLLM(latency=1.0)
+    llm = ResilientLLM(fake, deadline=1.2, attempt_timeout=0.2, max_attempts=2, hedge_after=0, max_backoff=0.01)
+    start = time.monotonic()
+    with pytest.raises(LLMDeadlineExceeded):
+        list(llm.stream("prompt"))
+    assert time.monotonic() - start < 0.8
+    assert fake.calls == 2
+
+
+def test_hedges_only_use_free_permits():
+    fake = FakeLLM(latency=0.3)
+    llm = ResilientLLM(fake, attempt_timeout=1.0, hedge_after=0.05, max_concurrency=2)
+    llm.invoke("alone")
+    assert fake.calls == 2
+
+    fake = FakeLLM(latency=0.3)
+    llm = ResilientLLM(fake, attempt_timeout=1.0, hedge_after=0.05, max_concurrency=2)
+    threads = [threading.Thread(target=llm.invoke, args=(f"prompt {i}",)) for i in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert fake.calls == 2
+    assert fake.max_in_flight == 2
+
+
+def test_async_hedges_only_use_free_permits():
+    fake = FakeLLM(latency=0.3)
+    llm = ResilientLLM(fake, attempt_timeout=1.0, hedge_after=0.05, max_concurrency=3)
+
+    async def run():
+        await asyncio.gather(*(llm.ainvoke(f"prompt {i}") for i in range(2)))
+
+    asyncio.run(run())
+    # Two primaries leave room for one hedge
+    assert fake.calls == 3
+    assert fake.max_in_flight == 3
+    assert llm.in_flight == 0
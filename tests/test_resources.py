@@ -0,0 +1,35 @@
+import json
+import os
+import subprocess
+import sys
+
+from conftest import REPO_ROOT
+
+# Runs in a fresh interpreter so no resource is cached yet. The embedding
+# loader is swapped for the fake model, but still goes through resources._get,
+# which is where nested loads used to deadlock.
+BUILD_ASSISTANT = """
+import resources
+from embedding_service import EmbeddingService
+from fake_embedding import FakeEmbeddingModel
+from fake_llm import FakeLLM
+
+resources._load_embedding_model = lambda: EmbeddingService(FakeEmbeddingModel())
+
+from interview_manager import ConversationalHRAssistant
+
+assistant = ConversationalHRAssistant(groq_llm=FakeLLM(), speculate=False)
+print(assistant.answer_cache.stats()["pinned"])
+"""
+
+
+def test_assistant_builds_in_fresh_process(tmp_path):
+    faq_path = tmp_path / "company_faq.json"
+    faq_path.write_text(json.dumps([{"question": "Is this role remote?", "answer": "It is hybrid."}]))
+    env = dict(os.environ, ANSWER_CACHE_ENABLED="true", ANSWER_CACHE_FAQ_PATH=str(faq_path))
+    result = subprocess.run(
+        [sys.executable, "-c", BUILD_ASSISTANT], cwd=REPO_ROOT, env=env,
+        capture_output=True, text=True, timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == "1"
@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+import resume_context
+from candidate_session import CandidateSession
+from chunking import make_chunker
+from conftest import REPO_ROOT
+from embedding_service import EmbeddingService
+from fake_embedding import FakeEmbeddingModel
+from ingest import build_candidate_records, generate_resume_text
+from resume_context import ResumeContextRetriever, select_chunks
+
+pytest.importorskip("faiss")
+
+from vector_store import FaissStore
+
+
+@pytest.fixture
+def model(monkeypatch):
+    model = EmbeddingService(FakeEmbeddingModel())
+    monkeypatch.setattr(resume_context, "get_embedding_model", lambda: model)
+    return model
+
+
+def load_resumes(count=5):
+    with open(f"{REPO_ROOT}/dummy-resume.json", encoding="utf-8") as f:
+        return json.load(f)[:count]
+
+
+def test_topics_pick_their_own_sections(model):
+    for candidate in load_resumes():
+        resume = generate_resume_text(candidate)
+        chunks = make_chunker("fields")(resume)
+        session = CandidateSession({"candidate_id": "c1"}, chunks, model.encode(chunks))
+        projects = session.context_for("tech_project_deep_dive")
+        education = session.context_for("tech_education_application")
+        assert projects.startswith("Project:")
+        assert education.startswith("Education:")
+        assert projects != education
+        assert len(projects) < len(resume) and len(education) < len(resume)
+
+
+def test_retriever_uses_section_chunks_from_the_store(model, tmp_path):
+    store = FaissStore(str(tmp_path), index_type="flat", dimension=FakeEmbeddingModel().dimension)
+    for number, candidate in enumerate(load_resumes(3)):
+        records = build_candidate_records(f"c{number}", candidate, make_chunker("fields"))
+        vectors = model.encode([record["text"] for record in records])
+        store.upsert([
+            {"id": record["id"], "values": vector, "metadata": record["metadata"]}
+            for record, vector in zip(records, vectors)
+        ])
+    retriever = ResumeContextRetriever(store)
+    education = retriever.context_for("c1", "tech_education_application")
+    projects = retriever.context_for("c1", "tech_project_deep_dive")
+    assert education == f"Education: {load_resumes(3)[1]['education']}"
+    assert projects.startswith("Project:") and projects != education
+
+
+def test_select_chunks_keeps_close_runners_up_only(model):
+    chunks = ["best", "close", "far"]
+    assert select_chunks(chunks, [0.60, 0.57, 0.30], top_k=3, margin=0.05) == "best\nclose"
+    assert select_chunks(chunks, [0.60, 0.50, 0.30], top_k=3, margin=0.05) == "best"
+    assert select_chunks(chunks, [0.60, 0.59, 0.58], top_k=2, margin=0.05) == "best\nclose"
+    assert select_chunks([], [], top_k=2) == ""
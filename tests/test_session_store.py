@@ -0,0 +1,24 @@
+import pytest
+
+from fake_redis import FakeRedis
+from session_store import RedisSessionStore, SQLiteSessionStore
+
+
+@pytest.fixture(params=["sqlite", "redis"])
+def store(request, tmp_path):
+    if request.param == "sqlite":
+        store = SQLiteSessionStore(str(tmp_path / "sessions.db"))
+        yield store
+        store.close()
+    else:
+        yield RedisSessionStore(FakeRedis())
+
+
+def test_replayed_turns_are_not_duplicated(store):
+    entries = [{"speaker": "HR", "text": f"Question {seq}"} for seq in range(12)]
+    for seq, entry in enumerate(entries):
+        store.append_turn("s1", seq, entry)
+    # A retried write replays turns that were already stored
+    for seq in (10, 11, 10):
+        store.append_turn("s1", seq, entries[seq])
+    assert store.load_transcript("s1") == entries
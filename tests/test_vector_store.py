@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("faiss")
+
+from vector_store import FaissStore
+
+
+def make_vectors(start, count, dimension=8, seed=0):
+    rng = np.random.default_rng(seed + start)
+    return [
+        {"id": f"v{i}", "values": rng.normal(size=dimension).tolist(), "metadata": {"n": i}}
+        for i in range(start, start + count)
+    ]
+
+
+def test_hnsw_compacts_deleted_vectors(tmp_path):
+    store = FaissStore(str(tmp_path), index_type="hnsw", dimension=8, hnsw_max_tombstones=0.2)
+    vectors = make_vectors(0, 100)
+    store.upsert(vectors)
+    store.delete([f"v{i}" for i in range(10)])
+    assert store.tombstones == 10
+    store.query(vectors[50]["values"], top_k=5)
+    assert store.index.ntotal == 100
+
+    store.delete([f"v{i}" for i in range(10, 30)])
+    matches = store.query(vectors[50]["values"], top_k=5)
+    assert store.tombstones == 0
+    assert store.index.ntotal == 70
+    assert matches[0]["id"] == "v50"
+    assert all(int(match["id"][1:]) >= 30 for match in matches)
+
+
+def test_ivf_retrains_as_the_store_grows(tmp_path):
+    store = FaissStore(str(tmp_path), index_type="ivf", dimension=8, ivf_nlist=256)
+    store.upsert(make_vectors(0, 39 * 4))
+    store.query(make_vectors(0, 1)[0]["values"])
+    assert store.faiss.extract_index_ivf(store.index).nlist == 4
+
+    store.upsert(make_vectors(39 * 4, 39 * 3))
+    store.query(make_vectors(0, 1)[0]["values"])
+    assert store.faiss.extract_index_ivf(store.index).nlist == 4
+
+    store.upsert(make_vectors(39 * 7, 39))
+    matches = store.query(make_vectors(0, 1)[0]["values"], top_k=3)
+    assert store.faiss.extract_index_ivf(store.index).nlist == 8
+    assert store.index.ntotal == 39 * 8
+    assert matches[0]["id"] == "v0"
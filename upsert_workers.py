@@ -0,0 +1,70 @@
+import queue
+import threading
+from tenacity import Retrying, stop_after_attempt, wait_random_exponential
+
+_STOP = object()
+
+
+class UpsertWorkerPool:
+    # Drains a bounded queue of vector batches with a pool of threads so the
+    # encoder keeps running while upserts wait on the network. A full queue
+    # blocks submit(), which is the backpressure on the producer.
+    def __init__(self, index, on_done, workers=4, queue_size=8, max_attempts=5, max_backoff=10.0):
+        self.index = index
+        self.on_done = on_done
+        self.max_attempts = max_attempts
+        self.max_backoff = max_backoff
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.lock = threading.Lock()
+        self.retries = 0
+        self.failed_batches = []
+        self.max_queue_depth = 0
+        self.threads = [
+            threading.Thread(target=self._run, name=f"upsert-worker-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, batch):
+        self.queue.put(batch)
+        depth = self.queue.qsize()
+        with self.lock:
+            self.max_queue_depth = max(self.max_queue_depth, depth)
+
+    def _upsert_with_retry(self, batch):
+        retrying = Retrying(
+            stop=stop_after_attempt(self.max_attempts),
+            wait=wait_random_exponential(multiplier=0.5, max=self.max_backoff),
+            reraise=True,
+        )
+        for attempt in retrying:
+            with attempt:
+                if attempt.retry_state.attempt_number > 1:
+                    with self.lock:
+                        self.retries += 1
+                self.index.upsert(vectors=batch)
+
+    def _run(self):
+        while True:
+            batch = self.queue.get()
+            try:
+                if batch is _STOP:
+                    return
+                try:
+                    self._upsert_with_retry(batch)
+                except Exception as e:
+                    print(f"Error upserting batch of {len(batch)} vectors after {self.max_attempts} attempts: {e}")
+                    with self.lock:
+                        self.failed_batches.append([vector["id"] for vector in batch])
+                    self.on_done(batch, failed=True)
+                    continue
+                self.on_done(batch, failed=False)
+            finally:
+                self.queue.task_done()
+
+    def close(self):
+        for _ in self.threads:
+            self.queue.put(_STOP)
+        for thread in self.threads:
+            thread.join()
@@ -0,0 +1,312 @@
+import json
+import os
+import sqlite3
+import threading
+
+import numpy as np
+
+from config import (
+    VECTOR_STORE, FAISS_STORE_DIR, FAISS_INDEX_TYPE, EMBEDDING_DIMENSION,
+    PINECONE_API_KEY, PINECONE_INDEX_NAME,
+)
+
+
+class VectorStore:
+    # Common interface for the vector backends. Vectors use the Pinecone upsert
+    # shape ({"id", "values", "metadata"}); matches come back as plain dicts.
+    def upsert(self, vectors):
+        raise NotImplementedError
+
+    def query(self, vector, top_k=10, filter=None, include_values=False):
+        raise NotImplementedError
+
+    def fetch(self, ids):
+        raise NotImplementedError
+
+    def delete(self, ids):
+        raise NotImplementedError
+
+    def save(self):
+        pass
+
+
+class PineconeStore(VectorStore):
+    def __init__(self, index, fetch_batch_size=100):
+        self.index = index
+        self.fetch_batch_size = fetch_batch_size
+
+    def upsert(self, vectors):
+        return self.index.upsert(vectors=vectors)
+
+    def query(self, vector, top_k=10, filter=None, include_values=False):
+        vector = np.asarray(vector, dtype=np.float32).tolist()
+        kwargs = {"vector": vector, "top_k": top_k, "include_metadata": True, "include_values": include_values}
+        if filter:
+            kwargs["filter"] = filter
+        result = self.index.query(**kwargs)
+        return [
+            {
+                "id": match.id,
+                "score": match.score,
+                "metadata": dict(match.metadata or {}),
+                "values": list(match.values) if include_values and match.values else None,
+            }
+            for match in result.matches
+        ]
+
+    def fetch(self, ids):
+        found = {}
+        for i in range(0, len(ids), self.fetch_batch_size):
+            result = self.index.fetch(ids=ids[i:i + self.fetch_batch_size])
+            for vector_id, vector in result.vectors.items():
+                found[vector_id] = {"values": list(vector.values), "metadata": dict(vector.metadata or {})}
+        return found
+
+    def delete(self, ids):
+        return self.index.delete(ids=ids)
+
+
+class FaissStore(VectorStore):
+    # Local cosine-similarity store: a FAISS index over L2-normalized vectors
+    # (flat, ivf or hnsw) plus a SQLite sidecar holding ids, metadata and raw
+    # values. With read_only=True the index file is memory-mapped. The index is
+    # rebuilt from SQLite when HNSW tombstones pass `hnsw_max_tombstones` of its
+    # entries, or when an IVF store has grown enough to use `ivf_retrain_factor`
+    # times as many lists as it was trained with.
+    def __init__(self, directory=FAISS_STORE_DIR, index_type=FAISS_INDEX_TYPE, dimension=EMBEDDING_DIMENSION,
+                 read_only=False, ivf_nlist=256, hnsw_m=32, hnsw_max_tombstones=0.2, ivf_retrain_factor=2):
+        import faiss
+
+        self.faiss = faiss
+        self.directory = directory
+        self.index_type = index_type
+        self.dimension = dimension
+        self.read_only = read_only
+        self.ivf_nlist = ivf_nlist
+        self.hnsw_m = hnsw_m
+        self.hnsw_max_tombstones = hnsw_max_tombstones
+        self.ivf_retrain_factor = ivf_retrain_factor
+        self.index_path = os.path.join(directory, "index.faiss")
+        self.lock = threading.RLock()
+
+        os.makedirs(directory, exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(directory, "metadata.db"), check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS vectors ("
+            "int_id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "vector_id TEXT UNIQUE NOT NULL, "
+            "metadata TEXT NOT NULL, "
+            "vector_values BLOB NOT NULL, "
+            "indexed INTEGER NOT NULL DEFAULT 0)"
+        )
+        self.db.commit()
+
+        if os.path.exists(self.index_path):
+            flags = faiss.IO_FLAG_MMAP if read_only else 0
+            self.index = faiss.read_index(self.index_path, flags)
+        else:
+            self.index = self._new_index()
+        # Deleted vectors still in the index (only HNSW keeps them)
+        live = self.db.execute("SELECT COUNT(*) FROM vectors WHERE indexed = 1").fetchone()[0]
+        self.tombstones = max(0, self.index.ntotal - live)
+
+    def _new_index(self, training_size=0):
+        faiss = self.faiss
+        if self.index_type == "flat":
+            base = faiss.IndexFlatIP(self.dimension)
+        elif self.index_type == "hnsw":
+            base = faiss.IndexHNSWFlat(self.dimension, self.hnsw_m, faiss.METRIC_INNER_PRODUCT)
+        elif self.index_type == "ivf":
+            # Roughly 39 training points per centroid, as FAISS recommends
+            nlist = max(1, min(self.ivf_nlist, training_size // 39)) if training_size else self.ivf_nlist
+            quantizer = faiss.IndexFlatIP(self.dimension)
+            base = faiss.IndexIVFFlat(quantizer, self.dimension, nlist, faiss.METRIC_INNER_PRODUCT)
+        else:
+            raise ValueError(f"Unsupported FAISS index type: {self.index_type}")
+        return faiss.IndexIDMap2(base)
+
+    def _check_writable(self):
+        if self.read_only:
+            raise RuntimeError("FaissStore was opened read-only")
+
+    def _normalize(self, matrix):
+        matrix = np.ascontiguousarray(np.atleast_2d(np.asarray(matrix, dtype=np.float32)))
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.where(norms == 0, 1.0, norms)
+
+    def _remove_int_ids(self, int_ids):
+        if not int_ids:
+            return
+        if self.index_type == "hnsw":
+            # HNSW cannot remove vectors; orphaned ids are skipped at query time until the next rebuild
+            self.tombstones += len(int_ids)
+            return
+        self.index.remove_ids(np.asarray(int_ids, dtype=np.int64))
+
+    def upsert(self, vectors):
+        self._check_writable()
+        with self.lock:
+            ids = [vector["id"] for vector in vectors]
+            self._delete_locked(ids)
+            matrix = self._normalize([vector["values"] for vector in vectors])
+            with self.db:
+                int_ids = []
+                for vector, values in zip(vectors, matrix):
+                    cursor = self.db.execute(
+                        "INSERT INTO vectors (vector_id, metadata, vector_values) VALUES (?, ?, ?)",
+                        (vector["id"], json.dumps(vector.get("metadata") or {}), values.tobytes()),
+                    )
+                    int_ids.append(cursor.lastrowid)
+            if self.index.is_trained:
+                self._add_to_index(np.asarray(int_ids, dtype=np.int64), matrix)
+        return {"upserted_count": len(vectors)}
+
+    def _add_to_index(self, int_ids, matrix):
+        self.index.add_with_ids(matrix, int_ids)
+        with self.db:
+            self.db.executemany("UPDATE vectors SET indexed = 1 WHERE int_id = ?", [(int(i),) for i in int_ids])
+
+    def _needs_rebuild(self):
+        if self.index_type == "hnsw":
+            return self.tombstones > self.hnsw_max_tombstones * self.index.ntotal
+        if self.index_type == "ivf":
+            # nlist was sized for the training set; retrain once the store supports several times as many lists
+            nlist = self.faiss.extract_index_ivf(self.index).nlist
+            return min(self.ivf_nlist, self.index.ntotal // 39) >= self.ivf_retrain_factor * nlist
+        return False
+
+    def _build_pending(self):
+        # IVF needs training data, so vectors written before training wait in SQLite
+        if self.index.is_trained and not self._needs_rebuild():
+            return
+        rows = self.db.execute("SELECT int_id, vector_values FROM vectors").fetchall()
+        if not rows:
+            return
+        int_ids = np.asarray([row[0] for row in rows], dtype=np.int64)
+        matrix = np.stack([np.frombuffer(row[1], dtype=np.float32) for row in rows])
+        self.index = self._new_index(training_size=len(rows))
+        if not self.index.is_trained:
+            self.index.train(matrix)
+        self._add_to_index(int_ids, matrix)
+        self.tombstones = 0
+
+    def _delete_locked(self, ids):
+        if not ids:
+            return
+        placeholders = ",".join("?" * len(ids))
+        rows = self.db.execute(
+            f"SELECT int_id, indexed FROM vectors WHERE vector_id IN ({placeholders})", ids
+        ).fetchall()
+        self._remove_int_ids([row[0] for row in rows if row[1]])
+        with self.db:
+            self.db.execute(f"DELETE FROM vectors WHERE vector_id IN ({placeholders})", ids)
+
+    def delete(self, ids):
+        self._check_writable()
+        with self.lock:
+            for i in range(0, len(ids), 500):
+                self._delete_locked(list(ids[i:i + 500]))
+        return {}
+
+    def _filter_int_ids(self, filter):
+        clauses, params = [], []
+        for key, condition in filter.items():
+            path = f"$.{key}"
+            if isinstance(condition, dict) and "$in" in condition:
+                values = list(condition["$in"])
+                clauses.append(f"json_extract(metadata, ?) IN ({','.join('?' * len(values))})")
+                params.extend([path] + values)
+            else:
+                value = condition.get("$eq") if isinstance(condition, dict) else condition
+                clauses.append("json_extract(metadata, ?) = ?")
+                params.extend([path, value])
+        rows = self.db.execute(
+            f"SELECT int_id FROM vectors WHERE indexed = 1 AND {' AND '.join(clauses)}", params
+        ).fetchall()
+        return np.asarray([row[0] for row in rows], dtype=np.int64)
+
+    def _search_params(self, selector):
+        faiss = self.faiss
+        if self.index_type == "hnsw":
+            return faiss.SearchParametersHNSW(sel=selector)
+        if self.index_type == "ivf":
+            return faiss.SearchParametersIVF(sel=selector, nprobe=min(16, faiss.extract_index_ivf(self.index).nlist))
+        return faiss.SearchParameters(sel=selector)
+
+    def query(self, vector, top_k=10, filter=None, include_values=False):
+        with self.lock:
+            if not self.read_only:
+                self._build_pending()
+            if self.index.ntotal == 0:
+                return []
+            params = None
+            if filter:
+                allowed = self._filter_int_ids(filter)
+                if len(allowed) == 0:
+                    return []
+                params = self._search_params(self.faiss.IDSelectorBatch(allowed))
+            elif self.index_type == "ivf":
+                params = self._search_params(None)
+            # Over-fetch to make up for HNSW entries orphaned by deletes
+            k = min(self.index.ntotal, top_k + self.tombstones)
+            scores, int_ids = self.index.search(self._normalize(vector), k, params=params)
+
+            matches = []
+            for score, int_id in zip(scores[0], int_ids[0]):
+                if int_id < 0:
+                    continue
+                row = self.db.execute(
+                    "SELECT vector_id, metadata, vector_values FROM vectors WHERE int_id = ?", (int(int_id),)
+                ).fetchone()
+                if row is None:
+                    continue
+                matches.append({
+                    "id": row[0],
+                    "score": float(score),
+                    "metadata": json.loads(row[1]),
+                    "values": np.frombuffer(row[2], dtype=np.float32).tolist() if include_values else None,
+                })
+                if len(matches) == top_k:
+                    break
+            return matches
+
+    def fetch(self, ids):
+        found = {}
+        with self.lock:
+            for i in range(0, len(ids), 500):
+                batch = list(ids[i:i + 500])
+                rows = self.db.execute(
+                    f"SELECT vector_id, metadata, vector_values FROM vectors WHERE vector_id IN ({','.join('?' * len(batch))})",
+                    batch,
+                ).fetchall()
+                for vector_id, metadata, values in rows:
+                    found[vector_id] = {
+                        "values": np.frombuffer(values, dtype=np.float32).tolist(),
+                        "metadata": json.loads(metadata),
+                    }
+        return found
+
+    def save(self):
+        self._check_writable()
+        with self.lock:
+            self._build_pending()
+            tmp_path = f"{self.index_path}.tmp"
+            self.faiss.write_index(self.index, tmp_path)
+            os.replace(tmp_path, self.index_path)
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM vectors").fetchone()[0]
+
+
+def create_vector_store(backend=VECTOR_STORE, read_only=False, pinecone_index=None):
+    if backend == "faiss":
+        return FaissStore(read_only=read_only)
+    if backend == "pinecone":
+        if pinecone_index is None:
+            from pinecone import Pinecone
+
+            if not PINECONE_API_KEY:
+                raise ValueError("PINECONE_API_KEY not found in environment.")
+            pinecone_index = Pinecone(api_key=PINECONE_API_KEY).Index(PINECONE_INDEX_NAME)
+        return PineconeStore(pinecone_index)
+    raise ValueError(f"Unknown vector store backend: {backend}")